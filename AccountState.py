@@ -0,0 +1,87 @@
+import time
+from threading import Lock
+from Logger import *
+
+class AccountState:
+    """Local copy of the futures account: seeded over REST, kept current from user-data stream events.
+
+    ACCOUNT_UPDATE carries wallet balances and position amounts/unrealized PnL; an ORDER_TRADE_UPDATE fill only
+    marks the symbol as touched. seed() is repeated every account_reconcile_interval to catch drift (missed
+    events, unrealized PnL moving with the mark price); anything the stream updated while that REST call was
+    in flight is newer than the snapshot and is kept.
+    """
+    def __init__(self, client):
+        self.client = client
+        self.lock = Lock()
+        self.wallet = {}                              # asset -> wallet balance
+        self.positions = {}                           # (symbol, positionSide) -> position amount
+        self.entry_prices, self.unrealized = {}, {}   # (symbol, positionSide) -> entry price / unrealized PnL
+        self._snapshot_wallet, self._total_wallet = {}, 0.0
+        self._touched = {}                            # asset or symbol -> time.monotonic() of its last stream event
+        self.seeded = False
+
+    def seed(self):
+        """(Re)load balances and positions with one futures_account() call; returns the symbols whose position drifted."""
+        t0 = time.monotonic()
+        a = self.client.futures_account()
+        drift = set()
+        with self.lock:
+            for x in a['assets']:
+                asset = x['asset']
+                self._snapshot_wallet[asset] = float(x['walletBalance'])
+                if self._touched.get(asset, 0) < t0: self.wallet[asset] = float(x['walletBalance'])
+            self._total_wallet = float(a['totalWalletBalance'])
+            for p in a['positions']:
+                key = (p['symbol'], p.get('positionSide', 'BOTH'))
+                if self._touched.get(key[0], 0) >= t0: continue
+                amt = float(p['positionAmt'])
+                if self.seeded and amt != self.positions.get(key, 0.0): drift.add(key[0])
+                self._set_position(key, amt, float(p['entryPrice']), float(p['unrealizedProfit']))
+            self.seeded = True
+        return drift
+
+    def _set_position(self, key, amt, entry, unrealized):
+        if amt:
+            self.positions[key], self.entry_prices[key], self.unrealized[key] = amt, entry, unrealized
+        else:
+            for d in (self.positions, self.entry_prices, self.unrealized): d.pop(key, None)
+
+    def apply(self, msg):
+        """Update from a user-data stream event (the messages TradeManager.monitor_trades receives)."""
+        now = time.monotonic()
+        with self.lock:
+            if msg.get('e') == 'ACCOUNT_UPDATE':
+                for b in msg['a'].get('B', []):
+                    self.wallet[b['a']] = float(b['wb'])
+                    self._touched[b['a']] = now
+                for p in msg['a'].get('P', []):
+                    self._set_position((p['s'], p.get('ps', 'BOTH')), float(p['pa']), float(p['ep']), float(p['up']))
+                    self._touched[p['s']] = now
+            elif msg.get('e') == 'ORDER_TRADE_UPDATE' and msg['o']['X'] in ('FILLED', 'PARTIALLY_FILLED'):
+                self._touched[msg['o']['s']] = now  # a reconcile already in flight predates this fill
+
+    def open_positions(self):
+        """Symbols with a non-zero position."""
+        with self.lock:
+            return list({sym for (sym, _), amt in self.positions.items() if amt})
+
+    def position_amount(self, symbol):
+        with self.lock:
+            return sum(amt for (sym, _), amt in self.positions.items() if sym == symbol)
+
+    def balance(self, asset='USDT'):
+        with self.lock:
+            return self.wallet.get(asset)
+
+    def _wallet_total(self):
+        # the snapshot's total moved by whatever the stream changed since
+        return self._total_wallet + sum(v - self._snapshot_wallet.get(k, 0.0) for k, v in self.wallet.items())
+
+    def total_wallet_balance(self):
+        with self.lock:
+            return self._wallet_total()
+
+    def total_margin_balance(self):
+        """Wallet balance plus unrealized PnL as of the last event or reconcile."""
+        with self.lock:
+            return self._wallet_total() + sum(self.unrealized.values())
@@ -0,0 +1,205 @@
+import os, glob, time, argparse
+from Logger import *
+import numpy as np, pandas as pd
+import BotClass, KlineStore
+import TradingStrats as TS
+from LiveTradingConfig import trading_strategy, TP_SL_choice, SL_mult, TP_mult, custom_tp_sl_functions
+
+KLINE_COLUMNS = {'Date': 6, 'Open': 1, 'High': 2, 'Low': 3, 'Close': 4, 'Volume': 7}  # same fields as CustomClient.get_historical()
+
+def _read_kline_file(path):
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path)
+    else:
+        with open(path) as f: first = f.readline()
+        df = pd.read_csv(path, header=None if first[:1].isdigit() else 0)  # newer data.binance.vision files carry a header row
+    return pd.DataFrame({k: pd.to_numeric(df.iloc[:, i]) for k, i in KLINE_COLUMNS.items()})
+
+def load_klines(path):
+    """Load Binance kline CSV/Parquet files (a file, a directory or a glob) into {column: float64 array}, sorted and de-duplicated by close time.
+
+    A KlineStore symbol directory (e.g. kline_cache/1m/BTCUSDT) is read as is.
+    """
+    if os.path.isfile(os.path.join(path, 'Date.f8')):
+        return {k: np.array(v) for k, v in KlineStore.read_columns(path).items()}
+    paths = sorted(glob.glob(os.path.join(path, '*.csv')) + glob.glob(os.path.join(path, '*.parquet'))) if os.path.isdir(path) else sorted(glob.glob(path))
+    if not paths: raise FileNotFoundError(f'load_klines() - no kline files at {path}')
+    df = pd.concat([_read_kline_file(p) for p in paths]).drop_duplicates('Date').sort_values('Date')
+    return {k: df[k].to_numpy(dtype=float) for k in KLINE_COLUMNS}
+
+def _sh(a, k):
+    """a shifted k bars into the past (a[t-k] at t), NaN before the start."""
+    out = np.full(len(a), np.nan)
+    out[k:] = a[:len(a) - k]
+    return out
+
+def _decide(long, short, short_first=False):
+    d = np.full(len(long), -99)
+    if short_first: d[long] = 1; d[short] = 0
+    else: d[short] = 0; d[long] = 1
+    return d
+
+def _v_StochRSIMACD(c, v):
+    fd, fk, R, M, S = v('fastd'), v('fastk'), v('RSI'), v('MACD'), v('macdsignal')
+    x = lambda a, k: _sh(a, k)
+    bull = ((fd < 20) & (fk < 20) & (R > 50) & (M > S) & (x(M, 1) < x(S, 1))) | \
+           ((x(fd, 1) < 20) & (x(fk, 1) < 20) & (R > 50) & (M > S) & (x(M, 2) < x(S, 2)) & (fd < 80) & (fk < 80)) | \
+           ((x(fd, 2) < 20) & (x(fk, 2) < 20) & (R > 50) & (M > S) & (x(M, 1) < x(S, 1)) & (fd < 80) & (fk < 80)) | \
+           ((x(fd, 3) < 20) & (x(fk, 3) < 20) & (R > 50) & (M > S) & (x(M, 2) < x(S, 2)) & (fd < 80) & (fk < 80))
+    bear = ((fd > 80) & (fk > 80) & (R < 50) & (M < S) & (x(M, 1) > x(S, 1))) | \
+           ((x(fd, 1) > 80) & (x(fk, 1) > 80) & (R < 50) & (M < S) & (x(M, 2) > x(S, 2)) & (fd > 20) & (fk > 20)) | \
+           ((x(fd, 2) > 80) & (x(fk, 2) > 80) & (R < 50) & (M < S) & (x(M, 1) > x(S, 1)) & (fd > 20) & (fk > 20)) | \
+           ((x(fd, 3) > 80) & (x(fk, 3) > 80) & (R < 50) & (M < S) & (x(M, 2) > x(S, 2)) & (fd > 20) & (fk > 20))
+    return _decide(bull, bear)
+
+def _v_tripleEMAStochasticRSIATR(c, v):
+    C, L, M, S, fd, fk = c['Close'], v('EMA_L'), v('EMA_M'), v('EMA_S'), v('fastd'), v('fastk')
+    long = (C > S) & (S > M) & (M > L) & (fk > fd) & (_sh(fk, 1) < _sh(fd, 1))
+    short = (C < S) & (S < M) & (M < L) & (fk < fd) & (_sh(fk, 1) > _sh(fd, 1))
+    return _decide(long, short)
+
+def _v_tripleEMA(c, v):
+    e3, e6, e9 = v('EMA_S'), v('EMA_M'), v('EMA_L')
+    above = lambda k: (_sh(e3, k) > _sh(e6, k)) & (_sh(e3, k) > _sh(e9, k))
+    below = lambda k: (_sh(e3, k) < _sh(e6, k)) & (_sh(e3, k) < _sh(e9, k))
+    short = (_sh(e6, 4) > 0) & above(4) & above(3) & above(2) & above(1) & (e3 < e6) & (e3 < e9)
+    long = below(4) & below(3) & below(2) & below(1) & (e3 > e6) & (e3 > e9)
+    return _decide(long, short, short_first=True)
+
+def _v_breakout(c, v):
+    C, V, mx, mn, mv = c['Close'], c['Volume'], v('max Close % change'), v('min Close % change'), v('max Volume')
+    return _decide((C >= mx) & (V >= mv), (C <= mn) & (V >= mv))
+
+def _v_stochBB(c, v):
+    fd, fk, b = v('fastd'), v('fastk'), v('percent_B')
+    long = (fk < .2) & (fd < .2) & (fk > fd) & (_sh(fk, 1) < _sh(fd, 1)) & ((b < 0) | (_sh(b, 1) < 0) | (_sh(b, 2) < 0))
+    short = (fk > .8) & (fd > .8) & (fk < fd) & (_sh(fk, 1) > _sh(fd, 1)) & ((b > 1) | (_sh(b, 1) > 1) | (_sh(b, 2) > 1))
+    return _decide(long, short)
+
+def _v_goldenCross(c, v):
+    C, L, M, S, R = c['Close'], v('EMA_L'), v('EMA_M'), v('EMA_S'), v('RSI')
+    up = np.zeros(len(C), dtype=bool); down = up.copy()
+    for k in (1, 2, 3):
+        up |= (_sh(S, k) < _sh(M, k)) & (_sh(M, k) <= S)
+        down |= (_sh(S, k) > _sh(M, k)) & (_sh(M, k) >= S)
+    return _decide((C > L) & (R > 50) & up, (C < L) & (R < 50) & down)
+
+def _v_candle_wick(c, v):
+    C, O, H, L = c['Close'], c['Open'], c['High'], c['Low']
+    s = lambda a, k: _sh(a, k)
+    short = (s(C, 4) < s(C, 3)) & (s(C, 3) < s(C, 2)) & (s(C, 1) < s(O, 1)) & \
+            ((s(H, 1) - s(O, 1) + s(C, 1) - s(L, 1)) > 10 * (s(O, 1) - s(C, 1))) & (C < s(C, 1))
+    long = (s(C, 4) > s(C, 3)) & (s(C, 3) > s(C, 2)) & (s(C, 1) > s(O, 1)) & \
+           ((s(H, 1) - s(C, 1) + s(O, 1) - s(L, 1)) > 10 * (s(C, 1) - s(O, 1))) & (C > s(C, 1))
+    return _decide(long, short, short_first=True)
+
+def _v_EMA_cross(c, v):
+    S, L = v('EMA_S'), v('EMA_L')
+    gt = lambda k: _sh(S, k) > _sh(L, k)
+    lt = lambda k: _sh(S, k) < _sh(L, k)
+    return _decide(lt(4) & lt(3) & lt(2) & lt(1) & (S > L), gt(4) & gt(3) & gt(2) & gt(1) & (S < L), short_first=True)
+
+def _v_ema_crossover(c, v):
+    S, L = v('ema_short'), v('ema_long')
+    return _decide((_sh(S, 1) < _sh(L, 1)) & (S > L), (_sh(S, 1) > _sh(L, 1)) & (S < L), short_first=True)
+
+VECTORISED_SIGNALS = {
+    'StochRSIMACD': _v_StochRSIMACD, 'tripleEMAStochasticRSIATR': _v_tripleEMAStochasticRSIATR, 'tripleEMA': _v_tripleEMA,
+    'breakout': _v_breakout, 'stochBB': _v_stochBB, 'goldenCross': _v_goldenCross, 'candle_wick': _v_candle_wick,
+    'EMA_cross': _v_EMA_cross, 'ema_crossover': _v_ema_crossover,
+}
+
+def per_bar_signals(bot, start):
+    """Fallback: call the live strategy code once per bar on views ending at that bar (current_index = -1)."""
+    cols, ind = {c: bot.candles[c] for c in BotClass.CANDLE_COLUMNS}, bot.indicators
+    d = np.full(len(bot.candles), -99)
+    for t in range(start, len(d)):
+        c = {k: a[:t + 1] for k, a in cols.items()}
+        v = {k: {"values": x["values"][:t + 1]} for k, x in ind.items()}
+        d[t] = BotClass.strategy_signal(bot.strategy, c, v, -1, bot.params)
+    return d
+
+def strategy_signals(bot, warmup=300, vectorised=True):
+    """Direction (1 long, 0 short, -99 none) for every bar of a backtesting Bot; bars before warmup are -99."""
+    fn = VECTORISED_SIGNALS.get(bot.strategy) if vectorised else None
+    if fn is None:
+        return per_bar_signals(bot, warmup)
+    ind = bot.indicators
+    with np.errstate(invalid='ignore'):
+        d = fn({c: bot.candles[c] for c in BotClass.CANDLE_COLUMNS}, lambda k: ind[k]["values"])
+    d[:warmup] = -99
+    return d
+
+def _first_hit(mask_fn, start, n):
+    """First bar index >= start where mask_fn(lo, hi) is true, searching in growing chunks; -1 if none."""
+    lo, step = start, 64
+    while lo < n:
+        hi = min(n, lo + step)
+        hit = np.flatnonzero(mask_fn(lo, hi))
+        if len(hit): return lo + int(hit[0])
+        lo, step = hi, step * 4
+    return -1
+
+def simulate_trades(bot, signals, fee=0.0):
+    """One position at a time: enter at the signal bar's close, exit on the first bar touching SL or TP (SL wins a tie)."""
+    C, H, L, D = bot.Close, bot.High, bot.Low, bot.Date
+    swing_high, swing_low = (bot.indicators[k]["values"] if k in bot.indicators else None for k in ("Swing High", "Swing Low"))
+    n, t, rows = len(C), 0, []
+    entries = np.flatnonzero(signals != -99)
+    k = 0
+    while k < len(entries):
+        t = entries[k]
+        d = int(signals[t])
+        sl, tp = TS.SetSLTP(bot.stop_loss_val, bot.take_profit_val, swing_high, swing_low, C, d,
+                            bot.SL_mult, bot.TP_mult, bot.TP_SL_choice, t)
+        entry = C[t]
+        sl_px, tp_px = (entry - sl, entry + tp) if d == 1 else (entry + sl, entry - tp)
+        if d == 1:
+            hit_fn = lambda lo, hi: (L[lo:hi] <= sl_px) | (H[lo:hi] >= tp_px)
+        else:
+            hit_fn = lambda lo, hi: (H[lo:hi] >= sl_px) | (L[lo:hi] <= tp_px)
+        x = _first_hit(hit_fn, t + 1, n)
+        if x == -1:
+            x, exit_px, reason = n - 1, C[-1], 'end'
+        elif (L[x] <= sl_px) if d == 1 else (H[x] >= sl_px):
+            exit_px, reason = sl_px, 'SL'
+        else:
+            exit_px, reason = tp_px, 'TP'
+        ret = (exit_px - entry) / entry * (1 if d == 1 else -1) - 2 * fee
+        rows.append((D[t], D[x], 'LONG' if d == 1 else 'SHORT', entry, exit_px, sl_px, tp_px, reason, ret * 100))
+        k = int(np.searchsorted(entries, x, side='right'))
+    return pd.DataFrame(rows, columns=['entry_time', 'exit_time', 'direction', 'entry', 'exit', 'SL', 'TP', 'reason', 'return_%'])
+
+def summarise(trades):
+    wins, losses = int((trades['return_%'] > 0).sum()), int((trades['return_%'] <= 0).sum())
+    return {'trades': len(trades), 'wins': wins, 'losses': losses,
+            'win_rate_%': round(100 * wins / len(trades), 2) if len(trades) else 0.0,
+            'total_return_%': round(float(trades['return_%'].sum()), 4),
+            'avg_return_%': round(float(trades['return_%'].mean()), 4) if len(trades) else 0.0}
+
+def run_backtest(klines, strategy=trading_strategy, TP_SL_choice=TP_SL_choice, SL_mult=SL_mult, TP_mult=TP_mult,
+                 warmup=300, fee=0.0, symbol='backtest', vectorised=True, params=None):
+    """Backtest one strategy over a {column: array} kline dict (see load_klines); returns (trades DataFrame, summary dict)."""
+    if TP_SL_choice in custom_tp_sl_functions:
+        raise ValueError(f'run_backtest() - TP_SL_choice {TP_SL_choice} needs a live position and cannot be backtested')
+    t0 = time.perf_counter()
+    bot = BotClass.Bot(symbol, klines['Open'], klines['Close'], klines['High'], klines['Low'], klines['Volume'], klines['Date'],
+                       0, 0, 1, 0, strategy, TP_SL_choice, SL_mult, TP_mult, backtesting=1, params=params)
+    signals = strategy_signals(bot, warmup, vectorised)
+    trades = simulate_trades(bot, signals, fee)
+    summary = summarise(trades)
+    summary['bars'], summary['seconds'] = len(bot.Close), round(time.perf_counter() - t0, 3)
+    return trades, summary
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Backtest a TradingStrats strategy over local Binance kline files.')
+    p.add_argument('path', help='kline CSV/Parquet file, directory or glob')
+    p.add_argument('--strategy', default=trading_strategy)
+    p.add_argument('--tp-sl', default=TP_SL_choice)
+    p.add_argument('--sl-mult', type=float, default=SL_mult)
+    p.add_argument('--tp-mult', type=float, default=TP_mult)
+    p.add_argument('--warmup', type=int, default=300)
+    p.add_argument('--fee', type=float, default=0.0, help='fee per side as a fraction, e.g. 0.0004')
+    a = p.parse_args()
+    trades, summary = run_backtest(load_klines(a.path), a.strategy, a.tp_sl, a.sl_mult, a.tp_mult, a.warmup, a.fee)
+    log.info(f'Backtest {a.strategy} | {a.tp_sl} SL {a.sl_mult}x TP {a.tp_mult}x | {summary}')
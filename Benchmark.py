@@ -0,0 +1,141 @@
+import sys, time, argparse, tracemalloc
+from Logger import *
+import numpy as np, pandas as pd
+import BotClass, SharedHelper, Backtester
+from LiveTradingConfig import trading_strategy, TP_SL_choice
+
+STRATEGIES = tuple(BotClass.STRATEGY_PARAMS)
+TP_SL_CHOICES = ('USDT', '%', 'x (ATR)', 'x (Swing High/Low) level 1', 'x (Swing High/Low) level 2', 'x (Swing High/Low) level 3',
+                 'x (Swing Close) level 1', 'x (Swing Close) level 2', 'x (Swing Close) level 3')
+STAGES = ('candle', 'update_indicators', 'make_decision')  # the per-candle work of Bot.handle_socket_message
+COMPARED = ('p50_us', 'p99_us')                            # what --baseline checks
+MIN_P99_SAMPLES = 1000  # timings per row (in both runs) before p99 is compared; below that it is a few outliers, so only p50 is
+
+def synthetic_klines(n, seed=123):
+    """SharedHelper.random_ohlcv candles with one-minute close times."""
+    k = SharedHelper.random_ohlcv(n, seed)
+    return {'Date': np.arange(1, n + 1) * 60_000.0 - 1, **k}
+
+def _kline_msg(k, i):
+    """Closed-candle kline payload for row i, as consume_new_candle() reads it."""
+    return {'T': int(k['Date'][i]), 'o': k['Open'][i], 'h': k['High'][i], 'l': k['Low'][i], 'c': k['Close'][i], 'q': k['Volume'][i], 'x': True}
+
+def live_bot(klines, size, strategy, tp_sl, symbol='BENCH'):
+    """A live-mode Bot holding the first `size` candles, as after combine_data()."""
+    b = BotClass.Bot(symbol, [], [], [], [], [], [], 3, 2, 0, 0.01, strategy, tp_sl, 1, 1)
+    b.add_hist(*(klines[c][:size] for c in ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')))
+    return b
+
+def step(b, msg, timings=None):
+    """One candle close through the same calls, in the same order, as Bot.handle_socket_message."""
+    t0 = time.perf_counter()
+    b.consume_new_candle(msg)
+    b.generate_new_heikin_ashi()
+    t1 = time.perf_counter()
+    b.update_indicators()
+    t2 = time.perf_counter()
+    b.make_decision()
+    t3 = time.perf_counter()
+    b.remove_first_candle()
+    if timings is not None:
+        for stage, dt in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2)): timings[stage].append(dt)
+
+def bench_config(klines, strategy, tp_sl, size, steps):
+    """Per-call latency of each stage over `steps` candle closes, then a tracemalloc pass for allocations and memory."""
+    t = time.perf_counter()
+    b = live_bot(klines, size, strategy, tp_sl)
+    seed_ms = (time.perf_counter() - t) * 1000
+    timings = {s: [] for s in STAGES}
+    for i in range(size, size + steps): step(b, _kline_msg(klines, i), timings)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    b = live_bot(klines, size, strategy, tp_sl)
+    bot_kb = (tracemalloc.get_traced_memory()[0] - before) / 1024
+    peaks, start = [], tracemalloc.get_traced_memory()[0]
+    for i in range(size, size + min(steps, 50)):
+        tracemalloc.reset_peak()
+        cur = tracemalloc.get_traced_memory()[0]
+        step(b, _kline_msg(klines, i))
+        peaks.append(tracemalloc.get_traced_memory()[1] - cur)
+    retained_kb = (tracemalloc.get_traced_memory()[0] - start) / 1024
+    tracemalloc.stop()
+
+    timings['candle_close'] = np.sum([timings[s] for s in STAGES], axis=0)
+    rows = []
+    for stage, dts in timings.items():
+        us = np.array(dts) * 1e6
+        rows.append({'strategy': strategy, 'TP_SL_choice': tp_sl, 'size': size, 'symbols': 1, 'stage': stage, 'n': len(us),
+                     'p50_us': np.percentile(us, 50), 'p90_us': np.percentile(us, 90), 'p99_us': np.percentile(us, 99),
+                     'max_us': us.max()})
+    rows[-1].update(seed_ms=seed_ms, bot_kb=bot_kb, alloc_peak_kb_per_call=max(peaks) / 1024, retained_kb=retained_kb)
+    return rows
+
+def bench_symbols(klines, strategy, tp_sl, size, n_symbols, bursts):
+    """Candle-close bursts over n_symbols bots: wall time per burst (what the last symbol waits) and bot memory."""
+    tracemalloc.start()
+    bots = [live_bot(klines, size, strategy, tp_sl, f'S{j}') for j in range(n_symbols)]
+    mem_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    ms = []
+    for i in range(size, size + bursts):
+        msg = _kline_msg(klines, i)
+        t = time.perf_counter()
+        for b in bots: step(b, msg)
+        ms.append((time.perf_counter() - t) * 1000)
+    return {'strategy': strategy, 'TP_SL_choice': tp_sl, 'size': size, 'symbols': n_symbols, 'stage': 'burst', 'n': len(ms),
+            'p50_us': np.percentile(ms, 50) * 1000, 'p90_us': np.percentile(ms, 90) * 1000, 'p99_us': np.percentile(ms, 99) * 1000,
+            'max_us': max(ms) * 1000, 'bots_mb': mem_mb}
+
+def run(strategies=STRATEGIES, tp_sl_choices=TP_SL_CHOICES, sizes=(500, 2000, 20000), symbol_counts=(1, 10, 100),
+        steps=200, bursts=5, klines=None):
+    """Every strategy x TP/SL choice x buffer size, plus candle-close bursts over symbol_counts bots for the
+    configured strategy/TP_SL_choice; klines: recorded candles (see Backtester.load_klines), default synthetic."""
+    need = max(sizes) + max(steps, bursts)
+    klines = klines or synthetic_klines(need)
+    if len(klines['Close']) < need: raise ValueError(f'Benchmark - {need} candles needed, {len(klines["Close"])} given')
+    rows = []
+    for size in sizes:
+        for strategy in strategies:
+            for tp_sl in tp_sl_choices:
+                rows += bench_config(klines, strategy, tp_sl, size, steps)
+            log.info(f'Benchmark - {size} candles, {strategy} done')
+        for n in symbol_counts:
+            rows.append(bench_symbols(klines, trading_strategy, TP_SL_choice, size, n, bursts))
+    return pd.DataFrame(rows)
+
+def compare(results, baseline, max_slowdown):
+    """Rows slower than the baseline by more than max_slowdown (a fraction) in p50, or in p99 where both runs timed
+    at least MIN_P99_SAMPLES calls (baselines written without the 'n' column only get p50 checked)."""
+    key = ['strategy', 'TP_SL_choice', 'size', 'symbols', 'stage']
+    m = results.merge(baseline, on=key, suffixes=('', '_baseline'))
+    n = np.minimum(m['n'], m['n_baseline']) if 'n_baseline' in m else pd.Series(0, index=m.index)
+    slow = np.zeros(len(m), dtype=bool)
+    for c in COMPARED:
+        m[f'{c}_ratio'] = m[c] / m[f'{c}_baseline']
+        gated = (n >= MIN_P99_SAMPLES) if c == 'p99_us' else True
+        slow |= ((m[f'{c}_ratio'] > 1 + max_slowdown) & gated).to_numpy()
+    return m[slow][key + [x for c in COMPARED for x in (f'{c}_baseline', c, f'{c}_ratio')]]
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Per-candle cost of Bot.update_indicators(), make_decision() and the strategies.')
+    p.add_argument('--strategies', nargs='+', default=STRATEGIES)
+    p.add_argument('--tp-sl', nargs='+', default=TP_SL_CHOICES)
+    p.add_argument('--sizes', nargs='+', type=int, default=[500, 2000, 20000], help='candles held by each bot')
+    p.add_argument('--symbols', nargs='+', type=int, default=[1, 10, 100], help='bots per candle-close burst')
+    p.add_argument('--steps', type=int, default=200, help='candle closes timed per configuration')
+    p.add_argument('--klines', help='recorded candles instead of synthetic ones (kline file, directory, glob or kline store directory)')
+    p.add_argument('--out', default='benchmark_results.json')
+    p.add_argument('--baseline', help='earlier --out file to compare against')
+    p.add_argument('--max-slowdown', type=float, default=0.25, help=f'fail if p50 (p99 from {MIN_P99_SAMPLES} steps) is this fraction slower than the baseline')
+    a = p.parse_args()
+    results = run(a.strategies, a.tp_sl, a.sizes, a.symbols, a.steps, klines=Backtester.load_klines(a.klines) if a.klines else None)
+    results.to_json(a.out, orient='records', indent=1)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        log.info(f'Benchmark - results written to {a.out}\n{results[results["stage"].isin(["candle_close", "burst"])].round(1).to_string()}')
+    if a.baseline:
+        slow = compare(results, pd.read_json(a.baseline), a.max_slowdown)
+        if not slow.empty:
+            log.error(f'Benchmark - {len(slow)} slower than {a.baseline} by more than {a.max_slowdown:.0%}\n{slow.round(2).to_string()}')
+            sys.exit(1)
+        log.info(f'Benchmark - within {a.max_slowdown:.0%} of {a.baseline}')
@@ -1,144 +1,177 @@
 from Logger import *
-from ta.momentum import stochrsi_d, stochrsi_k, stoch, stoch_signal, rsi
-from ta.trend import ema_indicator, macd_signal, macd, sma_indicator
-from ta.volatility import average_true_range, bollinger_pband 
-import pandas as pd, sys, os
+import sys, os, time
+import numpy as np
 import TradingStrats as TS
+import Indicators, Swings, Latency
+from HeikinAshi import heikin_ashi, heikin_ashi_step
+from CandleBuffer import CandleBuffer
 from LiveTradingConfig import custom_tp_sl_functions, wait_for_candle_close
 
+OHLCV_COLUMNS = ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')
+CANDLE_COLUMNS = OHLCV_COLUMNS + ('Open_H', 'High_H', 'Low_H', 'Close_H')
+
+def _column(name):
+    return property(lambda self: self.candles[name], doc=f'View of the {name} column of self.candles.')
+
+# Tunable knobs per strategy (indicator windows, signal thresholds), as declared in TradingStrats; Bot(params=...) and
+# LiveTradingConfig.strategy_params override them.
+STRATEGY_PARAMS = {name: st.params for name, st in TS.STRATEGIES.items()}
+
+def params_for(s, params=None):
+    """STRATEGY_PARAMS[s] with the overrides in params applied."""
+    return {**STRATEGY_PARAMS.get(s, {}), **(params or {})}
+
+def strategy_signal(s, c, ind, i=-1, params=None):
+    """Run strategy s at candle i: c maps candle columns (Open ... Close_H), ind is a Bot.indicators-style dict. Returns 1, 0 or -99."""
+    st = TS.STRATEGIES.get(s)
+    return st.signal(c, ind, i, params_for(s, params)) if st is not None else -99
+
+def required_buffer(s, params=None):
+    """Candles of history strategy s needs: the warm-up of its declared indicators plus the candles it reads back."""
+    st = TS.STRATEGIES.get(s)
+    if st is None: return 0
+    graph = Indicators.IndicatorGraph()
+    graph.add(st.indicators, params_for(s, params))
+    return graph.lookback() + st.lookback
+
+class StrategySlot:
+    """A further strategy run by a Bot over its candles and indicator graph, with its own TP/SL settings.
+
+    Built from a LiveTradingConfig.extra_strategies entry; name tags its signals (default: the strategy).
+    """
+    def __init__(self, strategy, TP_SL_choice, SL_mult, TP_mult, params=None, name=None):
+        self.strategy, self.name = strategy, name or strategy
+        self.params = params_for(strategy, params)
+        self.TP_SL_choice, self.SL_mult, self.TP_mult = TP_SL_choice, SL_mult, TP_mult
+        self.aliases = {}
+
 class Bot:
+    Date, Open, High, Low, Close, Volume = map(_column, OHLCV_COLUMNS)
+    Open_H, High_H, Low_H, Close_H = map(_column, CANDLE_COLUMNS[6:])
+
     def __init__(self, symbol, Open, Close, High, Low, Volume, Date, OP, CP, index, tick,
-                 strategy, TP_SL_choice, SL_mult, TP_mult, backtesting=0, signal_queue=None, print_trades_q=None):
-        self.symbol, self.Date = symbol, Date
+                 strategy, TP_SL_choice, SL_mult, TP_mult, backtesting=0, signal_queue=None, print_trades_q=None, params=None, kline_store=None,
+                 strategies=None):
+        self.symbol = symbol
         n = min(len(Open), len(Close), len(High), len(Low), len(Volume))
-        self.Open, self.Close, self.High, self.Low, self.Volume = Open[-n:], Close[-n:], High[-n:], Low[-n:], Volume[-n:]
+        self.candles = CandleBuffer(CANDLE_COLUMNS, n)
+        if n:
+            cols = {"Open": Open[-n:], "Close": Close[-n:], "High": High[-n:], "Low": Low[-n:], "Volume": Volume[-n:]}
+            if len(Date) >= n: cols["Date"] = Date[-n:]
+            self.candles.extend(cols)
         self.OP, self.CP, self.index, self.tick_size = OP, CP, index, tick
         self.add_hist_complete = 0
-        self.Open_H, self.Close_H, self.High_H, self.Low_H = [], [], [], []
         self.socket_failed = False
         self.backtesting = backtesting
-        self.use_close_pos = False
-        self.strategy = strategy
+        self.strategy = self.name = strategy
+        self.params = params_for(strategy, params)
         self.TP_SL_choice, self.SL_mult, self.TP_mult = TP_SL_choice, SL_mult, TP_mult
-        self.indicators, self.current_index = {}, -1
+        self.engine, self.current_index = None, -1
+        self.aliases = {}  # declared indicator name -> node of the engine's indicator graph
+        # The Bot is its own first slot; strategies: extra_strategies-style dicts, TP/SL settings defaulting to the Bot's
+        self.slots = [self] + [StrategySlot(**{'TP_SL_choice': TP_SL_choice, 'SL_mult': SL_mult, 'TP_mult': TP_mult, **x}) for x in strategies or []]
+        self.use_close_pos = getattr(TS.STRATEGIES.get(strategy), 'exit', None) is not None
         self.take_profit_val, self.stop_loss_val = [], []
         self.peaks, self.troughs = [], []
         self.signal_queue = signal_queue
+        self.kline_store = kline_store
+        self.saved_until = None  # close time of the last candle handed to the kline store
+        self.decision_seconds, self.decision_latency_ms = 0.0, 0.0  # last candle: time spent deciding, candle close -> decision
         if self.index == 0: self.print_trades_q = print_trades_q
+        self.first_interval = False
+        self.pop_previous_value = False
         if backtesting:
             self.add_hist([], [], [], [], [], [])
             self.update_indicators()
             self.update_TP_SL()
-        self.first_interval = False
-        self.pop_previous_value = False
 
-    def _series(self):
-        C = pd.Series(self.Close)
-        H = pd.Series(self.High)
-        L = pd.Series(self.Low)
-        V = pd.Series(self.Volume)
-        return C, H, L, V
+    @property
+    def indicators(self):
+        """{declared name: {"values", "plotting_axis"}} of the strategy and TP/SL indicators."""
+        return self.indicators_for(self)
+
+    def indicators_for(self, slot):
+        """Bot.indicators as seen by one of self.slots."""
+        if self.engine is None: return {}
+        ind = self.engine.indicators
+        return {name: ind[node] for name, node in slot.aliases.items()}
+
+    def _candles(self):
+        return {"Open": self.Open, "High": self.High, "Low": self.Low, "Close": self.Close, "Volume": self.Volume}
+
+    def _candle(self, i):
+        return {"Open": self.Open[i], "High": self.High[i], "Low": self.Low[i], "Close": self.Close[i], "Volume": self.Volume[i]}
+
+    def _indicator_graph(self):
+        """Every slot's declared indicators and TP/SL streams in one deduplicated graph; sets each slot's aliases."""
+        graph = Indicators.IndicatorGraph()
+        for slot in self.slots:
+            st = TS.STRATEGIES.get(slot.strategy)
+            slot.aliases = graph.add(st.indicators, slot.params) if st is not None else {}
+            slot.aliases.update(graph.add(self._tp_sl_specs(slot.TP_SL_choice)))
+        return graph
+
+    def _tp_sl_specs(self, c=None):
+        """Streams backing TP_SL_choice c (default the Bot's), declared like strategy indicators (TradingStrats.indicator)."""
+        c = c or self.TP_SL_choice
+        if c == 'x (ATR)':
+            return {"ATR": TS.indicator(Indicators.ATR, inputs=('High', 'Low', 'Close'), axis=4)}
+        elif c.startswith('x (Swing High/Low) level'):
+            lvl = int(c[-1])
+            return {"Swing High": TS.indicator(Swings.SwingHigh, lvl, inputs=('High',)), "Swing Low": TS.indicator(Swings.SwingLow, lvl, inputs=('Low',))}
+        elif c.startswith('x (Swing Close) level'):
+            lvl = int(c[-1])
+            return {"Swing High": TS.indicator(Swings.SwingHigh, lvl), "Swing Low": TS.indicator(Swings.SwingLow, lvl)}
+        return {}
 
     def update_indicators(self):
+        """Bring self.indicators up to the last candle: one O(1) streaming step, or a full vectorised seed when out of sync."""
         try:
-            C, H, L, V = self._series()
-            s = self.strategy
-            if s == 'StochRSIMACD':
-                self.indicators = {
-                    "fastd": {"values": list(stoch(close=C, high=H, low=L)), "plotting_axis": 3},
-                    "fastk": {"values": list(stoch_signal(close=C, high=H, low=L)), "plotting_axis": 3},
-                    "RSI": {"values": list(rsi(C)), "plotting_axis": 4},
-                    "MACD": {"values": list(macd(C)), "plotting_axis": 5},
-                    "macdsignal": {"values": list(macd_signal(C)), "plotting_axis": 5},
-                }
-            elif s == 'tripleEMAStochasticRSIATR':
-                self.indicators = {
-                    "EMA_L": {"values": list(ema_indicator(C, window=100)), "plotting_axis": 1},
-                    "EMA_M": {"values": list(ema_indicator(C, window=50)), "plotting_axis": 1},
-                    "EMA_S": {"values": list(ema_indicator(C, window=20)), "plotting_axis": 1},
-                    "fastd": {"values": list(stochrsi_d(C)), "plotting_axis": 3},
-                    "fastk": {"values": list(stochrsi_k(C)), "plotting_axis": 3},
-                }
-            elif s == 'tripleEMA':
-                self.indicators = {
-                    "EMA_L": {"values": list(ema_indicator(C, window=50)), "plotting_axis": 1},
-                    "EMA_M": {"values": list(ema_indicator(C, window=20)), "plotting_axis": 1},
-                    "EMA_S": {"values": list(ema_indicator(C, window=5)), "plotting_axis": 1},
-                }
-            elif s == 'breakout':
-                self.indicators = {
-                    "max Close % change": {"values": list(C.rolling(10).max()), "plotting_axis": 3},
-                    "min Close % change": {"values": list(C.rolling(10).min()), "plotting_axis": 3},
-                    "max Volume": {"values": list(V.rolling(10).max()), "plotting_axis": 2},
-                }
-            elif s == 'stochBB':
-                self.indicators = {
-                    "fastd": {"values": list(stochrsi_d(C)), "plotting_axis": 3},
-                    "fastk": {"values": list(stochrsi_k(C)), "plotting_axis": 3},
-                    "percent_B": {"values": list(bollinger_pband(C)), "plotting_axis": 4},
-                }
-            elif s == 'goldenCross':
-                self.indicators = {
-                    "EMA_L": {"values": list(ema_indicator(C, window=100)), "plotting_axis": 1},
-                    "EMA_M": {"values": list(ema_indicator(C, window=50)), "plotting_axis": 1},
-                    "EMA_S": {"values": list(ema_indicator(C, window=20)), "plotting_axis": 1},
-                    "RSI": {"values": list(rsi(C)), "plotting_axis": 3},
-                }
-            elif s == 'fibMACD':
-                self.indicators = {
-                    "MACD_signal": {"values": list(macd_signal(C)), "plotting_axis": 3},
-                    "MACD": {"values": list(macd(C)), "plotting_axis": 3},
-                    "EMA": {"values": list(sma_indicator(C, window=200)), "plotting_axis": 1},
-                }
-            elif s == 'EMA_cross':
-                self.indicators = {
-                    "EMA_S": {"values": list(ema_indicator(C, window=5)), "plotting_axis": 1},
-                    "EMA_L": {"values": list(ema_indicator(C, window=20)), "plotting_axis": 1},
-                }
-            elif s in ('heikin_ashi_ema2', 'heikin_ashi_ema'):
-                self.use_close_pos = True
-                self.indicators = {
-                    "fastd": {"values": list(stochrsi_d(C)), "plotting_axis": 3},
-                    "fastk": {"values": list(stochrsi_k(C)), "plotting_axis": 3},
-                    "EMA": {"values": list(ema_indicator(C, window=200)), "plotting_axis": 1},
-                }
-            elif s == 'ema_crossover':
-                self.indicators = {
-                    "ema_short": {"values": list(ema_indicator(C, window=20)), "plotting_axis": 1},
-                    "ema_long": {"values": list(ema_indicator(C, window=50)), "plotting_axis": 1},
-                }
+            n = len(self.Close)
+            if self.engine is not None and self.engine.length == n - 1:
+                self.engine.update(self._candle(-1), checkpoint=self.pop_previous_value)
+            elif self.engine is None or self.engine.length != n:
+                self.engine = Indicators.IndicatorEngine(self._indicator_graph().specs())
+                self.engine.seed(self._candles())
         except Exception as e:
+            self.engine = None
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.error(f'update_indicators() - strategy: {self.strategy}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
 
-    def _extrema(self, arr, level, peak=True):
-        n = len(arr)
-        out = [0]*n
-        for i in range(n):
-            if i < level or i > n - level - 1: continue
-            ok = all((arr[i] > arr[i-k] and arr[i] > arr[i+k]) if peak else (arr[i] < arr[i-k] and arr[i] < arr[i+k]) for k in range(1, level+1))
-            out[i] = arr[i] if ok else 0
-        return out
+    def TP_SL_at(self, trade_direction, i=-1, slot=None):
+        """SL/TP distances for a signal at candle i only; ATR and swing modes read their running streams."""
+        slot = slot or self
+        c = slot.TP_SL_choice
+        if c == '%':
+            return (slot.SL_mult/100) * self.Close[i], (slot.TP_mult/100) * self.Close[i]
+        ind = self.indicators_for(slot)
+        if c == 'x (ATR)':
+            atr = abs(ind["ATR"]["values"][i])
+            return slot.SL_mult * atr, slot.TP_mult * atr
+        swing_high, swing_low = (ind[k]["values"] if k in ind else None for k in ("Swing High", "Swing Low"))
+        return TS.SetSLTP(None, None, swing_high, swing_low, self.Close, trade_direction,
+                          slot.SL_mult, slot.TP_mult, c, i)
 
     def update_TP_SL(self):
+        """Whole-buffer TP/SL arrays (take_profit_val/stop_loss_val, peaks/troughs) for backtests and plotting; live signals use TP_SL_at()."""
         try:
             c = self.TP_SL_choice
             if c == '%':
-                self.take_profit_val = [(self.TP_mult/100)*p for p in self.Close]
-                self.stop_loss_val = [(self.SL_mult/100)*p for p in self.Close]
+                self.take_profit_val = (self.TP_mult/100) * self.Close
+                self.stop_loss_val = (self.SL_mult/100) * self.Close
             elif c == 'x (ATR)':
-                atr = average_true_range(self.High, self.Low, self.Close)
-                self.take_profit_val = [self.TP_mult*abs(a) for a in atr]
-                self.stop_loss_val = [self.SL_mult*abs(a) for a in atr]
+                atr = np.abs(Indicators.ATR().seed(self.High, self.Low, self.Close))
+                self.take_profit_val = self.TP_mult * atr
+                self.stop_loss_val = self.SL_mult * atr
             elif c in ('x (Swing High/Low) level 1','x (Swing High/Low) level 2','x (Swing High/Low) level 3'):
                 lvl = int(c[-1])
-                self.peaks = self._extrema(self.High, lvl, True)
-                self.troughs = self._extrema(self.Low,  lvl, False)
+                self.peaks = Swings.swing_points(self.High, lvl, True)
+                self.troughs = Swings.swing_points(self.Low, lvl, False)
             elif c in ('x (Swing Close) level 1','x (Swing Close) level 2','x (Swing Close) level 3'):
                 lvl = int(c[-1])
-                self.peaks = self._extrema(self.Close, lvl, True)
-                self.troughs = self._extrema(self.Close, lvl, False)
+                self.peaks = Swings.swing_points(self.Close, lvl, True)
+                self.troughs = Swings.swing_points(self.Close, lvl, False)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
@@ -147,36 +180,29 @@ class Bot:
     def add_hist(self, Date_temp, Open_temp, Close_temp, High_temp, Low_temp, Volume_temp):
         if not self.backtesting:
             try:
-                while self.Date:
-                    if self.Date[0] > Date_temp[-1]:
-                        Date_temp.append(self.Date.pop(0)); Open_temp.append(self.Open.pop(0))
-                        Close_temp.append(self.Close.pop(0)); High_temp.append(self.High.pop(0))
-                        Low_temp.append(self.Low.pop(0)); Volume_temp.append(self.Volume.pop(0))
-                    else:
-                        self.Date.pop(0); self.Open.pop(0); self.Close.pop(0); self.High.pop(0); self.Low.pop(0); self.Volume.pop(0)
-                self.Date, self.Open, self.Close, self.High, self.Low, self.Volume = Date_temp, Open_temp, Close_temp, High_temp, Low_temp, Volume_temp
+                live = self.candles
+                keep = int(np.searchsorted(live['Date'], Date_temp[-1], side='right'))
+                merged = CandleBuffer(CANDLE_COLUMNS, len(Date_temp) + len(live) - keep)
+                merged.extend({"Date": Date_temp, "Open": Open_temp, "Close": Close_temp, "High": High_temp, "Low": Low_temp, "Volume": Volume_temp})
+                merged.extend({c: live[c][keep:] for c in OHLCV_COLUMNS})
+                self.candles = merged
             except Exception as e:
                 exc_type, exc_obj, exc_tb = sys.exc_info()
                 fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 log.error(f'add_hist() - merge error, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
         try:
-            self.Close_H.append((self.Open[0] + self.Close[0] + self.Low[0] + self.High[0]) / 4)
-            self.Open_H.append((self.Close[0] + self.Open[0]) / 2)
-            self.High_H.append(self.High[0]); self.Low_H.append(self.Low[0])
-            for i in range(1, len(self.Close)):
-                self.Open_H.append((self.Open_H[i-1] + self.Close_H[i-1]) / 2)
-                self.Close_H.append((self.Open[i] + self.Close[i] + self.Low[i] + self.High[i]) / 4)
-                self.High_H.append(max(self.High[i], self.Open_H[i], self.Close_H[i]))
-                self.Low_H.append(min(self.Low[i], self.Open_H[i], self.Close_H[i]))
+            self.Open_H[:], self.High_H[:], self.Low_H[:], self.Close_H[:] = heikin_ashi(self.Open, self.High, self.Low, self.Close)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.error(f'add_hist() - heikin ashi error, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
+        self.update_indicators()
         self.add_hist_complete = 1
 
     def handle_socket_message(self, msg):
         try:
             if msg:
+                received = time.time() * 1000
                 k = msg['k']
                 closed = k['x']
                 if closed or (not wait_for_candle_close and self.first_interval and self.add_hist_complete):
@@ -184,11 +210,24 @@ class Bot:
                     self.pop_previous_value = not closed
                     self.consume_new_candle(k)
                     if self.add_hist_complete:
+                        t0 = time.perf_counter()
+                        if closed:
+                            Latency.record('close_to_receipt', received - int(k['T']), self.symbol, self.strategy)
+                            Latency.record('event_to_receipt', received - int(msg['E']), self.symbol, self.strategy)
                         self.generate_new_heikin_ashi()
-                        d, sl, tp = self.make_decision()
-                        if d != -99:
-                            self.signal_queue.put([self.symbol, self.OP, self.CP, self.tick_size, d, self.index, sl, tp])
-                        if closed: self.remove_first_candle()
+                        for slot in self.slots:  # in configured order; the first to fire trades the symbol
+                            d, sl, tp = self.make_decision(slot)
+                            if d != -99:
+                                t1 = time.perf_counter()
+                                self.signal_queue.put([self.symbol, self.OP, self.CP, self.tick_size, d, self.index, sl, tp, time.time(), slot.name])
+                                Latency.record('signal_put', (time.perf_counter() - t1) * 1000, self.symbol, slot.name)
+                                break
+                        self.decision_seconds = time.perf_counter() - t0
+                        Latency.record('receipt_to_decision', self.decision_seconds * 1000, self.symbol, self.strategy)
+                        self.decision_latency_ms = time.time() * 1000 - int(k['T'])
+                        if closed:
+                            self.remove_first_candle()
+                            if self.kline_store is not None: self.save_closed_candles()
                     if self.index == 0: self.print_trades_q.put(True)
                     self.first_interval = True
         except Exception as e:
@@ -197,100 +236,69 @@ class Bot:
             log.warning(f"handle_socket_message() - {self.symbol} failed, msg: {msg}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
             self.socket_failed = True
 
-    def make_decision(self):
-        self.update_indicators()
+    def make_decision(self, slot=None):
+        """(direction, sl, tp) of one of self.slots (default the Bot's own strategy) at the last candle."""
+        slot = slot or self
+        t0 = time.perf_counter()
+        self.update_indicators()  # a no-op for the slots after the first: the shared graph is already up to date
+        t1 = time.perf_counter()
         d, sl, tp = -99, -99, -99
         try:
-            s = self.strategy
-            if s == 'StochRSIMACD':
-                d = TS.StochRSIMACD(d, self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                                    self.indicators["RSI"]["values"], self.indicators["MACD"]["values"],
-                                    self.indicators["macdsignal"]["values"], self.current_index)
-            elif s == 'tripleEMAStochasticRSIATR':
-                d = TS.tripleEMAStochasticRSIATR(self.Close, d, self.indicators["EMA_L"]["values"],
-                                                 self.indicators["EMA_M"]["values"], self.indicators["EMA_S"]["values"],
-                                                 self.indicators["fastd"]["values"], self.indicators["fastk"]["values"], self.current_index)
-            elif s == 'tripleEMA':
-                d = TS.tripleEMA(d, self.indicators["EMA_S"]["values"], self.indicators["EMA_M"]["values"],
-                                 self.indicators["EMA_L"]["values"], self.current_index)
-            elif s == 'breakout':
-                d = TS.breakout(d, self.Close, self.Volume,
-                                self.indicators["max Close % change"]["values"],
-                                self.indicators["min Close % change"]["values"],
-                                self.indicators["max Volume"]["values"], self.current_index)
-            elif s == 'stochBB':
-                d = TS.stochBB(d, self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                               self.indicators["percent_B"]["values"], self.current_index)
-            elif s == 'goldenCross':
-                d = TS.goldenCross(d, self.Close, self.indicators["EMA_L"]["values"], self.indicators["EMA_M"]["values"],
-                                   self.indicators["EMA_S"]["values"], self.indicators["RSI"]["values"], self.current_index)
-            elif s == 'candle_wick':
-                d = TS.candle_wick(d, self.Close, self.Open, self.High, self.Low, self.current_index)
-            elif s == 'fibMACD':
-                d = TS.fibMACD(d, self.Close, self.Open, self.High, self.Low,
-                               self.indicators["MACD_signal"]["values"], self.indicators["MACD"]["values"],
-                               self.indicators["EMA"]["values"], self.current_index)
-            elif s == 'EMA_cross':
-                d = TS.EMA_cross(d, self.indicators["EMA_S"]["values"], self.indicators["EMA_L"]["values"], self.current_index)
-            elif s == 'heikin_ashi_ema2':
-                d, _ = TS.heikin_ashi_ema2(self.Open_H, self.High_H, self.Low_H, self.Close_H, d, -99, 0,
-                                           self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                                           self.indicators["EMA"]["values"], self.current_index)
-            elif s == 'heikin_ashi_ema':
-                d, _ = TS.heikin_ashi_ema(self.Open_H, self.Close_H, d, -99, 0,
-                                          self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                                          self.indicators["EMA"]["values"], self.current_index)
-            elif s == "ema_crossover":
-                d = TS.ema_crossover(d, self.current_index, self.indicators["ema_short"]["values"], self.indicators["ema_long"]["values"])
+            d = strategy_signal(slot.strategy, self.candles, self.indicators_for(slot), self.current_index, slot.params)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.error(f"make_decision() - strategy: {self.strategy}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            log.error(f"make_decision() - strategy: {slot.name}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
         try:
-            if d != -99 and self.TP_SL_choice not in custom_tp_sl_functions:
-                self.update_TP_SL()
-                sl, tp = TS.SetSLTP(self.stop_loss_val, self.take_profit_val, self.peaks, self.troughs, self.Close,
-                                    self.High, self.Low, d, self.SL_mult, self.TP_mult, self.TP_SL_choice, self.current_index)
+            if d != -99 and slot.TP_SL_choice not in custom_tp_sl_functions:
+                sl, tp = self.TP_SL_at(d, self.current_index, slot)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.error(f"make_decision() - SetSLTP choice: {self.TP_SL_choice}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            log.error(f"make_decision() - SetSLTP choice: {slot.TP_SL_choice}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+        if not self.backtesting:
+            Latency.record('indicators', (t1 - t0) * 1000, self.symbol, slot.name)
+            Latency.record('strategy', (time.perf_counter() - t1) * 1000, self.symbol, slot.name)
         return d, sl, tp
 
-    def check_close_pos(self, trade_direction):
+    def check_close_pos(self, trade_direction, slot=None):
+        slot = slot or self
         close_pos = 0
         try:
-            if self.strategy == 'heikin_ashi_ema2':
-                _, close_pos = TS.heikin_ashi_ema2(self.Open_H, self.High_H, self.Low_H, self.Close_H, -99, trade_direction, 0,
-                                                   self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                                                   self.indicators["EMA"]["values"], self.current_index)
-            elif self.strategy == 'heikin_ashi_ema':
-                _, close_pos = TS.heikin_ashi_ema(self.Open_H, self.Close_H, -99, trade_direction, 0,
-                                                  self.indicators["fastd"]["values"], self.indicators["fastk"]["values"],
-                                                  self.indicators["EMA"]["values"], self.current_index)
+            st = TS.STRATEGIES.get(slot.strategy)
+            if st is not None:
+                close_pos = st.close_position(self.candles, self.indicators_for(slot), self.current_index, slot.params, trade_direction)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.error(f"check_close_pos() - strategy: {self.strategy}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            log.error(f"check_close_pos() - strategy: {slot.name}, Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
         return close_pos
 
-    def _pop_all(self, idx):
-        for a in ("Date","Close","Volume","High","Low","Open","Open_H","Close_H","High_H","Low_H"):
-            getattr(self, a).pop(idx)
+    def _engine_has_last_candle(self):
+        return self.engine is not None and self.engine.length == len(self.Close)
+
+    def remove_last_candle(self):
+        if self._engine_has_last_candle() and not self.engine.rollback(): self.engine = None
+        self.candles.drop_last()
+
+    def remove_first_candle(self):
+        if self._engine_has_last_candle(): self.engine.drop_first()
+        self.candles.drop_first()
 
-    def remove_last_candle(self):  self._pop_all(-1)
-    def remove_first_candle(self): self._pop_all(0)
+    def save_closed_candles(self):
+        """Append the closed candles since the last save to the kline store (it skips the ones it has and refuses gaps)."""
+        n = len(self.Close) - bool(self.pop_previous_value)
+        if not n: return
+        if self.saved_until is None: self.saved_until = self.kline_store.last_date(self.symbol) or -1.0
+        k = int(np.searchsorted(self.Date[:n], self.saved_until, side='right'))
+        if k == n: return
+        self.kline_store.append(self.symbol, {c: self.candles[c][k:n] for c in OHLCV_COLUMNS})
+        self.saved_until = float(self.Date[n - 1])  # refused rows (a gap) are re-downloaded on the next start
 
     def consume_new_candle(self, k):
-        self.Date.append(int(k['T']))
-        self.Close.append(float(k['c']))
-        self.Volume.append(float(k['q']))
-        self.High.append(float(k['h']))
-        self.Low.append(float(k['l']))
-        self.Open.append(float(k['o']))
+        self.candles.append({"Date": int(k['T']), "Open": float(k['o']), "High": float(k['h']),
+                             "Low": float(k['l']), "Close": float(k['c']), "Volume": float(k['q'])})
 
     def generate_new_heikin_ashi(self):
-        self.Open_H.append((self.Open_H[-1] + self.Close_H[-1]) / 2)
-        self.Close_H.append((self.Open[-1] + self.Close[-1] + self.Low[-1] + self.High[-1]) / 4)
-        self.High_H.append(max(self.High[-1], self.Open_H[-1], self.Close_H[-1]))
-        self.Low_H.append(min(self.Low[-1], self.Open_H[-1], self.Close_H[-1]))
+        self.Open_H[-1], self.High_H[-1], self.Low_H[-1], self.Close_H[-1] = heikin_ashi_step(
+            self.Open_H[-2], self.Close_H[-2], self.Open[-1], self.High[-1], self.Low[-1], self.Close[-1])
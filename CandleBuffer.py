@@ -0,0 +1,55 @@
+import numpy as np
+
+nan = float('nan')
+
+class CandleBuffer:
+    """Preallocated float64 store of per-candle columns (Date, OHLCV, Heikin Ashi, indicator values).
+
+    Rows live in a sliding window over an array twice the working size: appending writes past the tail,
+    dropping the oldest/newest candle just moves an index, and the window is compacted back to the front
+    (or the array doubled) only when the tail runs out, so every operation is amortised O(1). buffer[name]
+    is a contiguous numpy view of that column, indexable like the old lists (negative / current_index);
+    a view is only valid until the next mutation, so re-read it rather than keeping it.
+    """
+    def __init__(self, columns, capacity=1024):
+        self.names = list(columns)
+        self._col = {c: i for i, c in enumerate(self.names)}
+        self._data = np.full((len(self.names), 2 * max(capacity, 1)), nan)
+        self._start = self._end = 0
+
+    def __len__(self): return self._end - self._start
+    def __contains__(self, name): return name in self._col
+    def __getitem__(self, name): return self._data[self._col[name], self._start:self._end]
+
+    def _reserve(self, k):
+        """Make room for k more rows after the tail."""
+        if self._end + k <= self._data.shape[1]: return
+        n = len(self)
+        data = self._data
+        if 2 * (n + k) > data.shape[1]:
+            data = np.full((len(self.names), max(2 * data.shape[1], 2 * (n + k))), nan)
+        data[:, :n] = self._data[:, self._start:self._end]
+        self._data, self._start, self._end = data, 0, n
+
+    def append(self, row):
+        """Add one candle {column: value}; missing columns are NaN."""
+        self._reserve(1)
+        self._data[:, self._end] = [row.get(c, nan) for c in self.names]
+        self._end += 1
+
+    def extend(self, columns, n=None):
+        """Add n candles from {column: sequence}; missing columns are NaN."""
+        n = len(next(iter(columns.values()))) if n is None else n
+        self._reserve(n)
+        block = self._data[:, self._end:self._end + n]
+        block[:] = nan
+        for c, v in columns.items(): block[self._col[c]] = v
+        self._end += n
+
+    def drop_first(self, k=1):
+        """Forget the k oldest candles."""
+        self._start += min(k, len(self))
+
+    def drop_last(self, k=1):
+        """Forget the k newest candles (e.g. a provisional candle about to be replaced)."""
+        self._end -= min(k, len(self))
@@ -0,0 +1,83 @@
+import os, glob, gzip, json, time, heapq
+from queue import Queue, Empty
+from threading import Thread
+from Logger import *
+import numpy as np
+
+FLUSH_INTERVAL = 5      # seconds between flushes of the open capture file (about what a crash can lose)
+ROTATE_SECONDS = 3600   # a new file per hour of capture
+
+def _plain(x):
+    if isinstance(x, np.ndarray): return x.tolist()
+    if isinstance(x, np.generic): return x.item()
+    raise TypeError(f'{type(x).__name__} is not JSON serializable')
+
+class MessageRecorder:
+    """Capture of raw websocket messages for Replay.py: gzip'd JSON lines [time.time() at receipt, kind, message].
+
+    record() only enqueues, so a socket callback pays one Queue.put; a writer thread serializes, compresses and
+    rotates the files ({directory}/{role}_{%Y%m%d_%H%M%S}.jsonl.gz). Kinds: 'kline' (the kline event a Bot
+    handles), 'user' (user-data stream), 'bot' (a Bot's constructor arguments) and 'hist' (the history it was
+    seeded with), so a replay rebuilds the bots in the state the live ones were in. Messages are recorded where
+    they leave the socket (captured(), CombinedKlineStream.dispatch), not in the handlers, so a replay run in a
+    capturing process is not captured again.
+    """
+    def __init__(self):
+        self.q = None
+        self.role = self.directory = None
+
+    def start(self, role, directory):
+        """Start capturing; only the first call in a process starts the writer."""
+        if self.q is not None: return
+        os.makedirs(directory, exist_ok=True)
+        self.role, self.directory, self.q = role, directory, Queue()
+        Thread(target=self._write, daemon=True).start()
+        log.info(f'MessageRecorder - capturing {role} messages to {directory}')
+
+    def record(self, kind, msg):
+        if self.q is not None: self.q.put((time.time(), kind, msg))
+
+    def _write(self):
+        f, opened, flushed = None, 0.0, time.monotonic()
+        while True:
+            try: item = self.q.get(timeout=FLUSH_INTERVAL)
+            except Empty: item = None
+            try:
+                if item is not None:
+                    if f is None or item[0] - opened >= ROTATE_SECONDS:
+                        if f is not None: f.close()
+                        opened = item[0]
+                        name = f'{self.role}_{time.strftime("%Y%m%d_%H%M%S", time.localtime(opened))}.jsonl.gz'
+                        f = gzip.open(os.path.join(self.directory, name), 'at', compresslevel=6)
+                    f.write(json.dumps(item, separators=(',', ':'), default=_plain) + '\n')
+                if f is not None and time.monotonic() - flushed >= FLUSH_INTERVAL:
+                    f.flush()
+                    flushed = time.monotonic()
+            except (OSError, TypeError, ValueError) as e:
+                log.warning(f'MessageRecorder._write() - {e}')
+
+def _read_file(path):
+    try:
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                try: yield json.loads(line)
+                except ValueError: return  # torn last line of a file still being written
+    except EOFError:
+        pass  # no end-of-stream marker yet: a capture that is open or was not closed
+
+def read(paths):
+    """(time, kind, message) from capture files, directories or globs, merged in time order across files."""
+    files = []
+    for p in [paths] if isinstance(paths, str) else paths:
+        files += sorted(glob.glob(os.path.join(p, '*.jsonl.gz'))) if os.path.isdir(p) else sorted(glob.glob(p)) or [p]
+    return heapq.merge(*(_read_file(f) for f in files), key=lambda x: x[0])
+
+recorder = MessageRecorder()
+record = recorder.record
+
+def captured(kind, callback):
+    """Socket callback that records each message before handling it."""
+    def on_message(msg):
+        record(kind, msg)
+        return callback(msg)
+    return on_message
@@ -0,0 +1,24 @@
+import numpy as np, pandas as pd
+
+def heikin_ashi(Open, High, Low, Close):
+    """Full Heikin Ashi series (Open_H, High_H, Low_H, Close_H) with array ops, bit-identical to the old per-candle loop.
+
+    Open_H[i] = (Open_H[i-1] + Close_H[i-1]) / 2 is a first-order linear filter, evaluated as an
+    adjust=False EWM with alpha=.5 over the previous Close_H, seeded with (Close[0] + Open[0]) / 2.
+    The first candle keeps the raw High/Low, as before.
+    """
+    Open, High, Low, Close = (np.asarray(a, dtype=float) for a in (Open, High, Low, Close))
+    n = len(Close)
+    Close_H = (Open + Close + Low + High) / 4
+    if not n: return Close_H.copy(), Close_H.copy(), Close_H.copy(), Close_H
+    Open_H = pd.Series(np.concatenate(([(Close[0] + Open[0]) / 2], Close_H[:-1]))).ewm(alpha=.5, adjust=False).mean().to_numpy()
+    High_H = np.maximum(High, np.maximum(Open_H, Close_H))
+    Low_H = np.minimum(Low, np.minimum(Open_H, Close_H))
+    High_H[0], Low_H[0] = High[0], Low[0]
+    return Open_H, High_H, Low_H, Close_H
+
+def heikin_ashi_step(prev_Open_H, prev_Close_H, Open, High, Low, Close):
+    """O(1) next Heikin Ashi candle (Open_H, High_H, Low_H, Close_H) for a live candle."""
+    Open_H = (prev_Open_H + prev_Close_H) / 2
+    Close_H = (Open + Close + Low + High) / 4
+    return Open_H, max(High, Open_H, Close_H), min(Low, Open_H, Close_H), Close_H
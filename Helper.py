@@ -1,10 +1,19 @@
 import os, sys, time, math
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
 from Logger import *
 from binance.client import Client
 from binance import ThreadedWebsocketManager
-import BotClass 
+from binance.helpers import interval_to_milliseconds, date_to_milliseconds
+import numpy as np
+import BotClass, SharedHelper, SimVenue, Capture
+from KlineStore import KlineStore
 from LiveTradingConfig import *
 
+KLINE_PAGE_LIMIT = 499  # largest page in the weight-2 bracket of GET /fapi/v1/klines (100-499 candles)
+KLINE_PAGE_WEIGHT = 2
+
 
 def convert_buffer_to_string(buffer_int):
     """Convert candle count to Binance start_str like 'X hours/days ago'."""
@@ -23,38 +32,144 @@ def convert_buffer_to_string(buffer_int):
         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
         log.warning(f"convert_buffer_to_string() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
 
+_venue = None  # this process's SimVenue when simulated_venue is set
+
+def make_client():
+    """python-binance Client, or with simulated_venue a SimClient on this process's SimVenue."""
+    global _venue
+    if not simulated_venue: return Client(api_key=API_KEY, api_secret=API_SECRET)
+    if _venue is None:
+        opts = dict(sim_venue_options)
+        n = opts.pop('n_symbols', 100)
+        symbols = opts.pop('symbols', None) or ([f'SIM{i:03d}USDT' for i in range(n)] if trade_all_symbols else symbols_to_trade)
+        _venue = SimVenue.SimVenue(symbols, interval_ms=interval_to_milliseconds(interval), **opts)
+        log.info(f'make_client() - simulated venue: {len(symbols)} symbols, {opts}')
+    return _venue.client()
+
+def make_socket_manager(client):
+    """ThreadedWebsocketManager, or the SimVenue's stand-in for a SimClient."""
+    if getattr(client, 'simulated', False): return client.venue.socket_manager()
+    return ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET)
+
+class WeightBudget:
+    """Token bucket over Binance request weight: acquire() blocks until the per-minute budget has room."""
+    def __init__(self, weight_per_minute):
+        self.capacity = self.tokens = float(weight_per_minute)
+        self.rate = weight_per_minute / 60
+        self.last = time.monotonic()
+        self.lock = Lock()
+
+    def acquire(self, weight):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = (weight - self.tokens) / self.rate
+            time.sleep(wait)
+
+class CombinedKlineStream:
+    """One multiplexed futures socket carrying <symbol>@kline_<interval> for a group of bots.
+
+    Combined-stream messages ({"stream": ..., "data": <kline event>}) are routed to Bot.handle_socket_message
+    through a symbol -> bot dict. The connection counts as failed on an error message, a failing bot, or
+    `stale_after` seconds without messages, and is then restarted as a whole by ping_server_reconnect_sockets().
+    """
+    stale_after = 60
+
+    def __init__(self, twm, bots):
+        self.twm, self.name = twm, None
+        self.bots = {b.symbol: b for b in bots}
+        self.failed, self.last_message = False, time.monotonic()
+
+    @property
+    def streams(self): return [f'{sym.lower()}@kline_{interval}' for sym in self.bots]
+
+    def start(self):
+        self.name = self.twm.start_futures_multiplex_socket(callback=self.dispatch, streams=self.streams)
+        self.failed, self.last_message = False, time.monotonic()
+        for b in self.bots.values(): b.stream, b.socket_failed = self.name, False
+
+    def restart(self):
+        self.twm.stop_socket(self.name)
+        self.start()
+
+    def remove(self, symbol):
+        """Stop routing a symbol; its stream is dropped from the subscription on the next restart."""
+        self.bots.pop(symbol, None)
+
+    def dispatch(self, msg):
+        self.last_message = time.monotonic()
+        data = msg.get('data') if isinstance(msg, dict) else None
+        if data is None:  # python-binance reports a dropped connection as {'e': 'error', 'm': ...}
+            log.warning(f"CombinedKlineStream.dispatch() - {len(self.bots)} streams, msg: {msg}")
+            self.failed = True
+            return
+        b = self.bots.get(data.get('s'))
+        if b is not None:
+            Capture.record('kline', data)
+            b.handle_socket_message(data)
+
+    def needs_restart(self):
+        return self.failed or time.monotonic() - self.last_message > self.stale_after or any(b.socket_failed for b in self.bots.values())
+
 class CustomClient:
-    def __init__(self, client: Client):
+    def __init__(self, client: Client, weight_per_minute=backfill_weight_per_minute):
+        """weight_per_minute: this process's share of the request-weight budget (Shards split it between processes)."""
         self.client = client
         self.leverage = leverage
-        self.twm = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET)
+        self.twm = make_socket_manager(client)
         self.number_of_bots = 0
+        self.weight_budget = WeightBudget(weight_per_minute)
+        self.warmup_times = {}
+        self.interval_ms = interval_to_milliseconds(interval)
+        self.kline_store = KlineStore(kline_cache_dir, interval, self.interval_ms) if kline_cache_dir and not getattr(client, 'simulated', False) else None
+        self.connections: list[CombinedKlineStream] = []
 
     def set_leverage(self, symbols_to_trade: list[str]):
-        """Set leverage per symbol as defined in config."""
+        """Set leverage per symbol as defined in config: one bulk read of the current leverage, then concurrent
+        changes (within the request-weight budget) for the symbols that differ. Symbols that fail are removed."""
         log.info("set_leverage() - Setting leverage...")
-        i = 0
-        while i < len(symbols_to_trade):
-            sym = symbols_to_trade[i]
-            log.info(f"set_leverage() - ({i+1}/{len(symbols_to_trade)}) {sym}")
-            try:
-                self.client.futures_change_leverage(symbol=sym, leverage=self.leverage)
-                i += 1
-            except Exception as e:
-                exc_type, exc_obj, exc_tb = sys.exc_info()
-                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-                log.warning(f"set_leverage() - Removing {sym}. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
-                symbols_to_trade.pop(i)
+        try:
+            current = {p['symbol']: int(p['leverage']) for p in self.client.futures_position_information()}
+        except Exception as e:
+            log.warning(f"set_leverage() - Could not read current leverage, setting all symbols. Error: {e}")
+            current = {}
+        todo = [sym for sym in symbols_to_trade if current.get(sym) != self.leverage]
+        log.info(f"set_leverage() - {len(symbols_to_trade) - len(todo)} symbols already at {self.leverage}x, changing {len(todo)}")
+
+        def change(sym):
+            self.weight_budget.acquire(1)
+            self.client.futures_change_leverage(symbol=sym, leverage=self.leverage)
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=backfill_workers) as pool:
+            jobs = {pool.submit(change, sym): sym for sym in todo}
+            for i, job in enumerate(as_completed(jobs)):
+                sym = jobs[job]
+                try:
+                    job.result()
+                    log.info(f"set_leverage() - ({i+1}/{len(todo)}) {sym}")
+                except Exception as e:
+                    log.warning(f"set_leverage() - Removing {sym}. Error: {e}")
+                    failed.add(sym)
+        symbols_to_trade[:] = [sym for sym in symbols_to_trade if sym not in failed]
 
     def start_websockets(self, bots: list[BotClass.Bot]):
-        """Start kline sockets for all bots."""
+        """Start kline sockets for all bots: streams_per_connection bots per multiplexed socket, or one socket each."""
         self.twm.start()
         log.info("start_websockets() - Starting sockets...")
+        if combined_streams:
+            self._start_combined_streams(bots)
+            return
         i = 0
         while i < len(bots):
             b = bots[i]
             try:
-                b.stream = self.twm.start_kline_futures_socket(callback=b.handle_socket_message, symbol=b.symbol, interval=interval)
+                b.stream = self.twm.start_kline_futures_socket(callback=Capture.captured('kline', b.handle_socket_message), symbol=b.symbol, interval=interval)
                 i += 1
             except Exception as e:
                 exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -63,17 +178,48 @@ class CustomClient:
                 bots.pop(i)
         self.number_of_bots = len(bots)
 
+    def _start_combined_streams(self, bots: list[BotClass.Bot]):
+        for i in range(0, len(bots), streams_per_connection):
+            conn = CombinedKlineStream(self.twm, bots[i:i + streams_per_connection])
+            try:
+                conn.start()
+                self.connections.append(conn)
+            except Exception as e:
+                exc_type, exc_obj, exc_tb = sys.exc_info()
+                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+                log.warning(f"start_websockets() - {list(conn.bots)}. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+                for b in conn.bots.values(): bots.remove(b)
+        self.number_of_bots = len(bots)
+        log.info(f"start_websockets() - {len(bots)} streams on {len(self.connections)} connections")
+
+    def _stop_stream(self, b: BotClass.Bot):
+        if self.connections:
+            for conn in self.connections: conn.remove(b.symbol)
+        else:
+            self.twm.stop_socket(b.stream)
+
     def ping_server_reconnect_sockets(self, bots: list[BotClass.Bot]):
-        """Keep connection alive and auto-reconnect failed sockets."""
+        """Keep connection alive and auto-reconnect failed sockets (whole connections in combined-stream mode)."""
         while True:
             time.sleep(15)
             self.client.futures_ping()
+            for conn in self.connections:
+                if conn.needs_restart():
+                    try:
+                        log.info(f"retry_websockets_job() - Resetting connection with {len(conn.bots)} streams")
+                        conn.restart()
+                        log.info("retry_websockets_job() - Reset OK")
+                    except Exception as e:
+                        exc_type, exc_obj, exc_tb = sys.exc_info()
+                        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+                        log.error(f"retry_websockets_job() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            if self.connections: continue
             for b in bots:
                 if b.socket_failed:
                     try:
                         log.info(f"retry_websockets_job() - Resetting {b.symbol}")
                         self.twm.stop_socket(b.stream)
-                        b.stream = self.twm.start_kline_futures_socket(b.handle_socket_message, symbol=b.symbol)
+                        b.stream = self.twm.start_kline_futures_socket(Capture.captured('kline', b.handle_socket_message), symbol=b.symbol, interval=interval)
                         b.socket_failed = False
                         log.info("retry_websockets_job() - Reset OK")
                     except Exception as e:
@@ -81,11 +227,10 @@ class CustomClient:
                         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                         log.error(f"retry_websockets_job() - {b.symbol}. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
 
-    def setup_bots(self, bots: list[BotClass.Bot], symbols_to_trade: list[str], signal_queue, print_trades_q):
-        """Instantiate a Bot for each tradable symbol."""
+    def setup_bots(self, bots: list[BotClass.Bot], symbols_to_trade: list[str], signal_queue, print_trades_q, index_of=None):
+        """Instantiate a Bot for each tradable symbol (index_of: {symbol: index} when the symbols are a shard of the universe)."""
         log.info("setup_bots() - Creating bots...")
-        info = self.client.futures_exchange_info()['symbols']
-        meta = {x['pair']: (int(x['pricePrecision']), int(x['quantityPrecision']), float(x['filters'][0]['tickSize'])) for x in info}
+        meta = {s: (cp, op, tick) for s, (_, cp, op, tick) in SharedHelper.get_exchange_info(self.client).items()}
 
         i = 0
         while i < len(symbols_to_trade):
@@ -93,9 +238,13 @@ class CustomClient:
             if sym in meta:
                 cp, op, tick = meta[sym]
                 bots.append(BotClass.Bot(symbol=sym, Open=[], Close=[], High=[], Low=[], Volume=[], Date=[],
-                                         OP=op, CP=cp, index=i, tick=tick, strategy=trading_strategy,
+                                         OP=op, CP=cp, index=index_of[sym] if index_of else i, tick=tick, strategy=trading_strategy,
                                          TP_SL_choice=TP_SL_choice, SL_mult=SL_mult, TP_mult=TP_mult,
-                                         signal_queue=signal_queue, print_trades_q=print_trades_q))
+                                         signal_queue=signal_queue, print_trades_q=print_trades_q,
+                                         params=strategy_params, kline_store=self.kline_store, strategies=extra_strategies))
+                Capture.record('bot', {'symbol': sym, 'OP': op, 'CP': cp, 'tick': tick, 'index': bots[-1].index, 'strategy': trading_strategy,
+                                       'TP_SL_choice': TP_SL_choice, 'SL_mult': SL_mult, 'TP_mult': TP_mult, 'params': strategy_params,
+                                       'strategies': extra_strategies})
                 i += 1
             else:
                 log.info(f"setup_bots() - {sym} missing exchange info, removed")
@@ -108,42 +257,132 @@ class CustomClient:
         log.info("setup_bots() - Done")
 
     def combine_data(self, bots: list[BotClass.Bot], symbols_to_trade: list[str], buffer):
-        """Fetch historical data and merge with live stream so bots can trade immediately."""
+        """Fetch historical data and merge with live stream so bots can trade immediately.
+
+        Candles already in the kline store are read from disk; the missing kline pages of every symbol are
+        fetched by backfill_workers threads within the weight budget, and each symbol is merged into its bot
+        (on this thread, as before) as soon as all of its pages are in.
+        """
         log.info("combine_data() - Merging historical + socket data...")
-        i = 0
-        while i < len(bots):
-            b = bots[i]
-            log.info(f"combine_data() - ({i+1}/{len(bots)}) {b.symbol}")
-            dt, op, cl, hi, lo, vo = self.get_historical(b.symbol, buffer)
+        t0 = time.perf_counter()
+        start, now = date_to_milliseconds(buffer), int(time.time() * 1000)
+        if self.kline_store is not None and kline_cache_retention:
+            self.kline_store.retention = max(1, int(kline_cache_retention * (now - start) // self.interval_ms))
+        plans = {b.symbol: self._history_plan(b.symbol, start, now) for b in bots}
+        results = {sym: [None] * len(pages) for sym, (_, pages) in plans.items()}
+        pending = {sym: len(pages) for sym, (_, pages) in plans.items()}
+        failed, ready, total = set(), 0, len(bots)
+
+        def finish(b):
+            nonlocal ready
+            ready += 1
+            self.warmup_times[b.symbol] = time.perf_counter() - t0
+            log.info(f"combine_data() - ({ready}/{total}) {b.symbol} in {self.warmup_times[b.symbol]:.1f}s")
+            klines = [x for page in results.pop(b.symbol) for x in page]
+            self._merge_historical(b, bots, symbols_to_trade, None if b.symbol in failed else
+                                   self._join_history(b.symbol, start, plans[b.symbol][0], klines))
+
+        for b in [b for b in bots if not pending[b.symbol]]: finish(b)  # the kline store is already up to date
+        with ThreadPoolExecutor(max_workers=backfill_workers) as pool:
+            futures = {pool.submit(self._fetch_page, b.symbol, page_start, page_end): (b, k)
+                       for b in list(bots) for k, (page_start, page_end) in enumerate(plans[b.symbol][1])}
+            for f in as_completed(futures):
+                b, k = futures[f]
+                try:
+                    results[b.symbol][k] = f.result()
+                except Exception as e:
+                    failed.add(b.symbol)
+                    log.warning(f"combine_data() - {b.symbol} page {k+1}/{len(results[b.symbol])} failed, Error: {e}")
+                pending[b.symbol] -= 1
+                if not pending[b.symbol]: finish(b)
+        log.info(f"combine_data() - All symbols ready in {time.perf_counter() - t0:.1f}s "
+                 f"({len(futures)} requests, {backfill_workers} workers). Scanning for trades...")
+
+    def _merge_historical(self, b: BotClass.Bot, bots: list[BotClass.Bot], symbols_to_trade: list[str], history):
+        """add_hist() the history (the still-open last candle comes from the socket); drop the bot if that fails."""
+        try:
+            if history is None: raise ValueError('incomplete history')
+            dt, op, cl, hi, lo, vo = history
+            for arr in (dt, op, cl, hi, lo, vo): arr.pop(-1)
+            b.add_hist(Date_temp=dt, Open_temp=op, Close_temp=cl, High_temp=hi, Low_temp=lo, Volume_temp=vo)
+            Capture.record('hist', {'s': b.symbol, 'Date': dt, 'Open': op, 'Close': cl, 'High': hi, 'Low': lo, 'Volume': vo})
+            if b.kline_store is not None: b.save_closed_candles()
+        except Exception as e:
+            exc_type, exc_obj, exc_tb = sys.exc_info()
+            fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             try:
-                for arr in (dt, op, cl, hi, lo, vo): arr.pop(-1)
-                b.add_hist(Date_temp=dt, Open_temp=op, Close_temp=cl, High_temp=hi, Low_temp=lo, Volume_temp=vo)
-                i += 1
+                log.warning(f"combine_data() - Add failed. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+                i = bots.index(b)
+                self._stop_stream(b)
+                symbols_to_trade.pop(i); bots.pop(i); self.number_of_bots -= 1
+            except Exception as e2:
+                exc_type2, exc_obj2, exc_tb2 = sys.exc_info()
+                fname2 = os.path.split(exc_tb2.tb_frame.f_code.co_filename)[1]
+                log.warning(f"combine_data() - Cleanup failed. Info: {(exc_obj2, fname2, exc_tb2.tb_lineno)}, Error: {e2}")
+
+    def _kline_pages(self, start: int, now: int):
+        """(startTime, endTime) windows of KLINE_PAGE_LIMIT candles from start up to now (ms)."""
+        step = KLINE_PAGE_LIMIT * self.interval_ms
+        return [(s, min(s + step - 1, now)) for s in range(start, now + 1, step)]
+
+    def _history_plan(self, symbol: str, start: int, now: int):
+        """(kline store columns or None, pages still to download). Only the tail after the store is downloaded,
+        as long as the store reaches back to start and ends inside the window (the tail is not longer than the
+        window); otherwise the whole window is, and replaces it."""
+        if self.kline_store is not None:
+            stored = self.kline_store.read(symbol)
+            first_close = -(-start // self.interval_ms) * self.interval_ms + self.interval_ms - 1  # first candle opening at/after start
+            if len(stored['Date']) and stored['Date'][0] <= first_close and stored['Date'][-1] >= start:
+                return stored, self._kline_pages(int(stored['Date'][-1]) + 1, now)
+        return None, self._kline_pages(start, now)
+
+    def _join_history(self, symbol: str, start: int, stored, klines):
+        """Stored + downloaded candles from start on, as the (D, O, C, H, L, V) lists of get_historical(); the
+        downloaded closed candles (all but the last, still open one) are written to the kline store."""
+        D, O, C, H, L, V = self._parse_klines(klines)
+        new = {'Date': D[:-1], 'Open': O[:-1], 'High': H[:-1], 'Low': L[:-1], 'Close': C[:-1], 'Volume': V[:-1]}
+        if self.kline_store is not None and new['Date']:
+            if stored is None: self.kline_store.write(symbol, new)
+            else: self.kline_store.append(symbol, new)
+        if stored is not None:
+            k = int(np.searchsorted(stored['Date'], start))
+            D = [int(x) for x in stored['Date'][k:]] + D
+            O, C, H, L, V = (stored[c][k:].tolist() + x for c, x in zip(('Open', 'Close', 'High', 'Low', 'Volume'), (O, C, H, L, V)))
+        k = bisect_left(D, start)
+        return D[k:], O[k:], C[k:], H[k:], L[k:], V[k:]
+
+    def _fetch_page(self, symbol: str, start: int, end: int, retries=3):
+        for attempt in range(retries):
+            self.weight_budget.acquire(KLINE_PAGE_WEIGHT)
+            try:
+                return self.client.futures_klines(symbol=symbol, interval=interval, startTime=start, endTime=end, limit=KLINE_PAGE_LIMIT)
             except Exception as e:
-                exc_type, exc_obj, exc_tb = sys.exc_info()
-                fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-                try:
-                    log.warning(f"combine_data() - Add failed. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
-                    self.twm.stop_socket(b.stream)
-                    symbols_to_trade.pop(i); bots.pop(i); self.number_of_bots -= 1
-                except Exception as e2:
-                    exc_type2, exc_obj2, exc_tb2 = sys.exc_info()
-                    fname2 = os.path.split(exc_tb2.tb_frame.f_code.co_filename)[1]
-                    log.warning(f"combine_data() - Cleanup failed. Info: {(exc_obj2, fname2, exc_tb2.tb_lineno)}, Error: {e2}")
-        log.info("combine_data() - All symbols ready. Scanning for trades...")
+                if attempt == retries - 1: raise
+                log.warning(f'_fetch_page() - {symbol} retry {attempt+1}, Error: {e}')
+                time.sleep(2 ** attempt)
 
-    def get_historical(self, symbol: str, buffer):
-        """Download historical klines for a symbol."""
+    @staticmethod
+    def _parse_klines(klines):
         O, H, L, C, V, D = [], [], [], [], [], []
+        for k in klines:
+            D.append(int(k[6])); O.append(float(k[1])); C.append(float(k[4]))
+            H.append(float(k[2])); L.append(float(k[3])); V.append(float(k[7]))
+        return D, O, C, H, L, V
+
+    def get_historical(self, symbol: str, buffer):
+        """Historical klines for a symbol: the kline store first, then only the missing tail from the API."""
+        start, now = date_to_milliseconds(buffer), int(time.time() * 1000)
+        stored, klines = None, []
         try:
-            for k in self.client.futures_historical_klines(symbol, interval, start_str=buffer):
-                D.append(int(k[6])); O.append(float(k[1])); C.append(float(k[4]))
-                H.append(float(k[2])); L.append(float(k[3])); V.append(float(k[7]))
+            stored, pages = self._history_plan(symbol, start, now)
+            for page_start, page_end in pages:
+                klines += self._fetch_page(symbol, page_start, page_end)
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.error(f'get_historical() - {symbol}. Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
-        return D, O, C, H, L, V
+            return self._parse_klines(klines)
+        return self._join_history(symbol, start, stored, klines)
 
     def get_account_balance(self):
         """Return USDT futures wallet balance."""
@@ -169,3 +408,41 @@ class Trade:
         self.Highest_val, self.Lowest_val = -9_999_999, 9_999_999
         self.trail_activated, self.same_candle = False, True
         self.current_price = 0
+        self.filled_at = self.unprotected_ms = None  # perf_counter() when the entry fill was seen; ms until TP/SL were acknowledged
+        self.strategy = ''  # name of the strategy whose signal opened it
+        self.lock = Lock()
+
+class TradeRegistry:
+    """Active trades indexed by symbol and by entry/TP/SL order id, so user-stream events reach their Trade in O(1).
+
+    One trade per symbol (new_trades_loop never opens a second). Iterating yields a snapshot, so the websocket,
+    threshold and polling threads can walk it while another thread adds or removes trades.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.by_symbol: dict[str, Trade] = {}
+        self.by_order = {}  # order id -> Trade
+
+    def add(self, t: Trade):
+        with self.lock:
+            self.by_symbol[t.symbol] = t
+            self.by_order[t.order_id] = t
+        return t
+
+    def index_orders(self, t: Trade):
+        """Register the trade's TP/SL order ids once they are placed."""
+        with self.lock:
+            for oid in (t.TP_id, t.SL_id):
+                if oid not in ('', -1): self.by_order[oid] = t
+
+    def remove(self, t: Trade):
+        with self.lock:
+            if self.by_symbol.get(t.symbol) is t: del self.by_symbol[t.symbol]
+            for oid in (t.order_id, t.TP_id, t.SL_id):
+                if self.by_order.get(oid) is t: del self.by_order[oid]
+
+    def get(self, symbol): return self.by_symbol.get(symbol)
+    def for_order(self, order_id): return self.by_order.get(order_id)
+    def symbols(self): return list(self.by_symbol)
+    def __len__(self): return len(self.by_symbol)
+    def __iter__(self): return iter(list(self.by_symbol.values()))
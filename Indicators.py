@@ -0,0 +1,416 @@
+import math
+from collections import deque
+import numpy as np, pandas as pd
+from CandleBuffer import CandleBuffer
+
+nan = float('nan')
+PARITY_TOLERANCE = 1e-5  # relative error at which a value seeded from a short history counts as equal to a long one (lookback())
+
+def _decay(alpha):
+    """Inputs until an exponential filter's start-up error has shrunk below PARITY_TOLERANCE."""
+    return math.ceil(math.log(PARITY_TOLERANCE) / math.log(1 - alpha))
+
+def _ratio(num, den):
+    """num / den with numpy semantics (x/0 -> ±inf, 0/0 or NaN -> NaN) instead of raising."""
+    if den: return num / den
+    if num != num or num == 0: return nan
+    return math.copysign(math.inf, num)
+
+class EMA:
+    """EMA with pandas ewm(adjust=False) recursion, NaN until min_periods inputs (ta.trend.ema_indicator). Leading NaNs are skipped."""
+    def __init__(self, window=None, alpha=None, min_periods=None):
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self.min_periods = min_periods if min_periods is not None else window
+        self.value, self.count = nan, 0
+
+    def seed(self, x):
+        s = pd.Series(x, dtype=float)
+        raw = s.ewm(alpha=self.alpha, adjust=False).mean()
+        counts = s.notna().cumsum()
+        self.count = int(counts.iloc[-1]) if len(s) else 0
+        self.value = float(raw.iloc[-1]) if self.count else nan
+        return raw.where(counts >= self.min_periods).to_numpy()
+
+    def lookback(self): return self.min_periods + _decay(self.alpha)
+
+    def save(self): return self.value, self.count
+    def restore(self, state): self.value, self.count = state
+
+    def update(self, x):
+        if x == x:
+            self.value = x if not self.count else (1 - self.alpha) * self.value + self.alpha * x
+            self.count += 1
+        return self.value if self.count >= self.min_periods else nan
+
+class _Window:
+    """Fixed-size window over the last inputs; output is NaN while the window is short or holds a NaN (pandas min_periods=window).
+
+    save()/restore() undo one update(): the scalars in `running` plus the input the window pushed out, if any.
+    """
+    running = ()
+
+    def __init__(self, window):
+        self.window, self.count, self.last_nan = window, 0, -1
+        self.buf = deque(maxlen=window)
+
+    def save(self):
+        return self.count, self.last_nan, [getattr(self, a) for a in self.running], self.buf[0] if len(self.buf) == self.window else None
+
+    def restore(self, state):
+        self.count, self.last_nan, running, evicted = state
+        for a, v in zip(self.running, running): setattr(self, a, v)
+        self.buf.pop()
+        if evicted is not None: self.buf.appendleft(evicted)
+
+    def _valid(self):
+        return self.count >= self.window and self.count - self.last_nan > self.window
+
+    def lookback(self): return self.window
+
+    def seed(self, x):
+        x = np.asarray(x, dtype=float)
+        out = self._seed_values(pd.Series(x))
+        self.__init__(self.window)
+        tail = x[-self.window:]
+        self.count = len(x) - len(tail)
+        nans = np.flatnonzero(np.isnan(x[:self.count]))
+        if len(nans): self.last_nan = int(nans[-1])
+        for v in tail: self.update(float(v))
+        return out
+
+class SMA(_Window):
+    """Rolling mean (ta.trend.sma_indicator / rolling(window).mean()) with a running sum, re-summed once per window to stop drift."""
+    running = ('total',)
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.total = 0.0
+
+    def _seed_values(self, s): return s.rolling(self.window).mean().to_numpy()
+
+    def update(self, x):
+        if len(self.buf) == self.window: self.total -= self.buf[0]
+        if x != x: self.last_nan = self.count; x = 0.0
+        self.buf.append(x); self.count += 1
+        self.total = math.fsum(self.buf) if self.count % self.window == 0 else self.total + x
+        return self.total / self.window if self._valid() else nan
+
+class RollingStd(_Window):
+    """Rolling population std (ddof=0) with a sliding Welford update, re-synced once per window."""
+    running = ('mean', 'm2')
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.mean, self.m2 = 0.0, 0.0
+
+    def _seed_values(self, s): return s.rolling(self.window).std(ddof=0).to_numpy()
+
+    def update(self, x):
+        if x != x: self.last_nan = self.count; x = 0.0
+        buf = self.buf
+        if len(buf) == self.window:
+            old = buf[0]; buf.append(x)
+            mean = self.mean + (x - old) / self.window
+            self.m2 += (x - old) * (x - mean + old - self.mean)
+            self.mean = mean
+        else:
+            buf.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(buf)
+            self.m2 += delta * (x - self.mean)
+        self.count += 1
+        if self.count % self.window == 0:
+            self.mean = math.fsum(buf) / len(buf)
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in buf)
+        return math.sqrt(max(self.m2, 0.0) / self.window) if self._valid() else nan
+
+class RollingMax(_Window):
+    """Rolling max via a monotonic deque of (position, value), amortised O(1) per update. update() keeps the entries
+    it removed (usually none) so that restore() can put them back."""
+    def __init__(self, window):
+        super().__init__(window)
+        self.buf = deque()
+        self.pushed, self.popped, self.expired = False, None, None
+
+    def _seed_values(self, s): return s.rolling(self.window).max().to_numpy()
+    def _keep(self, old, new): return old > new
+
+    def save(self): return self.count, self.last_nan
+
+    def restore(self, state):
+        q = self.buf
+        self.count, self.last_nan = state
+        if self.expired: q.extendleft(reversed(self.expired))
+        if self.pushed: q.pop()
+        if self.popped: q.extend(reversed(self.popped))
+        self.pushed, self.popped, self.expired = False, None, None
+
+    def update(self, x):
+        q = self.buf
+        self.pushed, self.popped, self.expired = x == x, None, None
+        if x != x: self.last_nan = self.count
+        else:
+            if q and not self._keep(q[-1][1], x):
+                self.popped = []
+                while q and not self._keep(q[-1][1], x): self.popped.append(q.pop())
+            q.append((self.count, x))
+        self.count += 1
+        if q and q[0][0] <= self.count - 1 - self.window:
+            self.expired = []
+            while q and q[0][0] <= self.count - 1 - self.window: self.expired.append(q.popleft())
+        return q[0][1] if self._valid() and q else nan
+
+class RollingMin(RollingMax):
+    """Rolling min, see RollingMax."""
+    def _seed_values(self, s): return s.rolling(self.window).min().to_numpy()
+    def _keep(self, old, new): return old < new
+
+class RSI:
+    """Wilder RSI matching ta.momentum.rsi."""
+    def __init__(self, window=14):
+        self.window, self.prev = window, nan
+        self.up = EMA(alpha=1 / window, min_periods=window)
+        self.down = EMA(alpha=1 / window, min_periods=window)
+
+    def lookback(self): return 1 + self.up.lookback()
+    def save(self): return self.prev, self.up.save(), self.down.save()
+
+    def restore(self, state):
+        self.prev, up, down = state
+        self.up.restore(up); self.down.restore(down)
+
+    @staticmethod
+    def _rsi(up, down):
+        if down == 0: return 100.0
+        return 100 - 100 / (1 + _ratio(up, down))
+
+    def seed(self, close):
+        close = np.asarray(close, dtype=float)
+        diff = np.diff(close, prepend=nan)
+        up = self.up.seed(np.where(diff > 0, diff, 0.0))
+        down = self.down.seed(np.where(diff < 0, -diff, 0.0))
+        self.prev = float(close[-1]) if len(close) else nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(down == 0, 100, 100 - (100 / (1 + up / down)))
+
+    def update(self, close):
+        diff = close - self.prev
+        self.prev = close
+        up = self.up.update(diff if diff > 0 else 0.0)
+        down = self.down.update(-diff if diff < 0 else 0.0)
+        return self._rsi(up, down)
+
+class MACD:
+    """MACD line, fast EMA - slow EMA (ta.trend.macd). Chain an EMA(9) over it for the signal line."""
+    def __init__(self, window_fast=12, window_slow=26):
+        self.fast, self.slow = EMA(window_fast), EMA(window_slow)
+
+    def seed(self, close): return self.fast.seed(close) - self.slow.seed(close)
+    def update(self, close): return self.fast.update(close) - self.slow.update(close)
+    def lookback(self): return max(self.fast.lookback(), self.slow.lookback())
+    def save(self): return self.fast.save(), self.slow.save()
+
+    def restore(self, state):
+        self.fast.restore(state[0]); self.slow.restore(state[1])
+
+class Stoch:
+    """Stochastic %K (ta.momentum.stoch). Chain an SMA(smooth_window) over it for ta.momentum.stoch_signal."""
+    def __init__(self, window=14):
+        self.high, self.low = RollingMax(window), RollingMin(window)
+
+    def lookback(self): return self.high.window
+    def save(self): return self.high.save(), self.low.save()
+
+    def restore(self, state):
+        self.high.restore(state[0]); self.low.restore(state[1])
+
+    def seed(self, high, low, close):
+        hi, lo = self.high.seed(high), self.low.seed(low)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 * (np.asarray(close, dtype=float) - lo) / (hi - lo)
+
+    def update(self, high, low, close):
+        hi, lo = self.high.update(high), self.low.update(low)
+        return _ratio(100 * (close - lo), hi - lo)
+
+class StochRSIK:
+    """Stochastic RSI %K (ta.momentum.stochrsi_k). Chain an SMA(smooth2) over it for ta.momentum.stochrsi_d."""
+    def __init__(self, window=14, smooth1=3):
+        self.rsi, self.high, self.low = RSI(window), RollingMax(window), RollingMin(window)
+        self.smooth = SMA(smooth1)
+
+    def lookback(self): return self.rsi.lookback() + self.high.window + self.smooth.window
+    def save(self): return self.rsi.save(), self.high.save(), self.low.save(), self.smooth.save()
+
+    def restore(self, state):
+        for s, x in zip((self.rsi, self.high, self.low, self.smooth), state): s.restore(x)
+
+    def seed(self, close):
+        r = self.rsi.seed(close)
+        hi, lo = self.high.seed(r), self.low.seed(r)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.smooth.seed((r - lo) / (hi - lo))
+
+    def update(self, close):
+        r = self.rsi.update(close)
+        hi, lo = self.high.update(r), self.low.update(r)
+        return self.smooth.update(_ratio(r - lo, hi - lo))
+
+class BollingerPBand:
+    """Bollinger %B (ta.volatility.bollinger_pband); NaN when the bands collapse."""
+    def __init__(self, window=20, window_dev=2):
+        self.window_dev = window_dev
+        self.mavg, self.mstd = SMA(window), RollingStd(window)
+
+    def lookback(self): return self.mavg.window
+    def save(self): return self.mavg.save(), self.mstd.save()
+
+    def restore(self, state):
+        self.mavg.restore(state[0]); self.mstd.restore(state[1])
+
+    def seed(self, close):
+        close = np.asarray(close, dtype=float)
+        m, s = self.mavg.seed(close), self.mstd.seed(close)
+        h, l = m + self.window_dev * s, m - self.window_dev * s
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (close - l) / np.where(h != l, h - l, nan)
+
+    def update(self, close):
+        m, s = self.mavg.update(close), self.mstd.update(close)
+        h, l = m + self.window_dev * s, m - self.window_dev * s
+        return (close - l) / (h - l) if h != l else nan
+
+class ATR:
+    """Wilder ATR matching ta.volatility.average_true_range (0 until the first full window)."""
+    def __init__(self, window=14):
+        self.window, self.prev_close, self.count = window, nan, 0
+        self.value, self.tr_sum = 0.0, 0.0
+
+    def lookback(self): return self.window + _decay(1 / self.window)
+    def save(self): return self.prev_close, self.count, self.value, self.tr_sum
+    def restore(self, state): self.prev_close, self.count, self.value, self.tr_sum = state
+
+    def _tr(self, high, low):
+        pc = self.prev_close
+        return high - low if pc != pc else max(high - low, abs(high - pc), abs(low - pc))
+
+    def seed(self, high, low, close):
+        high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+        n, w = len(close), self.window
+        pc = np.concatenate(([nan], close[:-1]))
+        tr = np.fmax(high - low, np.fmax(np.abs(high - pc), np.abs(low - pc)))
+        atr = np.zeros(n)
+        if n >= w:
+            # Wilder smoothing is an adjust=False EWM (alpha=1/w) started from the mean of the first window.
+            atr[w - 1:] = pd.Series(np.concatenate(([tr[:w].mean()], tr[w:]))).ewm(alpha=1 / w, adjust=False).mean().to_numpy()
+        self.count, self.tr_sum = n, float(tr[:w].sum()) if n < w else 0.0
+        self.value = float(atr[-1]) if n else 0.0
+        self.prev_close = float(close[-1]) if n else nan
+        return atr
+
+    def update(self, high, low, close):
+        tr = self._tr(high, low)
+        self.prev_close = close
+        self.count += 1
+        w = self.window
+        if self.count < w:
+            self.tr_sum += tr; return 0.0
+        if self.count == w:
+            self.value = (self.tr_sum + tr) / w
+        else:
+            self.value = (self.value * (w - 1) + tr) / w
+        return self.value
+
+class IndicatorEngine:
+    """Streaming indicators of one Bot, kept index-aligned with its candle buffer.
+
+    specs: {name: (stream, inputs, plotting_axis)}; inputs name candle series ('Open','High','Low','Close','Volume')
+    or earlier indicators, so e.g. a MACD signal is an EMA chained over "MACD". Values are kept in a
+    CandleBuffer and exposed as the usual self.indicators[name]["values"] consumed by TradingStrats.
+    """
+    def __init__(self, specs):
+        self.streams = {name: s for name, (s, _, _) in specs.items()}
+        self.inputs = {name: inp for name, (_, inp, _) in specs.items()}
+        self.axes = {name: axis for name, (_, _, axis) in specs.items()}
+        self.values = CandleBuffer(specs)
+        self._checkpoint = None
+
+    @property
+    def length(self): return len(self.values)
+
+    @property
+    def indicators(self):
+        return {name: {"values": self.values[name], "plotting_axis": axis} for name, axis in self.axes.items()}
+
+    def seed(self, series):
+        """Vectorised pass over the full history {source: sequence}, leaving every stream ready for update()."""
+        arrays = {k: np.asarray(v, dtype=float) for k, v in series.items()}
+        out = {}
+        for name, stream in self.streams.items():
+            arrays[name] = out[name] = stream.seed(*(arrays[k] for k in self.inputs[name]))
+        self.values = CandleBuffer(self.streams, len(arrays['Close']))
+        self.values.extend(out, len(arrays['Close']))
+        self._checkpoint = None
+
+    def update(self, candle, checkpoint=False):
+        """O(1) step for one new candle {source: value}; checkpoint=True lets rollback() undo a provisional candle."""
+        self._checkpoint = [(s, s.save()) for s in self.streams.values()] if checkpoint else None
+        point = dict(candle)
+        for name, stream in self.streams.items():
+            point[name] = stream.update(*(point[k] for k in self.inputs[name]))
+        self.values.append(point)
+
+    def rollback(self):
+        """Undo the last update(); returns False if it was not checkpointed (caller must reseed)."""
+        if self._checkpoint is None: return False
+        for stream, state in reversed(self._checkpoint): stream.restore(state)
+        self._checkpoint = None
+        self.values.drop_last()
+        return True
+
+    def drop_first(self):
+        """Forget the oldest candle's values. Streams keep their state unless they depend on the buffered window (drop_first())."""
+        self.values.drop_first()
+        for stream in self.streams.values():
+            if hasattr(stream, 'drop_first'): stream.drop_first()
+
+class IndicatorGraph:
+    """Deduplicated indicator DAG of one Bot, built from declarations (see TradingStrats.strategy).
+
+    A declaration is {name: (stream class, args, inputs, plotting_axis)}: args are constants or names of entries in
+    the declarer's params, inputs are candle columns or other names of the same declaration. Every distinct
+    (class, args, inputs) is one node, computed once per candle however many declarers ask for it; add() returns
+    how each declared name maps onto a node, specs() fresh IndicatorEngine specs in dependency order.
+    """
+    def __init__(self):
+        self.nodes = {}  # node name -> (stream class, args, inputs as node names or columns, plotting_axis)
+        self.keys = {}   # (class name, args, inputs) -> node name
+
+    def add(self, declared, params=None):
+        """Merge one declaration into the graph; returns {declared name: node name}."""
+        names = {}
+        def resolve(name):
+            if name in names: return names[name]
+            if name not in declared: return name  # candle column
+            cls, args, inputs, axis = declared[name]
+            args = tuple(params[a] if isinstance(a, str) else a for a in args)
+            inputs = tuple(resolve(x) for x in inputs)
+            key = (cls.__name__, args, inputs)
+            if key not in self.keys:
+                node = name if name not in self.nodes else f'{name} #{len(self.nodes)}'
+                self.keys[key], self.nodes[node] = node, (cls, args, inputs, axis)
+            names[name] = self.keys[key]
+            return names[name]
+        for name in declared: resolve(name)
+        return names
+
+    def specs(self):
+        return {name: (cls(*args), inputs, axis) for name, (cls, args, inputs, axis) in self.nodes.items()}
+
+    def lookback(self, names=None):
+        """Candles of history after which the nodes (all, or those in names) match an unlimited history to within
+        PARITY_TOLERANCE: a node's own warm-up on top of the warm-up of its inputs."""
+        need = {}
+        for name, (cls, args, inputs, _) in self.nodes.items():
+            need[name] = cls(*args).lookback() + max((need.get(x, 0) for x in inputs), default=0)
+        return max((need[n] for n in (need if names is None else names)), default=0)
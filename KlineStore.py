@@ -0,0 +1,93 @@
+import os, shutil
+from threading import Lock
+from Logger import *
+import numpy as np
+
+COLUMNS = ('Date', 'Open', 'High', 'Low', 'Close', 'Volume')  # Date is the candle close time (ms), as in the bots
+TRIM_SLACK = 1.25  # a symbol is trimmed back to `retention` rows once it holds this many times that (trimming rewrites it)
+
+def _rows(directory):
+    try:
+        return min(os.path.getsize(os.path.join(directory, f'{c}.f8')) for c in COLUMNS) // 8
+    except OSError:
+        return 0
+
+def read_columns(directory):
+    """{column: read-only memmap} of one symbol's store directory (see KlineStore); empty arrays if there is none."""
+    n = _rows(directory)
+    if not n: return {c: np.empty(0) for c in COLUMNS}
+    return {c: np.memmap(os.path.join(directory, f'{c}.f8'), dtype='<f8', mode='r', shape=(n,)) for c in COLUMNS}
+
+class KlineStore:
+    """On-disk kline columns per symbol and interval: {root}/{interval}/{symbol}/{column}.f8, raw little-endian float64.
+
+    Rows are closed candles in close-time order with no gaps: append() skips rows it already has and refuses
+    one that does not follow the last stored candle, so a missed candle is re-downloaded on the next start
+    instead of leaving a hole. Reads are memory-mapped. A crash mid-append leaves columns of unequal length;
+    the shortest one wins and the rest is trimmed on the next append. retention: candles kept per symbol (None
+    keeps all); append() drops the oldest ones once a symbol is TRIM_SLACK times over it.
+    """
+    def __init__(self, root, interval, interval_ms, retention=None):
+        self.root, self.interval, self.step = root, interval, interval_ms
+        self.retention = retention
+        self.lock = Lock()
+
+    def _dir(self, symbol): return os.path.join(self.root, self.interval, symbol)
+    def _path(self, symbol, c): return os.path.join(self._dir(symbol), f'{c}.f8')
+
+    def rows(self, symbol): return _rows(self._dir(symbol))
+
+    def read(self, symbol, since=None):
+        """{column: read-only memmap} of the stored candles closing at or after `since` (ms)."""
+        cols = read_columns(self._dir(symbol))
+        k = int(np.searchsorted(cols['Date'], since)) if since is not None else 0
+        return {c: a[k:] for c, a in cols.items()}
+
+    def last_date(self, symbol):
+        n = self.rows(symbol)
+        if not n: return None
+        with open(self._path(symbol, 'Date'), 'rb') as f:
+            f.seek((n - 1) * 8)
+            return float(np.frombuffer(f.read(8), dtype='<f8')[0])
+
+    def append(self, symbol, cols):
+        """Add closed candles {column: sequence}; returns how many were stored."""
+        try:
+            with self.lock:
+                D = np.asarray(cols['Date'], dtype=float)
+                n, last = self.rows(symbol), self.last_date(symbol)
+                k = int(np.searchsorted(D, last, side='right')) if last is not None else 0
+                if k == len(D): return 0
+                if last is not None and D[k] != last + self.step:
+                    log.debug(f'KlineStore.append() - {symbol} gap after {last:.0f}, not stored')
+                    return 0
+                os.makedirs(self._dir(symbol), exist_ok=True)
+                for c in COLUMNS:
+                    with open(self._path(symbol, c), 'ab') as f:
+                        f.truncate(n * 8)
+                        f.write(np.asarray(cols[c][k:], dtype='<f8').tobytes())
+                if self.retention and n + len(D) - k > self.retention * TRIM_SLACK:
+                    self._replace(symbol, {c: np.array(a[-self.retention:]) for c, a in read_columns(self._dir(symbol)).items()})
+                return len(D) - k
+        except Exception as e:
+            log.warning(f'KlineStore.append() - {symbol}, Error: {e}')
+            return 0
+
+    def write(self, symbol, cols):
+        """Replace a symbol's candles, e.g. when a longer history than the stored one was downloaded."""
+        try:
+            with self.lock:
+                self._replace(symbol, {c: cols[c][-self.retention:] if self.retention else cols[c] for c in COLUMNS})
+        except Exception as e:
+            log.warning(f'KlineStore.write() - {symbol}, Error: {e}')
+
+    def _replace(self, symbol, cols):
+        """Swap in new column files through a temporary directory, so a reader never sees a half-written store."""
+        d, tmp, old = self._dir(symbol), self._dir(symbol) + '.tmp', self._dir(symbol) + '.old'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for c in COLUMNS:
+            np.asarray(cols[c], dtype='<f8').tofile(os.path.join(tmp, f'{c}.f8'))
+        if os.path.exists(d): os.replace(d, old)
+        os.replace(tmp, d)
+        shutil.rmtree(old, ignore_errors=True)
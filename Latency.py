@@ -0,0 +1,105 @@
+import os, math, time
+from threading import Thread, Lock
+from Logger import *
+
+BUCKETS_PER_OCTAVE = 4                   # bucket upper bounds grow by 2**(1/4), i.e. ~19% relative error
+MIN_MS, MAX_MS = 0.01, 120_000
+N_BUCKETS = math.ceil(math.log2(MAX_MS / MIN_MS) * BUCKETS_PER_OCTAVE) + 1
+BOUNDS = [MIN_MS * 2 ** (i / BUCKETS_PER_OCTAVE) for i in range(N_BUCKETS)]  # last bucket also takes everything above
+
+class Histogram:
+    """HDR-style histogram over fixed log-spaced buckets: O(1) record, percentiles to within one bucket."""
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count, self.sum, self.max = 0, 0.0, 0.0
+
+    def record(self, ms):
+        i = 0 if ms <= MIN_MS else min(N_BUCKETS - 1, math.ceil(math.log2(ms / MIN_MS) * BUCKETS_PER_OCTAVE - 1e-9))
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += ms
+        if ms > self.max: self.max = ms
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts): self.counts[i] += c
+        self.count += other.count; self.sum += other.sum; self.max = max(self.max, other.max)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.count: return None
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= rank: return min(BOUNDS[i], self.max)
+        return self.max
+
+class LatencyRecorder:
+    """Per-process latency histograms keyed by (stage, symbol, strategy).
+
+    start() writes them every `interval` seconds as a Prometheus text file ({metrics_dir}/latency_{role}.prom, for
+    node_exporter's textfile collector or any scraper reading the file) and logs p50/p99/max per stage.
+    """
+    def __init__(self):
+        self.hist = {}
+        self.lock = Lock()
+        self.role = None
+
+    def record(self, stage, ms, symbol='', strategy=''):
+        key = (stage, symbol, strategy)
+        with self.lock:
+            h = self.hist.get(key)
+            if h is None: h = self.hist[key] = Histogram()
+            h.record(ms)
+
+    def by_stage(self):
+        stages = {}
+        with self.lock:
+            for (stage, _, _), h in self.hist.items():
+                stages.setdefault(stage, Histogram()).merge(h)
+        return stages
+
+    def summary(self):
+        return ' | '.join(f'{stage}: p50 {h.percentile(.5):.2f}ms p99 {h.percentile(.99):.2f}ms max {h.max:.2f}ms (n={h.count})'
+                          for stage, h in sorted(self.by_stage().items()))
+
+    def prometheus(self):
+        lines = ['# HELP bot_latency_ms Hot-path latency from candle close to order acknowledgement, per stage.',
+                 '# TYPE bot_latency_ms histogram']
+        with self.lock:
+            items = [(k, list(h.counts), h.count, h.sum) for k, h in sorted(self.hist.items())]
+        for (stage, symbol, strategy), counts, count, total in items:
+            labels = f'stage="{stage}",symbol="{symbol}",strategy="{strategy}"'
+            seen = 0
+            for bound, c in zip(BOUNDS, counts):
+                if c:  # empty buckets add nothing to a cumulative histogram
+                    seen += c
+                    lines.append(f'bot_latency_ms_bucket{{{labels},le="{bound:.6g}"}} {seen}')
+            lines.append(f'bot_latency_ms_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'bot_latency_ms_sum{{{labels}}} {total:.3f}')
+            lines.append(f'bot_latency_ms_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, metrics_dir):
+        try:
+            os.makedirs(metrics_dir, exist_ok=True)
+            path = os.path.join(metrics_dir, f'latency_{self.role}.prom')
+            with open(path + '.tmp', 'w') as f: f.write(self.prometheus())
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            log.warning(f'LatencyRecorder.write() - {e}')
+
+    def start(self, role, metrics_dir, interval=60):
+        """Export and log periodically; only the first call in a process starts the thread."""
+        if self.role is not None: return
+        self.role = role
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                if not self.hist: continue
+                if metrics_dir: self.write(metrics_dir)
+                log.info(f'Latency [{role}] - {self.summary()}')
+        Thread(target=loop, daemon=True).start()
+
+recorder = LatencyRecorder()
+record = recorder.record
@@ -5,7 +5,7 @@ import asyncio, os, multiprocessing
 from queue import Queue
 from threading import Thread
 from LiveTradingConfig import *
-import SharedHelper
+import SharedHelper, Shards, Latency, Capture
 from Helper import *
 from TradeManager import *
 
@@ -15,6 +15,7 @@ if __name__ == '__main__':
         log.info('BINANCE FUTURES TRADING BOT')
         log.info('='*60)
         log.info(f'Strategy: {trading_strategy}')
+        for x in extra_strategies: log.info(f'Strategy: {x.get("name", x["strategy"])} ({x["strategy"]}, TP/SL: {x.get("TP_SL_choice", TP_SL_choice)})')
         log.info(f'Interval: {interval} | Leverage: {leverage}x | Order Size: {order_size}%')
         log.info('-'*60)
         log.info(f'TP/SL: {TP_SL_choice} | SL: {SL_mult}x | TP: {TP_mult}x')
@@ -23,34 +24,44 @@ if __name__ == '__main__':
         log.info('-'*60)
         symbols_display = ', '.join(symbols_to_trade) if not trade_all_symbols else 'ALL SYMBOLS'
         log.info(f'Symbols: {symbols_display}')
-        log.info(f'Max Positions: {max_number_of_positions} | Multiprocessing: {use_multiprocessing_for_trade_execution}')
+        log.info(f'Max Positions: {max_number_of_positions} | Multiprocessing: {use_multiprocessing_for_trade_execution} | Signal shards: {signal_shards}')
         log.info('='*60)
+        if simulated_venue and (use_multiprocessing_for_trade_execution or signal_shards > 1):
+            log.info('Simulated venue lives in this process: multiprocessing and signal shards disabled')
+            use_multiprocessing_for_trade_execution, signal_shards = False, 1
         if os.name == 'nt': asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-        Q = multiprocessing.Queue if use_multiprocessing_for_trade_execution else Queue
+        Q = multiprocessing.Queue if use_multiprocessing_for_trade_execution or signal_shards > 1 else Queue
         signal_queue, print_trades_q = Q(), Q()
+        Latency.recorder.start('signals', latency_metrics_dir, latency_report_interval)
+        if record_messages_dir: Capture.recorder.start('signals', record_messages_dir)
         
-        log.info('Connecting to Binance API...')
-        python_binance_client = Client(api_key=API_KEY, api_secret=API_SECRET)
+        log.info('Connecting to the simulated venue...' if simulated_venue else 'Connecting to Binance API...')
+        python_binance_client = make_client()
         client = CustomClient(python_binance_client)
         
         if trade_all_symbols: symbols_to_trade = SharedHelper.get_all_symbols(python_binance_client, coin_exclusion_list)
         client.set_leverage(symbols_to_trade)
         Bots = []
-        client.setup_bots(Bots, symbols_to_trade, signal_queue, print_trades_q)
-        client.start_websockets(Bots)
+        if signal_shards <= 1:
+            client.setup_bots(Bots, symbols_to_trade, signal_queue, print_trades_q)
+            client.start_websockets(Bots)
         
         if use_multiprocessing_for_trade_execution:
-            new_trade_loop = multiprocessing.Process(target=start_new_trades_loop_multiprocess, args=(python_binance_client, signal_queue, print_trades_q))
+            new_trade_loop = multiprocessing.Process(target=start_new_trades_loop_multiprocess, args=(python_binance_client, signal_queue, print_trades_q, symbols_to_trade))
             new_trade_loop.start()
         else:
-            TM = TradeManager(python_binance_client, signal_queue, print_trades_q)
+            TM = TradeManager(python_binance_client, signal_queue, print_trades_q, symbols_to_trade)
             new_trade_loop = Thread(target=TM.new_trades_loop, daemon=True)
             new_trade_loop.start()
         
-        Thread(target=client.ping_server_reconnect_sockets, args=(Bots,), daemon=True).start()
         if auto_calculate_buffer:
-            buffer = convert_buffer_to_string(SharedHelper.get_required_buffer(trading_strategy))
-        Thread(target=client.combine_data, args=(Bots, symbols_to_trade, buffer), daemon=True).start()
+            buffer = convert_buffer_to_string(max(SharedHelper.get_required_buffer(s, p) for s, p in
+                                                  [(trading_strategy, strategy_params), *((x['strategy'], x.get('params')) for x in extra_strategies)]))
+        if signal_shards > 1:
+            Shards.start_shards(symbols_to_trade, signal_shards, signal_queue, print_trades_q, buffer)
+        else:
+            Thread(target=client.ping_server_reconnect_sockets, args=(Bots,), daemon=True).start()
+            Thread(target=client.combine_data, args=(Bots, symbols_to_trade, buffer), daemon=True).start()
         
         log.info('Trading bot started successfully')
         new_trade_loop.join()
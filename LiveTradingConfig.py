@@ -10,6 +10,8 @@ order_size = 3            			# % of account
 interval = '1m'
 SL_mult = 1.5             			# SL = SL_mult × TP_SL_choice
 TP_mult = 1               			# TP = TP_mult × TP_SL_choice
+strategy_params = {}      			# Override the strategy's knobs in BotClass.STRATEGY_PARAMS, e.g. {'ema_short': 8} (tune with Optimizer.py)
+extra_strategies = []     			# More strategies on the same bots, candles and indicators, e.g. [{'strategy': 'tripleEMA', 'TP_SL_choice': 'x (ATR)', 'SL_mult': 2, 'TP_mult': 3, 'params': {}}]; unset TP/SL keys as above, 'name' tags its trades. First to fire (trading_strategy, then these) trades the symbol
 
 trade_all_symbols = True
 symbols_to_trade = ['BTCUSDT']
@@ -19,14 +21,34 @@ use_trailing_stop = False
 trailing_stop_callback = 0.1
 trading_threshold = 0.3   			# Cancel if price moved this % from planned entry
 use_market_orders = False
+use_local_order_book = False       # Price entries from streamed best bid/ask (one bookTicker stream per symbol) instead of a REST order book call
+order_book_max_age = 5              # Seconds of socket silence after which the streamed quotes count as stale (REST fallback)
 max_number_of_positions = 10
+signal_max_age = 15       			# Drop entry signals older than this many seconds; only the newest per symbol is kept
+signal_priority = 'oldest' 			# Which pending signal to act on first: 'oldest', 'newest' or a function of the signal (lower first)
+account_reconcile_interval = 30  # Seconds between REST refreshes of the stream-fed account/position cache
 wait_for_candle_close = True        # If False, bot can enter before candle close
 auto_calculate_buffer = True        # If False, set buffer manually
 buffer = '3 hours ago'
+backfill_workers = 8                # Parallel kline requests while downloading history
+backfill_weight_per_minute = 1200   # Request-weight budget for that download, split between signal_shards (Binance futures allows 2400/min per IP)
+exchange_info_ttl = 3600            # Seconds to reuse the on-disk copy of the exchange's symbol metadata (exchange_info.json)
+kline_cache_dir = 'kline_cache'     # Local kline store, so restarts only download the missing candles ('' to disable)
+kline_cache_retention = 3           # Candles kept per symbol in the kline store, as a multiple of the history buffer (0 keeps all)
+
+latency_metrics_dir = 'metrics'     # Hot-path latency histograms as Prometheus text files (latency_<process>.prom) ('' to only log them)
+latency_report_interval = 60        # Seconds between latency exports and p50/p99/max log lines
+record_messages_dir = ''            # Capture raw kline and user-data messages here (e.g. 'captures') for Replay.py ('' to disable)
+
+simulated_venue = False             # Trade against the in-process stand-in exchange in SimVenue.py instead of Binance (no API keys, single process)
+sim_venue_options = {}              # SimVenue settings, e.g. {'latency_ms': 50, 'error_rate': 0.01, 'fill_probability': 0.5, 'n_symbols': 300}
 
 LOG_LEVEL = 20                      # 50 CRITICAL | 40 ERROR | 30 WARNING | 20 INFO | 10 DEBUG
 log_to_file = False                 # Also write logs to file
 
+combined_streams = False            # Opt in to multiplexing kline streams over few websocket connections (default: one socket per symbol)
+streams_per_connection = 50         # Kline streams per multiplexed connection (Binance allows up to 200)
 use_multiprocessing_for_trade_execution = True # Execution mode (set True if many symbols or reconnect issues; otherwise reduce symbols)
+signal_shards = 1                   # >1: spread symbols over this many processes, each with its own bots and sockets
 custom_tp_sl_functions = ['USDT'] 	# TP/SL functions requiring placed-trade context
 make_decision_options = {} 			# Extra decision-making options
@@ -0,0 +1,73 @@
+import time, random, argparse, logging
+from queue import Queue
+from threading import Thread
+from Logger import *
+from LiveTradingConfig import trading_strategy
+import Latency
+from SimVenue import SimVenue
+from TradeManager import TradeManager
+
+STAGES = ('queue_wait', 'order_ack', 'signal_to_ack', 'unprotected')
+
+def make_signal(venue, symbol, direction, pct):
+    """Entry signal as Bot.handle_socket_message queues it, with TP/SL distances of pct% and 1.5 x pct% of the price."""
+    cp, qp, tick = venue.meta[symbol]
+    tp = venue.price[symbol] * pct / 100
+    return [symbol, qp, cp, tick, direction, -1, 1.5 * tp, tp, time.time(), trading_strategy]
+
+def run(n_symbols=300, bursts=5, burst_size=100, burst_interval=2.0, market=False, settle=15.0, pct=0.5, seed=0, **venue_options):
+    """Drive a TradeManager on a SimVenue with `bursts` candle-close bursts of `burst_size` signals over n_symbols,
+    then wait up to `settle` seconds for the entries to be protected. Returns a report dict."""
+    symbols = [f'SIM{i:03d}USDT' for i in range(n_symbols)]
+    venue = SimVenue(symbols, seed=seed, **venue_options)
+    signal_q, print_trades_q = Queue(), Queue()
+    tm = TradeManager(venue.client(), signal_q, print_trades_q, symbols)
+    tm.max_number_of_positions, tm.use_market_orders = n_symbols, market
+    Thread(target=tm.new_trades_loop, daemon=True).start()
+
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(bursts):
+        for sym in rng.sample(symbols, min(burst_size, n_symbols)):
+            signal_q.put(make_signal(venue, sym, rng.randint(0, 1), pct))
+        time.sleep(burst_interval)
+    deadline = time.monotonic() + settle
+    while time.monotonic() < deadline:
+        filled = [t for t in tm.active_trades if t.filled_at is not None]
+        if not tm.signals.metrics()['depth'] and signal_q.empty() and all(t.unprotected_ms is not None for t in filled): break
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    trades = list(tm.active_trades)
+    stages = Latency.recorder.by_stage()
+    return {'symbols': n_symbols, 'signals': bursts * min(burst_size, n_symbols), 'seconds': round(elapsed, 2),
+            'orders': venue.stats['orders'], 'orders_per_sec': round(venue.stats['orders'] / elapsed, 1),
+            'fills': venue.stats['fills'], 'rejects': venue.stats['rejects'], 'injected_errors': venue.stats['injected_errors'],
+            'trades': len(trades), 'filled': sum(t.filled_at is not None for t in trades),
+            'protected': sum(t.trade_status == 1 for t in trades),
+            'rest_calls': dict(venue.calls), 'scheduler': tm.signals.metrics(),
+            'latency_ms': {s: {'p50': round(h.percentile(.5), 2), 'p99': round(h.percentile(.99), 2), 'max': round(h.max, 2), 'n': h.count}
+                           for s, h in stages.items() if s in STAGES}}
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Load-test TradeManager (signal scheduling, entries, fills, TP/SL) against the simulated venue.')
+    p.add_argument('--symbols', type=int, default=300)
+    p.add_argument('--bursts', type=int, default=5)
+    p.add_argument('--burst-size', type=int, default=100, help='signals per burst (one candle close)')
+    p.add_argument('--burst-interval', type=float, default=2.0, help='seconds between bursts')
+    p.add_argument('--market', action='store_true', help='market entries instead of limit entries')
+    p.add_argument('--settle', type=float, default=15.0, help='seconds to wait for entries to fill and be protected')
+    p.add_argument('--latency-ms', type=float, default=20.0, help='venue REST latency')
+    p.add_argument('--jitter-ms', type=float, default=5.0)
+    p.add_argument('--error-rate', type=float, default=0.0, help='fraction of REST calls that fail')
+    p.add_argument('--fill-probability', type=float, default=1.0, help='chance per tick that a crossed limit order fills')
+    p.add_argument('--verbose', action='store_true', help="keep TradeManager's INFO logging")
+    a = p.parse_args()
+    if not a.verbose: log.setLevel(logging.WARNING)
+    report = run(a.symbols, a.bursts, a.burst_size, a.burst_interval, a.market, a.settle, latency_ms=a.latency_ms,
+                 jitter_ms=a.jitter_ms, error_rate=a.error_rate, fill_probability=a.fill_probability)
+    log.setLevel(logging.INFO)
+    log.info('LoadTest - ' + ' | '.join(f'{k}: {v}' for k, v in report.items() if k not in ('latency_ms', 'rest_calls', 'scheduler')))
+    log.info(f'LoadTest - REST calls: {report["rest_calls"]}')
+    log.info(f'LoadTest - scheduler: {report["scheduler"]}')
+    for stage, v in report['latency_ms'].items(): log.info(f'LoadTest - {stage}: {v}')
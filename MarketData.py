@@ -0,0 +1,64 @@
+import time
+from Logger import *
+
+class PriceCache:
+    """Latest mark price per symbol, fed by the all-market mark price stream (!markPrice@arr@1s).
+
+    One socket covers every symbol, so readers never poll REST per symbol; on_update() is called on the socket
+    thread after each message and must stay cheap. Ages are measured on the local monotonic clock at receipt.
+    """
+    def __init__(self, on_update=None):
+        self.prices = {}  # symbol -> (mark price, time.monotonic() at receipt)
+        self.on_update = on_update
+
+    def on_message(self, msg):
+        if isinstance(msg, dict):
+            if msg.get('e') == 'error':
+                log.warning(f'PriceCache - mark price stream error: {msg.get("m")}')
+                return
+            msg = msg.get('data', [msg])
+        now = time.monotonic()
+        for x in msg:
+            self.prices[x['s']] = (float(x['p']), now)
+        if self.on_update: self.on_update()
+
+    def get(self, symbol, max_age=None):
+        """Mark price, or None if unknown or older than max_age seconds."""
+        px = self.prices.get(symbol)
+        if px is None or (max_age is not None and time.monotonic() - px[1] > max_age): return None
+        return px[0]
+
+class BookTicker:
+    """Best bid/ask per symbol from <symbol>@bookTicker streams, multiplexed streams_per_connection to a socket.
+
+    Binance pushes bookTicker on every top-of-book change, so while a symbol's socket keeps delivering messages its
+    last quote is current even if the symbol itself is quiet: top() judges freshness by the connection, not the
+    symbol. An error from a socket drops its quotes, so readers fall back to REST until the stream resyncs them.
+    """
+    def __init__(self):
+        self.book = {}   # symbol -> (bid, ask, update id, connection)
+        self.alive = {}  # connection -> time.monotonic() of its last message
+
+    def start(self, twm, symbols, per_connection):
+        for k in range(0, len(symbols), per_connection):
+            conn = k // per_connection
+            twm.start_futures_multiplex_socket(callback=lambda msg, conn=conn: self.on_message(conn, msg),
+                                               streams=[f'{s.lower()}@bookTicker' for s in symbols[k:k + per_connection]])
+
+    def on_message(self, conn, msg):
+        if msg.get('e') == 'error':
+            log.warning(f'BookTicker - connection {conn} error, dropping its quotes: {msg.get("m")}')
+            self.alive.pop(conn, None)
+            for sym in [s for s, x in self.book.items() if x[3] == conn]: self.book.pop(sym, None)
+            return
+        d = msg.get('data', msg)
+        self.alive[conn] = time.monotonic()
+        cur = self.book.get(d['s'])
+        if cur is not None and d['u'] < cur[2]: return  # out of order
+        self.book[d['s']] = (float(d['b']), float(d['a']), d['u'], conn)
+
+    def top(self, symbol, max_age):
+        """(best bid, best ask), or None if unknown or its socket has been silent for more than max_age seconds."""
+        x = self.book.get(symbol)
+        if x is None or time.monotonic() - self.alive.get(x[3], 0) > max_age: return None
+        return x[0], x[1]
@@ -0,0 +1,152 @@
+import os, json, time, itertools, tempfile, argparse
+from functools import lru_cache
+from Logger import *
+import numpy as np, pandas as pd
+from joblib import Parallel, delayed
+import BotClass, Backtester
+from LiveTradingConfig import trading_strategy, TP_SL_choice, SL_mult, TP_mult
+
+TP_SL_PARAMS = ('TP_SL_choice', 'SL_mult', 'TP_mult')  # only change the exits, so they reuse a task's signals
+SIGNAL_PARAMS = ('short_th', 'long_th')               # only change strategy_signal(), so they reuse a task's indicators
+COLUMNS = tuple(Backtester.KLINE_COLUMNS)
+
+def share_klines(klines, workdir):
+    """Write {symbol: kline dict} once as .npy files that workers memory-map read-only; returns {symbol: path}."""
+    paths = {}
+    for symbol, k in klines.items():
+        paths[symbol] = os.path.join(workdir, f'{symbol}.npy')
+        np.save(paths[symbol], np.vstack([np.asarray(k[c], dtype=float) for c in COLUMNS]))
+    return paths
+
+@lru_cache(maxsize=None)
+def _shared(path):
+    """Per worker process: the shared kline array, mapped once and backed by the OS page cache."""
+    return np.load(path, mmap_mode='r')
+
+def _window_bot(path, lo, hi, strategy, TP_SL_choice, params):
+    k = _shared(path)
+    c = {name: k[i, lo:hi] for i, name in enumerate(COLUMNS)}
+    return BotClass.Bot(os.path.basename(path)[:-4], c['Open'], c['Close'], c['High'], c['Low'], c['Volume'], c['Date'],
+                        0, 0, 1, 0, strategy, TP_SL_choice, 1, 1, backtesting=1, params=params)
+
+@lru_cache(maxsize=4)
+def _levels_bot(path, lo, hi, TP_SL_choice):
+    """Per worker process: a strategy-less Bot holding only the TP/SL streams of a window, shared by every parameter set on it."""
+    return _window_bot(path, lo, hi, '', TP_SL_choice, None)
+
+def _run_task(path, symbol, lo, start, hi, strategy, indicator_params, combos, fee, vectorised):
+    """All combos that share one indicator set: indicators once, signals once per signal-param set, one simulation per combo."""
+    bot = _window_bot(path, lo, hi, strategy, '%', indicator_params)
+    D = bot.Date
+    rows, signals = [], {}
+    for combo in combos:
+        sig = tuple((k, combo[k]) for k in SIGNAL_PARAMS if k in combo)
+        if sig not in signals:
+            bot.params = BotClass.params_for(strategy, {**indicator_params, **dict(sig)})
+            signals[sig] = Backtester.strategy_signals(bot, start - lo, vectorised)
+        lb = _levels_bot(path, lo, hi, combo['TP_SL_choice'])
+        lb.SL_mult, lb.TP_mult = combo['SL_mult'], combo['TP_mult']
+        lb.update_TP_SL()
+        summary = Backtester.summarise(Backtester.simulate_trades(lb, signals[sig], fee))
+        rows.append({'symbol': symbol, 'window_start': int(D[start - lo]), 'window_end': int(D[-1]),
+                     **indicator_params, **combo, **summary})
+    return rows
+
+def _split_grid(strategy, grid):
+    """grid {param: [values]} -> (indicator param sets, combos of TP/SL and signal params run against each)."""
+    unknown = set(grid) - set(TP_SL_PARAMS) - set(BotClass.STRATEGY_PARAMS.get(strategy, {}))
+    if unknown: raise ValueError(f'Optimizer - {strategy} has no parameters {sorted(unknown)}')
+    grid = {'TP_SL_choice': [TP_SL_choice], 'SL_mult': [SL_mult], 'TP_mult': [TP_mult], **grid}
+    product = lambda keys: [dict(zip(keys, v)) for v in itertools.product(*(grid[k] for k in keys))]
+    inner = [k for k in grid if k in TP_SL_PARAMS or k in SIGNAL_PARAMS]
+    return product([k for k in grid if k not in inner]), product(inner)
+
+def _run(tasks, n_jobs):
+    """Spread tasks over a process pool; results come back flattened in task order."""
+    t0 = time.perf_counter()
+    out = Parallel(n_jobs=n_jobs, backend='loky', batch_size=1)(delayed(_run_task)(*t) for t in tasks)
+    log.info(f'Optimizer - {len(tasks)} tasks on {n_jobs} workers took {time.perf_counter() - t0:.1f}s')
+    return [row for rows in out for row in rows]
+
+def _rank(rows, metric, min_trades):
+    df = pd.DataFrame(rows)
+    if df.empty: return df
+    df = df[df['trades'] >= min_trades].sort_values(metric, ascending=False, kind='stable').reset_index(drop=True)
+    df.insert(0, 'rank', df.index + 1)
+    return df
+
+def sweep(klines, grid, strategy=trading_strategy, windows=None, warmup=300, fee=0.0, n_jobs=-1, vectorised=True,
+          metric='total_return_%', min_trades=1, out=None, workdir=None):
+    """Backtest every grid point on every symbol and window; returns the results ranked by metric (and writes them to out).
+
+    klines: {symbol: kline dict} (see Backtester.load_klines); grid: {param: [values]} over TP_SL_PARAMS and the
+    strategy's STRATEGY_PARAMS keys; windows: [(start, end)] bar ranges, default the whole history. Each window is
+    preceded by `warmup` bars of indicator history.
+    """
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        paths = share_klines(klines, tmp)
+        indicator_sets, combos = _split_grid(strategy, grid)
+        tasks = []
+        for symbol, path in paths.items():
+            n = len(klines[symbol]['Close'])
+            for start, end in windows or [(warmup, n)]:
+                lo = max(0, start - warmup)
+                tasks += [(path, symbol, lo, start, min(end, n), strategy, p, combos, fee, vectorised) for p in indicator_sets]
+        results = _rank(_run(tasks, n_jobs), metric, min_trades)
+    if out: results.to_csv(out, index=False)
+    return results
+
+def walk_forward_windows(n, train, test, warmup=300):
+    """[((train_start, train_end), (test_start, test_end))] rolling forward by `test` bars."""
+    folds, s = [], warmup
+    while s + train + test <= n:
+        folds.append(((s, s + train), (s + train, s + train + test)))
+        s += test
+    return folds
+
+def walk_forward(klines, grid, train, test, strategy=trading_strategy, warmup=300, fee=0.0, n_jobs=-1, vectorised=True,
+                 metric='total_return_%', min_trades=1, out=None, workdir=None):
+    """Pick the best grid point on each training fold and backtest it on the following test fold (out of sample)."""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        paths = share_klines(klines, tmp)
+        indicator_sets, combos = _split_grid(strategy, grid)
+        folds = {s: walk_forward_windows(len(klines[s]['Close']), train, test, warmup) for s in paths}
+        tasks = [(paths[s], s, tr[0] - warmup, tr[0], tr[1], strategy, p, combos, fee, vectorised)
+                 for s in paths for tr, _ in folds[s] for p in indicator_sets]
+        in_sample = _rank(_run(tasks, n_jobs), metric, min_trades)
+        best, tasks = [], []
+        for s in paths:
+            for fold, (tr, te) in enumerate(folds[s]):
+                ranked = in_sample[(in_sample['symbol'] == s) & (in_sample['window_start'] == int(klines[s]['Date'][tr[0]]))]
+                if ranked.empty: continue
+                row = ranked.iloc[0]
+                ind = {k: row[k] for k in grid if k not in TP_SL_PARAMS and k not in SIGNAL_PARAMS}
+                combo = {k: row[k] for k in ('TP_SL_choice', 'SL_mult', 'TP_mult') + SIGNAL_PARAMS if k in row}
+                best.append({'fold': fold, 'in_sample_' + metric: row[metric]})
+                tasks.append((paths[s], s, te[0] - warmup, te[0], te[1], strategy, ind, [combo], fee, vectorised))
+        rows = _run(tasks, n_jobs)
+    results = pd.DataFrame([{**b, **r} for b, r in zip(best, rows)])
+    if out: results.to_csv(out, index=False)
+    return results
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Parallel parameter sweep / walk-forward optimisation over local Binance kline files.')
+    p.add_argument('paths', nargs='+', help='SYMBOL=path per symbol (kline file, directory or glob, see Backtester.load_klines)')
+    p.add_argument('--grid', required=True, help='JSON {param: [values]}, e.g. \'{"SL_mult": [1, 1.5], "ema_short": [5, 8]}\'')
+    p.add_argument('--strategy', default=trading_strategy)
+    p.add_argument('--train', type=int, default=0, help='walk-forward training bars (0: plain sweep over the whole history)')
+    p.add_argument('--test', type=int, default=0, help='walk-forward test bars')
+    p.add_argument('--warmup', type=int, default=300)
+    p.add_argument('--fee', type=float, default=0.0, help='fee per side as a fraction, e.g. 0.0004')
+    p.add_argument('--jobs', type=int, default=-1)
+    p.add_argument('--metric', default='total_return_%')
+    p.add_argument('--min-trades', type=int, default=1)
+    p.add_argument('--out', default='optimizer_results.csv')
+    a = p.parse_args()
+    klines = {s: Backtester.load_klines(path) for s, path in (x.split('=', 1) for x in a.paths)}
+    kw = dict(strategy=a.strategy, warmup=a.warmup, fee=a.fee, n_jobs=a.jobs, metric=a.metric, min_trades=a.min_trades, out=a.out)
+    if a.train:
+        results = walk_forward(klines, json.loads(a.grid), a.train, a.test, **kw)
+    else:
+        results = sweep(klines, json.loads(a.grid), **kw)
+    log.info(f'Optimizer - results written to {a.out}\n{results.head(20).to_string()}')
@@ -0,0 +1,83 @@
+import sys, time, json, argparse
+from Logger import *
+import numpy as np
+import BotClass, Capture
+from AccountState import AccountState
+
+class _Signals(list):
+    """Stands in for signal_queue: keeps what the bots put."""
+    put = list.append
+
+class _Discard:
+    def put(self, _): pass
+
+def replay(paths, speed=None, strategy=None, params=None, on_user=None):
+    """Feed a capture (see Capture.MessageRecorder) back through the live code path, in recorded order.
+
+    'bot' records build the Bots as setup_bots() did, 'hist' records add_hist() them, kline events go to
+    Bot.handle_socket_message and user-data events to on_user (e.g. AccountState.apply). speed: None for as fast as
+    possible, 1.0 for the original timing, 10.0 for ten times faster. strategy/params: run a different strategy over
+    the recorded market. Returns {'signals': [...], 'bots': {symbol: Bot}, 'stats': {...}}.
+    """
+    bots, signals, out, sink = {}, _Signals(), [], _Discard()
+    handle_us, counts = [], {'bot': 0, 'hist': 0, 'kline': 0, 'user': 0}
+    t_first = start = None
+    for t, kind, msg in Capture.read(paths):
+        if t_first is None: t_first, start = t, time.perf_counter()
+        if speed:
+            wait = (t - t_first) / speed - (time.perf_counter() - start)
+            if wait > 0: time.sleep(wait)
+        counts[kind] = counts.get(kind, 0) + 1
+        if kind == 'bot':
+            bots[msg['symbol']] = BotClass.Bot(symbol=msg['symbol'], Open=[], Close=[], High=[], Low=[], Volume=[], Date=[],
+                                               OP=msg['OP'], CP=msg['CP'], index=msg['index'], tick=msg['tick'],
+                                               strategy=strategy or msg['strategy'], TP_SL_choice=msg['TP_SL_choice'],
+                                               SL_mult=msg['SL_mult'], TP_mult=msg['TP_mult'], signal_queue=signals, print_trades_q=sink,
+                                               params=params if strategy else msg['params'], strategies=None if strategy else msg.get('strategies'))
+        elif kind == 'hist' and msg['s'] in bots:
+            bots[msg['s']].add_hist(*(msg[c] for c in ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')))
+        elif kind == 'kline':
+            b = bots.get(msg.get('s')) if isinstance(msg, dict) else None
+            if b is None: continue
+            n = len(signals)
+            t0 = time.perf_counter()
+            b.handle_socket_message(msg)
+            handle_us.append((time.perf_counter() - t0) * 1e6)
+            for s in signals[n:]:
+                out.append({'time': int(msg['k']['T']), 'symbol': s[0], 'strategy': s[9], 'direction': int(s[4]), 'sl': float(s[6]), 'tp': float(s[7])})
+        elif kind == 'user' and on_user is not None:
+            on_user(msg)
+    wall = time.perf_counter() - start if start is not None else 0.0
+    us = np.array(handle_us) if handle_us else np.zeros(1)
+    stats = {**{f'{k}_messages': v for k, v in counts.items()}, 'signals': len(out), 'seconds': round(wall, 3),
+             'kline_msgs_per_sec': round(float(len(handle_us) / (us.sum() / 1e6)), 1) if handle_us else None,
+             'handle_p50_us': round(float(np.percentile(us, 50)), 1), 'handle_p99_us': round(float(np.percentile(us, 99)), 1)}
+    return {'signals': out, 'bots': bots, 'stats': stats}
+
+def diff(signals, expected):
+    """Signals that are not in both lists (matched on candle time, symbol, strategy and direction; SL/TP to 1e-9 relative)."""
+    key = lambda s: (s['time'], s['symbol'], s.get('strategy', ''), s['direction'])
+    a, b = {key(s): s for s in signals}, {key(s): s for s in expected}
+    changed = [k for k in a.keys() & b.keys() if not np.allclose([a[k]['sl'], a[k]['tp']], [b[k]['sl'], b[k]['tp']], rtol=1e-9)]
+    return {'missing': sorted(b.keys() - a.keys()), 'extra': sorted(a.keys() - b.keys()), 'changed': sorted(changed)}
+
+if __name__ == '__main__':
+    p = argparse.ArgumentParser(description='Replay captured websocket messages (record_messages_dir) through the Bots.')
+    p.add_argument('paths', nargs='+', help='capture files, directories or globs')
+    p.add_argument('--speed', type=float, help='1 for the original timing, 10 for ten times faster (default: as fast as possible)')
+    p.add_argument('--strategy', help='run this strategy instead of the recorded one')
+    p.add_argument('--out', help='write the signals to this JSON file')
+    p.add_argument('--expect', help='signals of an earlier --out run; exit 1 if they differ')
+    a = p.parse_args()
+    account = AccountState(None)
+    r = replay(a.paths, a.speed, a.strategy, on_user=account.apply)
+    log.info(f'Replay - {r["stats"]}')
+    if account.positions: log.info(f'Replay - positions at the end of the capture: {account.open_positions()}')
+    if a.out:
+        with open(a.out, 'w') as f: json.dump(r['signals'], f, indent=1)
+    if a.expect:
+        with open(a.expect) as f: d = diff(r['signals'], json.load(f))
+        if any(d.values()):
+            log.error(f'Replay - signals differ from {a.expect}: ' + ', '.join(f'{k}: {v[:10]}' for k, v in d.items() if v))
+            sys.exit(1)
+        log.info(f'Replay - signals match {a.expect}')
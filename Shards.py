@@ -0,0 +1,86 @@
+import os, json, time, heapq, statistics, multiprocessing
+from threading import Thread
+from Logger import *
+from Helper import CustomClient, make_client
+from LiveTradingConfig import latency_metrics_dir, latency_report_interval, record_messages_dir, backfill_weight_per_minute
+import Latency, Capture
+
+SHARD_COSTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shard_costs.json')  # {symbol: seconds per decision}
+REPORT_INTERVAL = 60
+
+def load_costs():
+    try:
+        with open(SHARD_COSTS) as f: return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_costs(costs):
+    try:
+        tmp = SHARD_COSTS + '.tmp'
+        with open(tmp, 'w') as f: json.dump(costs, f, indent=1, sort_keys=True)
+        os.replace(tmp, SHARD_COSTS)
+    except OSError as e:
+        log.warning(f'save_costs() - could not write {SHARD_COSTS}, Error: {e}')
+
+def balance(symbols, n, costs=None):
+    """Split symbols into n shards of similar total cost: heaviest symbol first onto the lightest shard.
+    Symbols without a measured cost count as the median one, so a first run splits by count."""
+    costs = costs or {}
+    default = statistics.median(costs.values()) if costs else 1.0
+    heap = [(0.0, k, []) for k in range(n)]
+    for sym in sorted(symbols, key=lambda s: -costs.get(s, default)):
+        load, k, shard = heapq.heappop(heap)
+        shard.append(sym)
+        heapq.heappush(heap, (load + costs.get(sym, default), k, shard))
+    return [shard for _, _, shard in sorted(heap, key=lambda x: x[1])]
+
+def run_shard(shard, symbols, index_of, signal_queue, print_trades_q, stats_q, buffer, weight_per_minute):
+    """Worker process: own Bots, sockets and history download for a subset of symbols, feeding the shared queues.
+    weight_per_minute: its share of backfill_weight_per_minute, as all shards download from the same IP."""
+    try:
+        Latency.recorder.start(f'shard{shard}', latency_metrics_dir, latency_report_interval)
+        if record_messages_dir: Capture.recorder.start(f'shard{shard}', record_messages_dir)
+        client = CustomClient(make_client(), weight_per_minute)
+        bots = []
+        client.setup_bots(bots, symbols, signal_queue, print_trades_q, index_of)
+        client.start_websockets(bots)
+        Thread(target=client.ping_server_reconnect_sockets, args=(bots,), daemon=True).start()
+        Thread(target=client.combine_data, args=(bots, symbols, buffer), daemon=True).start()
+        log.info(f'run_shard() - shard {shard}: {len(bots)} symbols')
+        while True:
+            time.sleep(REPORT_INTERVAL)
+            live = [b for b in list(bots) if b.add_hist_complete and b.decision_seconds]
+            if live:
+                stats_q.put((shard, {b.symbol: (b.decision_seconds, b.decision_latency_ms) for b in live}))
+    except Exception as e:
+        log.error(f'run_shard() - shard {shard} stopped, Error: {e}')
+
+def collect_stats(stats_q, costs):
+    """Log per-shard latency from the shard reports and keep a running per-symbol cost for the next balance()."""
+    last_save = time.monotonic()
+    while True:
+        shard, stats = stats_q.get()
+        latency = [x[1] for x in stats.values()]
+        log.info(f'Shard {shard}: {len(stats)} symbols, candle close -> decision p50 {statistics.median(latency):.0f}ms, '
+                 f'max {max(latency):.0f}ms, {sum(x[0] for x in stats.values()) * 1000:.0f}ms of decisions per candle')
+        for sym, (seconds, _) in stats.items():
+            costs[sym] = .8 * costs[sym] + .2 * seconds if sym in costs else seconds
+        if time.monotonic() - last_save > 10 * REPORT_INTERVAL:
+            save_costs(costs)
+            last_save = time.monotonic()
+
+def start_shards(symbols, n, signal_queue, print_trades_q, buffer):
+    """Spread symbols over n processes (balanced by the costs measured on earlier runs); returns the processes."""
+    costs = load_costs()
+    index_of = {sym: i for i, sym in enumerate(symbols)}
+    stats_q = multiprocessing.Queue()
+    procs = []
+    shards = [(k, shard) for k, shard in enumerate(balance(symbols, n, costs)) if shard]
+    weight = backfill_weight_per_minute / max(1, len(shards))
+    for k, shard in shards:
+        p = multiprocessing.Process(target=run_shard, args=(k, shard, index_of, signal_queue, print_trades_q, stats_q, buffer, weight), daemon=True)
+        p.start()
+        procs.append(p)
+    Thread(target=collect_stats, args=(stats_q, costs), daemon=True).start()
+    log.info(f'start_shards() - {len(symbols)} symbols on {len(procs)} processes')
+    return procs
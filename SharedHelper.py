@@ -1,12 +1,42 @@
-import os, sys
+import os, sys, json, time
 from Logger import *
 import numpy as np 
-import BotClass
+import BotClass, Indicators
+from LiveTradingConfig import exchange_info_ttl
+
+BUFFER_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buffer_cache.json')  # {strategy + indicator params: candles}
+BUFFER_CACHE_VERSION = 1  # bump when indicator warm-up behaviour changes
+EXCHANGE_INFO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exchange_info.json')  # {fetched, symbols}
+_exchange_info = {}  # this process's copy of EXCHANGE_INFO_CACHE
+
+def get_exchange_info(client, ttl=exchange_info_ttl):
+    """{symbol: (status, pricePrecision, quantityPrecision, tickSize)} from futures_exchange_info(), which is only
+    called when the copy in memory or on disk is older than ttl seconds."""
+    global _exchange_info
+    tick = lambda x: float(next(f['tickSize'] for f in x['filters'] if f['filterType'] == 'PRICE_FILTER'))
+    parse = lambda info: {x['symbol']: (x['status'], int(x['pricePrecision']), int(x['quantityPrecision']), tick(x)) for x in info}
+    if getattr(client, 'simulated', False):  # SimVenue symbols stay out of the exchange's cache
+        return parse(client.futures_exchange_info()['symbols'])
+    if not _exchange_info:
+        try:
+            with open(EXCHANGE_INFO_CACHE) as f: _exchange_info = json.load(f)
+        except (OSError, ValueError):
+            pass
+    if _exchange_info and time.time() - _exchange_info['fetched'] < ttl:
+        return {s: tuple(v) for s, v in _exchange_info['symbols'].items()}
+    _exchange_info = {'fetched': time.time(), 'symbols': parse(client.futures_exchange_info()['symbols'])}
+    try:
+        tmp = EXCHANGE_INFO_CACHE + '.tmp'
+        with open(tmp, 'w') as f: json.dump(_exchange_info, f)
+        os.replace(tmp, EXCHANGE_INFO_CACHE)
+    except OSError as e:
+        log.warning(f'get_exchange_info() - could not write {EXCHANGE_INFO_CACHE}, Error: {e}')
+    return dict(_exchange_info['symbols'])
 
 def get_all_symbols(client, coin_exclusion_list):
     """Return tradable USDT symbols excluding those in the exclusion list."""
-    return [s['symbol'] for s in client.futures_exchange_info()['symbols']
-            if s['status'] == 'TRADING' and 'USDT' in s['symbol'] and '_' not in s['symbol'] and s['symbol'] not in coin_exclusion_list]
+    return [s for s, (status, *_) in get_exchange_info(client).items()
+            if status == 'TRADING' and 'USDT' in s and '_' not in s and s not in coin_exclusion_list]
 
 def compare_indicators(keys, ind_buf, ind_act):
     """Compare indicator sets to estimate required buffer size."""
@@ -14,7 +44,7 @@ def compare_indicators(keys, ind_buf, ind_act):
         errs = []
         for k in keys:
             vb, va = ind_buf[k]['values'], ind_act[k]['values']
-            if isinstance(vb, list):
+            if isinstance(vb, (list, np.ndarray)):
                 pairs = zip(va[-30:], vb[-30:])
                 def sr(a, b): return (a - b) / a if a else 0
                 errs.append(abs(sum(sr(a, b) for a, b in pairs)))
@@ -27,23 +57,72 @@ def compare_indicators(keys, ind_buf, ind_act):
         fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
         log.warning(f"compare_indicators() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
 
-def get_required_buffer(trading_strategy):
-    """Calculate the minimal candle buffer ensuring indicator parity with live data."""
-    log.info('get_required_buffer() - Calculating required buffer...')
-    rng = np.random.default_rng(123)
-    o = rng.uniform(2, 100, 20000)
-    c = rng.uniform(2, 100, 20000)
-    h = rng.uniform(2, 100, 20000)
-    l = rng.uniform(2, 100, 20000)
-    v = rng.uniform(2, 100_000_000, 20000)
-    actual = BotClass.Bot('actual_values_bot', o, c, h, l, v, [], 3, 4, 0, 1, trading_strategy, '%', 1, 1, 1)
-    for i in range(30, 20000):
+def _load_buffer_cache():
+    try:
+        with open(BUFFER_CACHE) as f: cache = json.load(f)
+        return cache['buffers'] if cache.get('version') == BUFFER_CACHE_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def _save_buffer_cache(buffers):
+    try:
+        tmp = BUFFER_CACHE + '.tmp'
+        with open(tmp, 'w') as f: json.dump({'version': BUFFER_CACHE_VERSION, 'buffers': buffers}, f, indent=1, sort_keys=True)
+        os.replace(tmp, BUFFER_CACHE)
+    except OSError as e:
+        log.warning(f'measure_required_buffer() - could not write {BUFFER_CACHE}, Error: {e}')
+
+def random_ohlcv(n, seed=123):
+    """Seeded uniform random candles {Open, High, Low, Close, Volume}; indicator values only need to be reproducible."""
+    rng = np.random.default_rng(seed)
+    o, c, h, l = (rng.uniform(2, 100, n) for _ in range(4))
+    return {"Open": o, "High": h, "Low": l, "Close": c, "Volume": rng.uniform(2, 100_000_000, n)}
+
+def get_required_buffer(trading_strategy, params=None):
+    """Candles of history the strategy needs, from its declaration in TradingStrats (BotClass.required_buffer): the
+    warm-up after which its indicators match a long history to within Indicators.PARITY_TOLERANCE, plus the
+    candles the strategy reads back."""
+    n = BotClass.required_buffer(trading_strategy, params)
+    log.info(f'get_required_buffer() - {n} candles')
+    return n
+
+def measure_required_buffer(trading_strategy, params=None):
+    """Empirical check of a declared buffer: the first size within 1e-5 of a 20,000 candle history.
+
+    Each try only seeds the strategy's indicators, and results are cached in BUFFER_CACHE per strategy and
+    indicator parameters, so the scan runs once per configuration. Should not exceed get_required_buffer().
+    """
+    params = BotClass.params_for(trading_strategy, params)
+    key = f'{trading_strategy} {json.dumps(params, sort_keys=True)}'
+    buffers = _load_buffer_cache()
+    if key in buffers:
+        log.info(f'measure_required_buffer() - {buffers[key]} candles (cached)')
+        return buffers[key]
+    log.info('measure_required_buffer() - Calculating required buffer...')
+    n = 20000
+    series = random_ohlcv(n)
+    o, h, l, c, v = (series[k] for k in ('Open', 'High', 'Low', 'Close', 'Volume'))
+    actual = BotClass.Bot('actual_values_bot', o, c, h, l, v, [], 3, 4, 0, 1, trading_strategy, '%', 1, 1, 1, params=params)
+
+    def matches(i):
         try:
-            buf_bot = BotClass.Bot('buffer_bot', o[-i:], c[-i:], h[-i:], l[-i:], v[-i:], [], 3, 4, 0, 1, trading_strategy, '%', 1, 1, 1)
-            err = compare_indicators(buf_bot.indicators.keys(), buf_bot.indicators, actual.indicators)
+            engine = Indicators.IndicatorEngine(actual._indicator_graph().specs())
+            engine.seed({k: a[-i:] for k, a in series.items()})
+            err = compare_indicators(engine.indicators.keys(), engine.indicators, actual.engine.indicators)
             log.debug(f'Error {err} with buffer {i} candles')
-            if err < 1e-5: return i
+            return err is not None and err < 1e-5
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.warning(f"get_required_buffer() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            log.warning(f"measure_required_buffer() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}")
+            return False
+
+    hi = 30
+    if actual.indicators:
+        # Sizes whose last 30 values still hold warm-up NaNs can never pass, so the scan starts after them.
+        warmup = max(int(np.isnan(x['values']).argmin()) for x in actual.indicators.values())
+        hi = next((i for i in range(max(30, warmup + 30), n) if matches(i)), n)
+    buffers[key] = hi
+    _save_buffer_cache(buffers)
+    log.info(f'measure_required_buffer() - {hi} candles')
+    return hi
@@ -0,0 +1,69 @@
+import time
+from collections import deque
+from threading import Thread, Condition
+from Logger import *
+
+# signal_queue items: [symbol, OP, CP, tick_size, direction, bot index, sl, tp, time.time() at generation, strategy name]
+PRIORITIES = {  # lower value is served first
+    'oldest': lambda s: s[8],   # closest to going stale first
+    'newest': lambda s: -s[8],
+}
+REPORT_INTERVAL = 60
+
+class SignalScheduler:
+    """Sits between signal_queue and new_trades_loop: newest signal per symbol, stale ones dropped, best first.
+
+    A pump thread drains the (thread or process) queue into one slot per symbol, so a burst at candle close
+    collapses to one pending signal per symbol and a newer signal replaces the one still waiting. get() serves
+    the pending signal with the lowest priority(signal), dropping any older than max_age seconds.
+    """
+    def __init__(self, source, max_age=15, priority='oldest'):
+        self.source, self.max_age = source, max_age
+        self.priority = PRIORITIES[priority] if isinstance(priority, str) else priority
+        self.pending = {}  # symbol -> signal
+        self.cond = Condition()
+        self.received = self.replaced = self.stale = self.served = 0
+        self.waits = deque(maxlen=1000)  # seconds from generation to get() of the recent signals served
+        Thread(target=self._pump, daemon=True).start()
+        Thread(target=self._report, daemon=True).start()
+
+    def _pump(self):
+        while True:
+            s = self.source.get()
+            with self.cond:
+                self.received += 1
+                if s[0] in self.pending: self.replaced += 1
+                self.pending[s[0]] = s
+                self.cond.notify()
+
+    def get(self):
+        """Block until a fresh signal is pending and return the best one."""
+        with self.cond:
+            while True:
+                now = time.time()
+                for sym in [k for k, s in self.pending.items() if now - s[8] > self.max_age]:
+                    log.info(f'SignalScheduler - dropped {sym} signal, {now - self.pending[sym][8]:.1f}s old')
+                    del self.pending[sym]
+                    self.stale += 1
+                if self.pending:
+                    s = self.pending.pop(min(self.pending, key=lambda k: self.priority(self.pending[k])))
+                    self.served += 1
+                    self.waits.append(now - s[8])
+                    return s
+                self.cond.wait()
+
+    def metrics(self):
+        with self.cond:
+            waits = sorted(self.waits)
+            pct = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 1) if waits else None
+            return {'depth': len(self.pending), 'received': self.received, 'replaced': self.replaced, 'stale': self.stale,
+                    'served': self.served, 'wait_p50_ms': pct(.5), 'wait_p99_ms': pct(.99), 'wait_max_ms': pct(1)}
+
+    def _report(self):
+        last = 0
+        while True:
+            time.sleep(REPORT_INTERVAL)
+            m = self.metrics()
+            if m['received'] != last:
+                log.info(f'SignalScheduler - {m}')
+                last = m['received']
@@ -0,0 +1,387 @@
+import time, math, zlib, itertools
+from collections import defaultdict
+from queue import Queue
+from threading import Thread, Lock
+from Logger import *
+import numpy as np
+
+class SimAPIError(Exception):
+    """Raised like binance.exceptions.BinanceAPIException, with the same code/message fields."""
+    def __init__(self, code, message):
+        super().__init__(f'APIError(code={code}): {message}')
+        self.code, self.message = code, message
+
+class SimVenue:
+    """In-process stand-in for Binance USDT-M futures: prices, klines, orders, positions and the websocket streams.
+
+    Each symbol's price is a seeded random walk stepped every tick_seconds; a candle closes every candle_seconds of
+    wall time (its close time advances by interval_ms, so a session runs faster than the real exchange). Market
+    orders fill at once; resting LIMIT orders fill when the price trades through them, with fill_probability per
+    tick; STOP_MARKET / TAKE_PROFIT / TRAILING_STOP_MARKET trigger off the walk (reduce-only, one-way mode). Each
+    REST call waits latency_ms ± jitter_ms and fails with error_rate; fills push ACCOUNT_UPDATE and
+    ORDER_TRADE_UPDATE to user-data subscribers. Use client() and socket_manager() where Client and
+    ThreadedWebsocketManager would be (Helper.make_client / make_socket_manager with simulated_venue).
+    """
+    def __init__(self, symbols, balance=10_000.0, interval_ms=60_000, candle_seconds=5.0, tick_seconds=0.1, history=1500,
+                 latency_ms=20.0, jitter_ms=5.0, error_rate=0.0, fill_probability=1.0, volatility=0.0005, seed=0):
+        self.symbols = list(symbols)
+        self.interval_ms, self.candle_seconds, self.tick_seconds, self.history = interval_ms, candle_seconds, tick_seconds, history
+        self.latency_ms, self.jitter_ms, self.error_rate, self.fill_probability, self.volatility = latency_ms, jitter_ms, error_rate, fill_probability, volatility
+        self.rng = np.random.default_rng(seed)
+        self.lock = Lock()
+        self.wallet = float(balance)
+        self.meta, self.price, self.klines, self.candle = {}, {}, {}, {}
+        for sym in self.symbols:
+            r = np.random.default_rng(zlib.crc32(sym.encode()) + seed)
+            px = float(10 ** r.uniform(-1, 4))
+            cp = max(0, 4 - int(math.floor(math.log10(px))))
+            self.meta[sym] = (cp, 3, 10.0 ** -cp)  # pricePrecision, quantityPrecision, tickSize
+            self.klines[sym] = self._history(r, px)
+            self.price[sym] = float(self.klines[sym][-1][4])
+        self.positions = {sym: [0.0, 0.0] for sym in self.symbols}  # symbol -> [amount, entry price]
+        self.leverage = {sym: 20 for sym in self.symbols}
+        self.orders = {}                                           # orderId -> open order
+        self.order_ids = itertools.count(1)
+        self.book_seq = itertools.count(1)
+        self.subscribers = defaultdict(dict)                       # kind -> {name: (deliver, key)}
+        self.calls = defaultdict(int)                              # REST endpoint -> calls
+        self.stats = defaultdict(int)                              # orders, fills, rejects, injected errors
+        self.running = False
+
+    def _history(self, r, px):
+        """Closed klines up to now, in futures_klines() row format."""
+        end = int(time.time() * 1000) // self.interval_ms * self.interval_ms
+        close = px * np.exp(np.cumsum(r.normal(0, self.volatility * 10, self.history)))
+        rows = []
+        for i, c in enumerate(close):
+            o = close[i - 1] if i else c
+            t = end - (self.history - i) * self.interval_ms
+            rows.append([t, o, max(o, c), min(o, c), c, 100.0, t + self.interval_ms - 1, 100.0 * c, 100, 50.0, 50.0 * c, '0'])
+        return rows
+
+    # ---- clock ----
+    def start(self):
+        if self.running: return
+        self.running = True
+        Thread(target=self._clock, daemon=True).start()
+
+    def _clock(self):
+        next_candle, next_mark = time.monotonic() + self.candle_seconds, time.monotonic() + 1
+        for sym in self.symbols: self.candle[sym] = [self.price[sym]] * 4 + [0.0]
+        while self.running:
+            time.sleep(self.tick_seconds)
+            with self.lock:
+                steps = np.exp(self.rng.normal(0, self.volatility, len(self.symbols)))
+                for sym, s in zip(self.symbols, steps):
+                    px = self.price[sym] = self.price[sym] * float(s)
+                    c = self.candle[sym]
+                    c[1], c[2], c[3], c[4] = max(c[1], px), min(c[2], px), px, c[4] + 1.0
+                events = self._match()
+            self._publish_book()
+            for ev in events: self._publish('user', ev)
+            now = time.monotonic()
+            if now >= next_mark:
+                next_mark = now + 1
+                self._publish('mark', [{'e': 'markPriceUpdate', 'E': self._ms(), 's': sym, 'p': str(self.price[sym])} for sym in self.symbols])
+            if now >= next_candle:
+                next_candle = now + self.candle_seconds
+                self._close_candles()
+
+    def _close_candles(self):
+        with self.lock:
+            closed = []
+            for sym in self.symbols:
+                o, h, l, c, v = self.candle[sym]
+                t = self.klines[sym][-1][6] + 1
+                row = [t, o, h, l, c, v, t + self.interval_ms - 1, v * c, int(v), v / 2, v * c / 2, '0']
+                self.klines[sym].append(row)
+                self.candle[sym] = [c, c, c, c, 0.0]
+                closed.append((sym, row))
+        for sym, row in closed:
+            k = {'t': row[0], 'T': row[6], 's': sym, 'i': '', 'o': str(row[1]), 'h': str(row[2]), 'l': str(row[3]),
+                 'c': str(row[4]), 'v': str(row[5]), 'q': str(row[7]), 'x': True}
+            self._publish('kline', {'e': 'kline', 'E': row[6] + 1, 's': sym, 'k': k}, sym)
+
+    def _ms(self): return int(time.time() * 1000)
+
+    # ---- streams ----
+    def subscribe(self, kind, name, deliver, key=None):
+        self.subscribers[kind][name] = (deliver, key)
+
+    def unsubscribe(self, name):
+        for subs in self.subscribers.values(): subs.pop(name, None)
+
+    def _publish(self, kind, msg, key=None):
+        for deliver, k in list(self.subscribers[kind].values()):
+            if k is None or key in k: deliver(msg, key)
+
+    def _publish_book(self):
+        if not self.subscribers['book']: return
+        for sym in self.symbols:
+            bid, ask = self._top(sym)
+            self._publish('book', {'e': 'bookTicker', 'u': next(self.book_seq), 's': sym, 'b': str(bid), 'B': '1', 'a': str(ask), 'A': '1',
+                                   'T': self._ms(), 'E': self._ms()}, sym)
+
+    def _top(self, sym):
+        cp, _, tick = self.meta[sym]
+        px = self.price[sym]
+        return round(math.floor(px / tick) * tick, cp), round(math.floor(px / tick) * tick + tick, cp)
+
+    # ---- REST ----
+    def call(self, endpoint):
+        """Latency and error injection for one REST request."""
+        self.calls[endpoint] += 1
+        time.sleep(max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        if self.rng.random() < self.error_rate:
+            self.stats['injected_errors'] += 1
+            raise SimAPIError(-1001, 'Internal error; unable to process your request. Please try again.')
+
+    def place(self, p):
+        """Validate and accept one order (lock held); returns (response, user-stream events)."""
+        sym, side, typ = p['symbol'], p['side'], p['type']
+        if sym not in self.price: raise SimAPIError(-1121, 'Invalid symbol.')
+        qty, px = float(p['quantity']), self.price[sym]
+        if qty <= 0: raise SimAPIError(-4003, 'Quantity less than or equal to zero.')
+        stop = float(p.get('stopPrice') or p.get('activationPrice') or p.get('ActivationPrice') or 0)
+        if typ in ('STOP_MARKET',) and (stop <= px if side == 'BUY' else stop >= px) or \
+           typ in ('TAKE_PROFIT', 'TRAILING_STOP_MARKET') and (stop >= px if side == 'BUY' else stop <= px):
+            self.stats['rejects'] += 1
+            raise SimAPIError(-2021, 'Order would immediately trigger.')
+        o = {'orderId': next(self.order_ids), 'symbol': sym, 'side': side, 'type': typ, 'origType': typ, 'origQty': qty,
+             'price': float(p.get('price') or 0), 'stopPrice': stop, 'reduceOnly': str(p.get('reduceOnly', 'false')).lower() == 'true',
+             'status': 'NEW', 'updateTime': self._ms()}
+        self.stats['orders'] += 1
+        if typ == 'MARKET':
+            return self._fill(o, px)
+        self.orders[o['orderId']] = o
+        return self._order_view(o), []
+
+    def _match(self):
+        """Fill or trigger resting orders against the current prices (lock held); returns user-stream events."""
+        events = []
+        for o in list(self.orders.values()):
+            px, buy = self.price[o['symbol']], o['side'] == 'BUY'
+            if o['type'] == 'LIMIT':
+                hit = (px <= o['price'] if buy else px >= o['price']) and self.rng.random() < self.fill_probability
+                fill_px = o['price']
+            elif o['type'] == 'STOP_MARKET':
+                hit, fill_px = (px >= o['stopPrice'] if buy else px <= o['stopPrice']), px
+            else:  # TAKE_PROFIT / TRAILING_STOP_MARKET (activation treated as the trigger)
+                hit, fill_px = (px <= o['stopPrice'] if buy else px >= o['stopPrice']), (o['price'] or px)
+            if hit:
+                del self.orders[o['orderId']]
+                events += self._fill(o, fill_px)[1]
+        return events
+
+    def _fill(self, o, px):
+        """Apply a fill to the position and wallet (lock held); returns (response, events)."""
+        pos = self.positions[o['symbol']]
+        sign = 1 if o['side'] == 'BUY' else -1
+        qty = o['origQty']
+        if o['reduceOnly']:
+            qty = min(qty, abs(pos[0])) if pos[0] * sign < 0 else 0.0
+            if not qty:
+                o['status'] = 'EXPIRED'
+                return self._order_view(o), [self._order_event(o, 0.0, 0.0)]
+        rp = 0.0
+        if pos[0] * sign < 0:  # reducing
+            closed = min(qty, abs(pos[0]))
+            rp = (px - pos[1]) * closed * (1 if pos[0] > 0 else -1)
+            pos[0] += sign * closed
+            if abs(pos[0]) < 1e-12: pos[:] = [0.0, 0.0]
+            left = qty - closed
+            if left > 0: pos[:] = [sign * left, px]
+        else:
+            amt = pos[0] + sign * qty
+            pos[1] = (abs(pos[0]) * pos[1] + qty * px) / abs(amt)
+            pos[0] = amt
+        self.wallet += rp
+        o.update(status='FILLED', avgPrice=px, executedQty=qty, updateTime=self._ms())
+        self.stats['fills'] += 1
+        if not pos[0]:  # reduce-only orders of a closed position go with it
+            for oid in [i for i, x in self.orders.items() if x['symbol'] == o['symbol'] and x['reduceOnly']]:
+                del self.orders[oid]
+        up = (self.price[o['symbol']] - pos[1]) * pos[0]
+        account = {'e': 'ACCOUNT_UPDATE', 'E': self._ms(), 'T': self._ms(),
+                   'a': {'m': 'ORDER', 'B': [{'a': 'USDT', 'wb': str(self.wallet), 'cw': str(self.wallet), 'bc': '0'}],
+                         'P': [{'s': o['symbol'], 'pa': _num(pos[0]), 'ep': str(pos[1]), 'up': str(up), 'mt': 'cross', 'iw': '0', 'ps': 'BOTH'}]}}
+        return self._order_view(o), [account, self._order_event(o, qty, rp)]
+
+    def _order_event(self, o, qty, rp):
+        return {'e': 'ORDER_TRADE_UPDATE', 'E': self._ms(), 'T': self._ms(),
+                'o': {'s': o['symbol'], 'i': o['orderId'], 'S': o['side'], 'o': o['type'], 'ot': o['origType'], 'X': o['status'],
+                      'x': 'TRADE' if o['status'] == 'FILLED' else o['status'], 'q': str(o['origQty']), 'z': str(qty),
+                      'ap': str(o.get('avgPrice', 0)), 'L': str(o.get('avgPrice', 0)), 'rp': str(rp), 'R': o['reduceOnly'], 'ps': 'BOTH'}}
+
+    @staticmethod
+    def _order_view(o):
+        return {'orderId': o['orderId'], 'symbol': o['symbol'], 'status': o['status'], 'side': o['side'], 'type': o['type'],
+                'origType': o['origType'], 'price': str(o['price']), 'stopPrice': str(o['stopPrice']), 'origQty': str(o['origQty']),
+                'executedQty': str(o.get('executedQty', 0)), 'avgPrice': str(o.get('avgPrice', 0)), 'reduceOnly': o['reduceOnly'],
+                'updateTime': o['updateTime']}
+
+    def position_rows(self, symbol=None):
+        rows = []
+        for sym in ([symbol] if symbol else self.symbols):
+            amt, ep = self.positions[sym]
+            px = self.price[sym]
+            rows.append({'symbol': sym, 'positionAmt': _num(amt), 'entryPrice': str(ep), 'markPrice': str(px),
+                         'unRealizedProfit': str((px - ep) * amt), 'notional': str(amt * px), 'leverage': str(self.leverage[sym]),
+                         'positionSide': 'BOTH'})
+        return rows
+
+    def client(self): return SimClient(self)
+    def socket_manager(self): return SimSocketManager(self)
+
+def _num(x): return '0' if x == 0 else repr(float(x))
+
+class SimClient:
+    """The binance.client.Client methods the bot uses, served by a SimVenue."""
+    simulated = True
+
+    def __init__(self, venue: SimVenue):
+        self.venue = venue
+
+    def futures_ping(self):
+        self.venue.call('ping')
+        return {}
+
+    def futures_time(self):
+        self.venue.call('time')
+        return {'serverTime': self.venue._ms()}
+
+    def futures_exchange_info(self):
+        self.venue.call('exchangeInfo')
+        return {'symbols': [{'symbol': s, 'pair': s, 'status': 'TRADING', 'contractType': 'PERPETUAL', 'pricePrecision': cp,
+                             'quantityPrecision': qp, 'filters': [{'filterType': 'PRICE_FILTER', 'tickSize': f'{tick:.10f}'}]}
+                            for s, (cp, qp, tick) in self.venue.meta.items()]}
+
+    def futures_change_leverage(self, symbol, leverage):
+        self.venue.call('leverage')
+        if symbol not in self.venue.leverage: raise SimAPIError(-1121, 'Invalid symbol.')
+        self.venue.leverage[symbol] = int(leverage)
+        return {'symbol': symbol, 'leverage': int(leverage)}
+
+    def futures_klines(self, symbol, interval=None, startTime=None, endTime=None, limit=500):
+        self.venue.call('klines')
+        with self.venue.lock:
+            rows = self.venue.klines[symbol]
+            out = [r for r in rows if (startTime is None or r[0] >= startTime) and (endTime is None or r[0] <= endTime)][:limit]
+            if (endTime is None or endTime > rows[-1][6]) and len(out) < limit:  # the candle still forming
+                o, h, l, c, v = self.venue.candle.get(symbol) or [rows[-1][4]] * 4 + [0.0]
+                t = rows[-1][6] + 1
+                out.append([t, o, h, l, c, v, t + self.venue.interval_ms - 1, v * c, int(v), v / 2, v * c / 2, '0'])
+            return [[str(x) if isinstance(x, float) else x for x in r] for r in out]
+
+    def futures_position_information(self, symbol=None):
+        self.venue.call('positionRisk')
+        with self.venue.lock: return self.venue.position_rows(symbol)
+
+    def futures_account(self):
+        self.venue.call('account')
+        with self.venue.lock:
+            rows = self.venue.position_rows()
+            upnl = sum(float(p['unRealizedProfit']) for p in rows)
+            w = self.venue.wallet
+            return {'totalWalletBalance': str(w), 'totalUnrealizedProfit': str(upnl), 'totalMarginBalance': str(w + upnl),
+                    'assets': [{'asset': 'USDT', 'walletBalance': str(w), 'unrealizedProfit': str(upnl), 'marginBalance': str(w + upnl)}],
+                    'positions': [{**p, 'unrealizedProfit': p['unRealizedProfit']} for p in rows]}
+
+    def futures_account_balance(self):
+        self.venue.call('balance')
+        return [{'asset': 'USDT', 'balance': str(self.venue.wallet)}]
+
+    def futures_symbol_ticker(self, symbol):
+        self.venue.call('ticker')
+        return {'symbol': symbol, 'price': str(self.venue.price[symbol])}
+
+    def futures_order_book(self, symbol, limit=500):
+        self.venue.call('depth')
+        with self.venue.lock: bid, ask = self.venue._top(symbol)
+        tick = self.venue.meta[symbol][2]
+        n = min(limit, 20)
+        return {'lastUpdateId': next(self.venue.book_seq),
+                'bids': [[str(bid - i * tick), '1'] for i in range(n)], 'asks': [[str(ask + i * tick), '1'] for i in range(n)]}
+
+    def _place(self, orders):
+        with self.venue.lock:
+            results, events = [], []
+            for p in orders:
+                try:
+                    r, ev = self.venue.place(p)
+                    results.append(r); events += ev
+                except SimAPIError as e:
+                    results.append(e)
+        for ev in events: self.venue._publish('user', ev)
+        return results
+
+    def futures_create_order(self, **params):
+        self.venue.call('order')
+        r = self._place([params])[0]
+        if isinstance(r, Exception): raise r
+        return r
+
+    def futures_place_batch_order(self, batchOrders):
+        self.venue.call('batchOrders')
+        return [{'code': r.code, 'msg': r.message} if isinstance(r, SimAPIError) else r for r in self._place(batchOrders)]
+
+    def futures_cancel_all_open_orders(self, symbol):
+        self.venue.call('allOpenOrders')
+        with self.venue.lock:
+            for oid in [i for i, o in self.venue.orders.items() if o['symbol'] == symbol]: del self.venue.orders[oid]
+        return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+    def futures_get_open_orders(self, symbol=None):
+        self.venue.call('openOrders')
+        with self.venue.lock:
+            return [SimVenue._order_view(o) for o in self.venue.orders.values() if symbol is None or o['symbol'] == symbol]
+
+class SimSocketManager:
+    """ThreadedWebsocketManager look-alike: subscriptions on a SimVenue, callbacks on the manager's own thread."""
+    def __init__(self, venue: SimVenue):
+        self.venue, self.q = venue, Queue()
+        self.names, self.subscribed = itertools.count(), []
+        self.started = False
+
+    def start(self):
+        if self.started: return
+        self.started = True
+        self.venue.start()
+        Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            callback, msg = self.q.get()
+            try: callback(msg)
+            except Exception as e: log.warning(f'SimSocketManager - callback failed: {e}')
+
+    def _subscribe(self, kind, callback, key=None, wrap=None):
+        name = f'sim-{id(self)}-{kind}-{next(self.names)}'
+        self.subscribed.append(name)
+        self.venue.subscribe(kind, name, lambda msg, k: self.q.put((callback, wrap(msg, k) if wrap else msg)), key)
+        return name
+
+    def start_futures_user_socket(self, callback): return self._subscribe('user', callback)
+    def start_all_mark_price_socket(self, callback, fast=True): return self._subscribe('mark', callback)
+
+    def start_kline_futures_socket(self, callback, symbol, interval=None):
+        return self._subscribe('kline', callback, {symbol})
+
+    def start_futures_multiplex_socket(self, callback, streams):
+        by_kind, stream = defaultdict(set), {}
+        for s in streams:
+            sym, kind = s.split('@', 1)
+            kind = 'book' if kind == 'bookTicker' else 'kline'
+            by_kind[kind].add(sym.upper())
+            stream[kind, sym.upper()] = s
+        names = [self._subscribe(kind, callback, syms, lambda msg, k, kind=kind: {'stream': stream[kind, k], 'data': msg})
+                 for kind, syms in by_kind.items()]
+        return ','.join(names)
+
+    def stop_socket(self, name):
+        for n in str(name).split(','): self.venue.unsubscribe(n)
+
+    def stop(self):
+        for n in self.subscribed: self.venue.unsubscribe(n)
+
+    def join(self, timeout=None): pass
@@ -0,0 +1,78 @@
+from bisect import bisect_left
+from collections import deque
+import numpy as np
+
+def swing_points(arr, level, peak=True):
+    """Array version of the old Bot._extrema: arr[i] where it is strictly beyond its `level` neighbours on both sides, else 0."""
+    a = np.asarray(arr, dtype=float)
+    n = len(a)
+    out = np.zeros(n)
+    if n < 2 * level + 1: return out
+    c = a[level:n - level]
+    ok = np.ones(len(c), dtype=bool)
+    for k in range(1, level + 1):
+        left, right = a[level - k:n - level - k], a[level + k:n - level + k]
+        ok &= ((c > left) & (c > right)) if peak else ((c < left) & (c < right))
+    out[level:n - level] = np.where(ok, c, 0)
+    return out
+
+class SwingHigh:
+    """Per candle: the most recent confirmed swing high above that candle's value, or the value itself if there is none.
+
+    A swing is confirmed `level` candles after it prints, so it is never newer than i - level (as SetSLTP
+    required). Confirmed swings sit on a monotonic stack: a newer, more extreme swing hides every older,
+    less extreme one, leaving the stack sorted so the lookup is a bisect. Swings leaving the buffer expire
+    through drop_first(). update() keeps the swings it hid so that restore() can undo it.
+    """
+    sign = -1
+
+    def __init__(self, level):
+        self.level, self.count, self.first = level, 0, 0
+        self.recent = deque(maxlen=2 * level + 1)
+        self.pos, self.keys, self.lo = [], [], 0
+        self.pushed, self.popped = False, None
+
+    def lookback(self): return 2 * self.level + 1
+
+    def save(self): return self.count, self.recent[0] if len(self.recent) == self.recent.maxlen else None
+
+    def restore(self, state):
+        self.count, evicted = state
+        self.recent.pop()
+        if evicted is not None: self.recent.appendleft(evicted)
+        if self.pushed: self.keys.pop(); self.pos.pop()
+        if self.popped:
+            for c, p in reversed(self.popped): self.keys.append(c); self.pos.append(p)
+        self.pushed, self.popped = False, None
+
+    def seed(self, x):
+        self.__init__(self.level)
+        return np.array([self.update(float(v)) for v in x])
+
+    def update(self, x):
+        s, L, r = self.sign, self.level, self.recent
+        r.append(x)
+        self.count += 1
+        self.pushed, self.popped = False, None
+        if len(r) == 2 * L + 1:
+            c = s * r[L]
+            if all(c < s * r[L - k] and c < s * r[L + k] for k in range(1, L + 1)):
+                while len(self.keys) > self.lo and self.keys[-1] >= c:
+                    if self.popped is None: self.popped = []
+                    self.popped.append((self.keys.pop(), self.pos.pop()))
+                self.keys.append(c); self.pos.append(self.count - 1 - L)
+                self.pushed = True
+        k = bisect_left(self.keys, s * x, self.lo)
+        return s * self.keys[k - 1] if k > self.lo else x
+
+    def drop_first(self):
+        """The oldest buffered candle was dropped; swings need `level` buffered candles before them, as in swing_points()."""
+        self.first += 1
+        while self.lo < len(self.pos) and self.pos[self.lo] < self.first + self.level: self.lo += 1
+        if self.lo > 64 and 2 * self.lo > len(self.pos):
+            del self.pos[:self.lo], self.keys[:self.lo]
+            self.lo = 0
+
+class SwingLow(SwingHigh):
+    """Per candle: the most recent confirmed swing low below that candle's value, see SwingHigh."""
+    sign = 1
@@ -1,7 +1,7 @@
 import time, os, sys
 from Logger import *
-from threading import Thread
-from binance import ThreadedWebsocketManager 
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
 from binance.client import Client
 from binance.enums import (
     SIDE_SELL, SIDE_BUY,
@@ -11,35 +11,62 @@ from binance.enums import (
 )
 from tabulate import tabulate
 
-import TradingStrats
+import TradingStrats, Latency, Capture
 from LiveTradingConfig import *
-from Helper import Trade
+from Helper import Trade, TradeRegistry, make_socket_manager
+from AccountState import AccountState
+from MarketData import PriceCache, BookTicker
+from SignalScheduler import SignalScheduler
 
 
-def calculate_custom_tp_sl(options):
-    """Custom TP/SL that needs trade info; used when TP_SL_choice requires context."""
+def _fmt(v):
+    """Batch order values are sent as strings; avoid the exponent notation str() gives small floats."""
+    return f'{v:.10f}'.rstrip('0').rstrip('.') if isinstance(v, float) else str(v)
+
+# strategy name -> (TP_SL_choice, SL_mult, TP_mult) of trading_strategy and extra_strategies, for the custom TP/SL
+EXITS = {trading_strategy: (TP_SL_choice, SL_mult, TP_mult),
+         **{x.get('name', x['strategy']): (x.get('TP_SL_choice', TP_SL_choice), x.get('SL_mult', SL_mult), x.get('TP_mult', TP_mult))
+            for x in extra_strategies}}
+
+def calculate_custom_tp_sl(options, choice=TP_SL_choice):
+    """Custom TP/SL that needs trade info; used when the TP_SL_choice requires context."""
     sl = tp = -99
-    if TP_SL_choice == 'USDT':
+    if choice == 'USDT':
         sl, tp = TradingStrats.USDT_SL_TP(options)
     return sl, tp
 
 class TradeManager:
-    def __init__(self, client: Client, new_trades_q, print_trades_q):
+    def __init__(self, client: Client, new_trades_q, print_trades_q, symbols=None):
         self.client = client
-        self.active_trades: list[Trade] = []
+        self.active_trades = TradeRegistry()
         self.use_trailing_stop = use_trailing_stop
         self.trailing_stop_callback = trailing_stop_callback
         self.use_market_orders = use_market_orders
+        self.max_number_of_positions = max_number_of_positions
         self.new_trades_q = new_trades_q
+        self.signals = SignalScheduler(new_trades_q, signal_max_age, signal_priority)
         self.print_trades_q = print_trades_q
         self.total_profit = 0
         self.number_of_wins = 0
         self.number_of_losses = 0
 
-        Thread(target=self.check_threshold_loop, daemon=True).start()
-        self.twm = ThreadedWebsocketManager(api_key=API_KEY, api_secret=API_SECRET)
+        Latency.recorder.start('orders', latency_metrics_dir, latency_report_interval)
+        if record_messages_dir: Capture.recorder.start('orders', record_messages_dir)
+        self.account = AccountState(client)
+        self.prices = PriceCache(on_update=self.check_thresholds)
+        self.threshold_hit = Event()
+        self.order_pool = ThreadPoolExecutor(max_workers=4)  # TP/SL placement off the user-stream thread
+
+        self.twm = make_socket_manager(client)
         self.twm.start()
-        self.user_socket = self.twm.start_futures_user_socket(callback=self.monitor_trades)
+        self.user_socket = self.twm.start_futures_user_socket(callback=Capture.captured('user', self.monitor_trades))
+        self.price_socket = self.twm.start_all_mark_price_socket(callback=self.prices.on_message)
+        self.book = BookTicker() if use_local_order_book and symbols else None
+        if self.book: self.book.start(self.twm, symbols, streams_per_connection)
+        try: self.account.seed()  # after the socket is up, so no event between snapshot and stream is lost
+        except Exception as e: log.warning(f'TradeManager() - account snapshot failed, retrying in {account_reconcile_interval}s: {e}')
+        Thread(target=self.reconcile_account_loop, daemon=True).start()
+        Thread(target=self.check_threshold_loop, daemon=True).start()
         Thread(target=self.log_trades_loop, daemon=True).start()
         Thread(target=self.monitor_orders_by_polling_api, daemon=True).start()
 
@@ -52,26 +79,43 @@ class TradeManager:
             try:
                 for t in self.active_trades:
                     if t.symbol in opens and t.trade_status == 0:
-                        i = self.active_trades.index(t)
-                        t.trade_status = self.place_tp_sl(t.symbol, t.trade_direction, t.CP, t.tick_size, t.entry_price, i)
+                        t.trade_status = self.place_tp_sl(t)
             except Exception as e:
                 exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 log.warning(f'monitor_orders_by_polling_api() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
 
+    def reconcile_account_loop(self):
+        """Refresh the stream-fed account cache over REST now and then, in case user-stream events were missed."""
+        while True:
+            time.sleep(account_reconcile_interval)
+            try:
+                drift = self.account.seed()
+                if drift: log.info(f'reconcile_account_loop() - positions out of sync, corrected: {sorted(drift)}')
+            except Exception as e:
+                log.warning(f'reconcile_account_loop() - {e}')
+
     def new_trades_loop(self):
         """Process new trade signals and open orders."""
         while True:
-            symbol, OP, CP, tick, direction, _, sl, tp = self.new_trades_q.get()
+            symbol, OP, CP, tick, direction, _, sl, tp, generated, strategy = self.signals.get()
+            Latency.record('queue_wait', (time.time() - generated) * 1000, symbol, strategy)
             open_syms = self.get_all_open_or_pending_trades()
-            if open_syms != -1 and symbol not in open_syms and len(self.active_trades) < max_number_of_positions and self.check_margin_sufficient():
+            if open_syms != -1 and symbol not in open_syms and len(self.active_trades) < self.max_number_of_positions and self.check_margin_sufficient():
                 try:
+                    t0 = time.perf_counter()
                     order_id, qty, entry, status = self.open_trade(symbol, direction, OP, tick)
-                    if TP_SL_choice in custom_tp_sl_functions and status != -1:
-                        sl, tp = calculate_custom_tp_sl({'position_size': qty})
                     if status != -1:
-                        self.active_trades.append(Trade(0, entry, qty, tp, sl, direction, order_id, symbol, CP, tick))
+                        Latency.record('order_ack', (time.perf_counter() - t0) * 1000, symbol, strategy)
+                        Latency.record('signal_to_ack', (time.time() - generated) * 1000, symbol, strategy)
+                    choice, sl_mult, tp_mult = EXITS.get(strategy, EXITS[trading_strategy])
+                    if choice in custom_tp_sl_functions and status != -1:
+                        sl, tp = calculate_custom_tp_sl({'position_size': qty, 'SL_mult': sl_mult, 'TP_mult': tp_mult}, choice)
+                    if status != -1:
+                        t = self.active_trades.add(Trade(0, entry, qty, tp, sl, direction, order_id, symbol, CP, tick))
+                        t.strategy = strategy
                     if status == 1:
-                        self.active_trades[-1].trade_status = self.place_tp_sl(symbol, direction, CP, tick, entry, -1)
+                        t.filled_at = time.perf_counter()
+                        t.trade_status = self.place_tp_sl(t, qty)
                     elif status == 0:
                         log.info(f'new_trades_loop() - Order placed {symbol}, Entry: {entry}, Qty: {qty}, Side: {"Long" if direction else "Short"}')
                 except Exception as e:
@@ -81,48 +125,95 @@ class TradeManager:
     def monitor_trades(self, msg):
         """User-stream callback: set TP/SL on fills and track wins/losses/closures."""
         try:
-            updates = []
-            for t in self.active_trades:
-                if msg['e'] == 'ORDER_TRADE_UPDATE' and msg['o']['s'] == t.symbol and msg['o']['X'] == 'FILLED':
-                    i = self.active_trades.index(t)
-                    rp = float(msg['o']['rp'])
-                    oid = msg['o']['i']
-                    if rp > 0 and oid == t.TP_id:
-                        self.total_profit += rp; self.number_of_wins += 1; updates.append([i, 4])
-                    elif rp < 0 and oid == t.SL_id:
-                        self.total_profit += rp; self.number_of_losses += 1; updates.append([i, 5])
-                    elif oid == t.order_id:
-                        status = self.place_tp_sl(t.symbol, t.trade_direction, t.CP, t.tick_size, t.entry_price, i)
-                        updates.append([i, status])
-                elif msg['e'] == 'ACCOUNT_UPDATE':
-                    i = self.active_trades.index(t)
-                    for p in msg['a']['P']:
-                        if p['s'] == t.symbol and p['pa'] == '0':
-                            updates.append([i, 6])
-            for i, status in updates:
-                self.active_trades[i].trade_status = status
+            self.account.apply(msg)
+            if msg['e'] == 'ORDER_TRADE_UPDATE' and msg['o']['X'] == 'FILLED':
+                t = self.active_trades.for_order(msg['o']['i'])
+                if t is None or t.symbol != msg['o']['s']: return
+                rp = float(msg['o']['rp'])
+                oid = msg['o']['i']
+                if rp > 0 and oid == t.TP_id:
+                    self.total_profit += rp; self.number_of_wins += 1; t.trade_status = 4
+                elif rp < 0 and oid == t.SL_id:
+                    self.total_profit += rp; self.number_of_losses += 1; t.trade_status = 5
+                elif oid == t.order_id:
+                    t.filled_at = time.perf_counter()
+                    self.order_pool.submit(self.protect, t, float(msg['o']['z']))
+            elif msg['e'] == 'ACCOUNT_UPDATE':
+                for p in msg['a']['P']:
+                    t = self.active_trades.get(p['s'])
+                    if t is not None and p['pa'] == '0':
+                        t.trade_status = 6
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.warning(f'monitor_trades() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
 
-    def place_tp_sl(self, symbol, direction, CP, tick, entry_price, index):
-        """Place TP and SL orders for an opened position."""
-        try: self.client.futures_cancel_all_open_orders(symbol=symbol)
-        except: pass
-        self.active_trades[index].position_size = abs(next(float(p['positionAmt']) for p in self.client.futures_position_information() if p['symbol'] == symbol))
-        self.active_trades[index].SL_id = self.place_SL(symbol, self.active_trades[index].SL_val, direction, CP, tick, self.active_trades[index].position_size)
-        self.active_trades[index].TP_id = self.place_TP(symbol, [self.active_trades[index].TP_val, self.active_trades[index].position_size], direction, CP, tick)
-        if self.active_trades[index].SL_id != -1 and self.active_trades[index].TP_id != -1:
-            log.info(f'new_trades_loop() - Position OPEN {symbol}, orderId: {self.active_trades[-1].order_id}, Entry: {entry_price}, Qty: {self.active_trades[index].position_size}, Side: {"Long" if direction else "Short"} | TP & SL placed')
+    def protect(self, t: Trade, filled_qty=None):
+        try:
+            t.trade_status = self.place_tp_sl(t, filled_qty)
+        except Exception as e:
+            exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+            log.warning(f'protect() - {t.symbol} | Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
+
+    def place_tp_sl(self, t: Trade, filled_qty=None):
+        """Place TP and SL orders for an opened position.
+
+        filled_qty: the entry's fill quantity when the entry is known to be fully filled (user-stream event or market
+        order), which saves cancelling leftovers and looking up the position first; only a leg not placed yet is
+        placed, so a retry after a half-failed batch does not duplicate the leg that went through. Without it
+        (polling path) the entry may be partly filled, so open orders, a placed leg included, are cancelled, the
+        size is read from the position and both legs are placed for it.
+        """
+        with t.lock:  # the fill event and the polling loop can both get here
+            missing = [leg for leg in ('SL', 'TP') if getattr(t, f'{leg}_id') in ('', -1)]
+            if not missing: return 1
+            start = t.filled_at or time.perf_counter()
+            if filled_qty is None:
+                try: self.client.futures_cancel_all_open_orders(symbol=t.symbol)
+                except: pass
+                missing = ['SL', 'TP']
+                filled_qty = abs(self.account.position_amount(t.symbol))
+                if not filled_qty:  # the fill's ACCOUNT_UPDATE has not arrived yet
+                    filled_qty = abs(sum(float(p['positionAmt']) for p in self.client.futures_position_information(symbol=t.symbol)))
+            t.position_size = filled_qty
+            for leg, oid in self.place_protective_orders(t, missing).items(): setattr(t, f'{leg}_id', oid)
+            t.unprotected_ms = round((time.perf_counter() - start) * 1000, 1)
+            Latency.record('unprotected', t.unprotected_ms, t.symbol, t.strategy)
+            self.active_trades.index_orders(t)
+        if t.SL_id != -1 and t.TP_id != -1:
+            log.info(f'new_trades_loop() - Position OPEN {t.symbol} ({t.strategy}), orderId: {t.order_id}, Entry: {t.entry_price}, Qty: {t.position_size}, Side: {"Long" if t.trade_direction else "Short"} | TP & SL placed, unprotected for {t.unprotected_ms}ms')
             self.print_trades_q.put(True)
             return 1
         return 3
 
+    def place_protective_orders(self, t: Trade, legs=('SL', 'TP')):
+        """The given legs in one batch request, which the exchange places concurrently; returns {leg: order id, -1 on
+        failure}. Falls back to concurrent single-order requests if the batch endpoint itself fails."""
+        orders = {'SL': self.sl_order(t.symbol, t.SL_val, t.trade_direction, t.CP, t.tick_size, t.position_size),
+                  'TP': self.tp_order(t.symbol, [t.TP_val, t.position_size], t.trade_direction, t.CP, t.tick_size)}
+        orders = {leg: orders[leg] for leg in legs}
+        try:
+            results = self.client.futures_place_batch_order(batchOrders=[{k: _fmt(v) for k, v in o.items()} for o in orders.values()])
+        except Exception as e:
+            log.warning(f'place_protective_orders() - {t.symbol} batch order failed, placing {" and ".join(legs)} separately | Error: {e}')
+            place = {'SL': lambda: self.place_SL(t.symbol, t.SL_val, t.trade_direction, t.CP, t.tick_size, t.position_size),
+                     'TP': lambda: self.place_TP(t.symbol, [t.TP_val, t.position_size], t.trade_direction, t.CP, t.tick_size)}
+            with ThreadPoolExecutor(max_workers=2) as pool:  # not order_pool: this may already run on one of its workers
+                futures = {leg: pool.submit(place[leg]) for leg in legs}
+                return {leg: f.result() for leg, f in futures.items()}
+        ids = {}
+        for (leg, o), r in zip(orders.items(), results):
+            if 'orderId' in r: ids[leg] = r['orderId']
+            else:
+                log.warning(f"place_protective_orders() - {t.symbol} {o['type']} price:{o.get('stopPrice', o.get('price'))}, qty:{o['quantity']} | Error: {r.get('msg')}")
+                ids[leg] = -1
+        return ids
+
     def get_all_open_or_pending_trades(self):
         """Symbols with open positions or pending/active bot trades."""
         try:
-            opens = [p['symbol'] for p in self.client.futures_position_information() if float(p['notional']) != 0.0]
-            actives = [t.symbol for t in self.active_trades]
+            if not self.account.seeded: raise Exception('account state not loaded yet')
+            opens = self.account.open_positions()
+            actives = self.active_trades.symbols()
             return opens + actives
         except Exception as e:
             log.warning(f'get_all_open_or_pending_trades() - {e}')
@@ -131,7 +222,7 @@ class TradeManager:
     def get_all_open_positions(self):
         """Symbols with non-zero notional."""
         try:
-            return [p['symbol'] for p in self.client.futures_position_information() if float(p['notional']) != 0.0]
+            return self.account.open_positions()
         except Exception as e:
             log.warning(f'get_all_open_trades() - {e}')
             return []
@@ -139,23 +230,40 @@ class TradeManager:
     def check_margin_sufficient(self):
         """Ensure margin is sufficient before opening a new position."""
         try:
-            a = self.client.futures_account()
-            return float(a['totalMarginBalance']) > (float(a['totalWalletBalance']) * (1 - order_size / 100)) / leverage
+            return self.account.total_margin_balance() > (self.account.total_wallet_balance() * (1 - order_size / 100)) / leverage
         except Exception as e:
             log.warning(f'check_margin_sufficient() - {e}')
             return False
 
+    def threshold_exceeded(self, t: Trade, px):
+        """Flag a pending entry for cancellation if price ran more than trading_threshold % away from it."""
+        moved = (px - t.entry_price) / t.entry_price if t.trade_direction == 1 else (t.entry_price - px) / t.entry_price
+        if moved > trading_threshold / 100:
+            t.current_price = px; t.trade_status = 2
+            return True
+        return False
+
+    def check_thresholds(self):
+        """Mark price stream callback: check pending entries against the new prices, wake the cancel loop on a hit."""
+        try:
+            hit = False
+            for t in self.active_trades:
+                if t.trade_status == 0:
+                    px = self.prices.get(t.symbol)
+                    if px is not None: hit = self.threshold_exceeded(t, px) or hit
+            if hit: self.threshold_hit.set()
+        except Exception as e:
+            log.warning(f'check_thresholds() - {e}')
+
     def check_threshold_loop(self):
         """Cancel stale entries when price has moved beyond configured threshold."""
         while True:
             try:
-                time.sleep(5)
+                self.threshold_hit.wait(5)
+                self.threshold_hit.clear()
                 for t in self.active_trades:
-                    if t.trade_status == 0:
-                        px = float(self.client.futures_symbol_ticker(symbol=t.symbol)['price'])
-                        moved = (px - t.entry_price) / t.entry_price if t.trade_direction == 1 else (t.entry_price - px) / t.entry_price
-                        if moved > trading_threshold / 100:
-                            t.current_price = px; t.trade_status = 2
+                    if t.trade_status == 0 and self.prices.get(t.symbol, max_age=5) is None:  # stream down: poll as before
+                        self.threshold_exceeded(t, float(self.client.futures_symbol_ticker(symbol=t.symbol)['price']))
                 self.cancel_and_remove_trades()
             except Exception as e:
                 exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
@@ -163,43 +271,41 @@ class TradeManager:
 
     def cancel_and_remove_trades(self):
         """Remove finished/failed trades from active list and clean orders."""
-        i = 0
         opens = self.get_all_open_positions()
-        while i < len(self.active_trades):
-            t = self.active_trades[i]
+        for t in self.active_trades:
             try:
                 if t.trade_status == 2 and opens:
                     if self.check_position_and_cancel_orders(t, opens):
                         pct = abs(100 * (t.entry_price - t.current_price) / t.entry_price)
                         log.info(f'cancel_and_remove_trades() - Cancelled {t.symbol} (threshold exceeded). Current: {t.current_price}, Entry: {t.entry_price}, Δ%: {pct}')
-                        self.active_trades.pop(i); continue
-                    t.trade_status = 0; i += 1
+                        self.active_trades.remove(t); continue
+                    t.trade_status = 0
                 elif t.trade_status == 3:
                     self.close_position(t.symbol, t.trade_direction, t.position_size)
                     log.info(f'cancel_and_remove_trades() - Cancelled {t.symbol} due to TP/SL placement issue')
-                    self.active_trades.pop(i)
+                    self.active_trades.remove(t)
                 elif t.trade_status in (4,5,6):
                     self.client.futures_cancel_all_open_orders(symbol=t.symbol)
                     reason = {4:"TP hit",5:"SL hit",6:"Position closed"}[t.trade_status]
                     log.info(f'cancel_and_remove_trades() - Closed {t.symbol}: {reason}')
-                    self.active_trades.pop(i)
-                else:
-                    i += 1
+                    self.active_trades.remove(t)
             except Exception as e:
                 exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 log.warning(f'cancel_and_remove_trades() - {t.symbol} | Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
-                i += 1
 
     def open_trade(self, symbol, direction, OP, tick):
         """Submit market/limit entry and return (order_id, qty, entry_price, status)."""
-        try:
-            ob = self.client.futures_order_book(symbol=symbol)
-        except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.warning(f'open_trade() - Order book error | Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
-            return -1, -1, -1, -1
+        top = self.book.top(symbol, order_book_max_age) if self.book else None
+        if top is None:
+            try:
+                ob = self.client.futures_order_book(symbol=symbol, limit=5)
+                top = float(ob['bids'][0][0]), float(ob['asks'][0][0])
+            except Exception as e:
+                exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+                log.warning(f'open_trade() - Order book error | Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
+                return -1, -1, -1, -1
 
-        entry_price = float(ob['bids'][0][0]) if direction == 1 else float(ob['asks'][0][0])
+        entry_price = top[0] if direction == 1 else top[1]
         bal = self.get_account_balance()
         notional = leverage * bal * (order_size / 100)
         qty = round(notional / entry_price) if OP == 0 else round(notional / entry_price, OP)
@@ -228,34 +334,40 @@ class TradeManager:
     def get_account_balance(self):
         """Return USDT futures balance."""
         try:
-            for x in self.client.futures_account_balance():
-                if x['asset'] == 'USDT': return float(x['balance'])
+            return self.account.balance('USDT')
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.warning(f'get_account_balance() - Info: {(exc_obj, fname, exc_tb.tb_lineno)}, Error: {e}')
 
+    def tp_order(self, symbol, TP, direction, CP, tick):
+        """Order parameters of a Take Profit (or trailing) order."""
+        tp_val = round(TP[0]) if CP == 0 else round(round(TP[0] / tick) * tick, CP)
+        side = SIDE_SELL if direction == 1 else SIDE_BUY
+        if not self.use_trailing_stop:
+            return dict(symbol=symbol, side=side, type=FUTURE_ORDER_TYPE_TAKE_PROFIT, price=tp_val, stopPrice=tp_val, timeInForce=TIME_IN_FORCE_GTC, reduceOnly='true', quantity=TP[1])
+        return dict(symbol=symbol, side=side, type='TRAILING_STOP_MARKET', ActivationPrice=tp_val, callbackRate=self.trailing_stop_callback, quantity=TP[1])
+
+    def sl_order(self, symbol, SL, direction, CP, tick, qty):
+        """Order parameters of a Stop Loss order."""
+        SL = round(SL) if CP == 0 else round(round(SL / tick) * tick, CP)
+        side = SIDE_SELL if direction == 1 else SIDE_BUY
+        return dict(symbol=symbol, side=side, type=FUTURE_ORDER_TYPE_STOP_MARKET, reduceOnly='true', stopPrice=SL, quantity=qty)
+
     def place_TP(self, symbol, TP, direction, CP, tick):
         """Place a Take Profit (or trailing) order."""
         try:
-            tp_val = round(TP[0]) if CP == 0 else round(round(TP[0] / tick) * tick, CP)
-            side = SIDE_SELL if direction == 1 else SIDE_BUY
-            if not self.use_trailing_stop:
-                o = self.client.futures_create_order(symbol=symbol, side=side, type=FUTURE_ORDER_TYPE_TAKE_PROFIT, price=tp_val, stopPrice=tp_val, timeInForce=TIME_IN_FORCE_GTC, reduceOnly='true', quantity=TP[1])
-            else:
-                o = self.client.futures_create_order(symbol=symbol, side=side, type='TRAILING_STOP_MARKET', ActivationPrice=tp_val, callbackRate=self.trailing_stop_callback, quantity=TP[1])
-            return o['orderId']
+            o = self.tp_order(symbol, TP, direction, CP, tick)
+            return self.client.futures_create_order(**o)['orderId']
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
-            log.warning(f"place_TP() - {symbol} price:{tp_val}, qty:{TP[1]} | Error: {e}, Info: {(exc_type, fname, exc_tb.tb_lineno)}")
+            log.warning(f"place_TP() - {symbol} price:{TP[0]}, qty:{TP[1]} | Error: {e}, Info: {(exc_type, fname, exc_tb.tb_lineno)}")
             return -1
 
     def place_SL(self, symbol, SL, direction, CP, tick, qty):
         """Place a Stop Loss order."""
         try:
-            SL = round(SL) if CP == 0 else round(round(SL / tick) * tick, CP)
-            side = SIDE_SELL if direction == 1 else SIDE_BUY
-            o = self.client.futures_create_order(symbol=symbol, side=side, type=FUTURE_ORDER_TYPE_STOP_MARKET, reduceOnly='true', stopPrice=SL, quantity=qty)
-            return o['orderId']
+            o = self.sl_order(symbol, SL, direction, CP, tick, qty)
+            return self.client.futures_create_order(**o)['orderId']
         except Exception as e:
             exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
             log.warning(f"place_SL() - {symbol} price:{SL} | Error: {e}, Info: {(exc_type, fname, exc_tb.tb_lineno)}")
@@ -282,7 +394,9 @@ class TradeManager:
         while True:
             try:
                 self.print_trades_q.get()
-                positions = [p for p in self.client.futures_position_information() if float(p['notional']) != 0.0]
+                positions = []
+                if self.account.open_positions():  # mark prices and notionals are not in the stream-fed cache
+                    positions = [p for p in self.client.futures_position_information() if float(p['notional']) != 0.0]
                 win_loss = 'Not available yet'
                 if self.number_of_losses: win_loss = round(self.number_of_wins / self.number_of_losses, 4)
                 if positions:
@@ -311,6 +425,6 @@ class TradeManager:
                 exc_type, exc_obj, exc_tb = sys.exc_info(); fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
                 log.warning(f'log_trades_loop() - {e}, Info: {(exc_type, fname, exc_tb.tb_lineno)}')
 
-def start_new_trades_loop_multiprocess(client: Client, new_trades_q, print_trades_q):
-    TM = TradeManager(client, new_trades_q, print_trades_q)
+def start_new_trades_loop_multiprocess(client: Client, new_trades_q, print_trades_q, symbols=None):
+    TM = TradeManager(client, new_trades_q, print_trades_q, symbols)
     TM.new_trades_loop()
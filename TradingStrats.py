@@ -1,11 +1,51 @@
 from Logger import *
 from LiveTradingConfig import *
- 
+from Indicators import EMA, SMA, RSI, MACD, Stoch, StochRSIK, BollingerPBand, RollingMax, RollingMin
+
+STRATEGIES = {}  # name -> Strategy, filled by @strategy below
+
+class Strategy:
+    """A registered entry strategy: its default params, the indicators it reads, how far back it looks and how it is called."""
+    def __init__(self, name, fn, call, params, indicators, lookback, exit=None):
+        self.name, self.fn, self.call, self.exit = name, fn, call, exit
+        self.params, self.indicators, self.lookback = params, indicators, lookback
+
+    def signal(self, c, ind, i, params):
+        """1, 0 or -99 at candle i; c: candle columns, ind: {name: {"values": ...}} of the declared indicators."""
+        return self.call(self.fn, c, lambda k: ind[k]["values"], i, params)
+
+    def close_position(self, c, ind, i, params, direction):
+        """1 if an open position in direction should be closed (strategies with an exit rule), else 0."""
+        return self.exit(self.fn, c, lambda k: ind[k]["values"], i, params, direction) if self.exit else 0
+
+def indicator(cls, *args, inputs=('Close',), axis=1):
+    """Declaration of one indicator: an Indicators stream class, its args (constants or param names), its inputs
+    (candle columns or other declared names) and the plotting axis."""
+    return cls, args, inputs, axis
+
+def strategy(call, params=None, indicators=None, lookback=1, exit=None):
+    """Register the decorated function under its name.
+
+    call(fn, c, v, i, p) runs it at candle i and returns 1, 0 or -99, with c the candle columns, v(name) a declared
+    indicator's values and p the params. params: tunable defaults (Bot(params=...) and strategy_params override them).
+    indicators: {name: indicator(...)}, computed once per candle in the bot's indicator graph. lookback: candles the
+    function reads back from i (i - lookback + 1 ... i), on top of the indicators' own warm-up; together they size
+    the history download. exit(fn, c, v, i, p, direction): optional rule for closing an open position.
+    """
+    def register(fn):
+        STRATEGIES[fn.__name__] = Strategy(fn.__name__, fn, call, params or {}, indicators or {}, lookback, exit)
+        return fn
+    return register
+
+EMA_L, EMA_M, EMA_S = indicator(EMA, 'ema_long'), indicator(EMA, 'ema_mid'), indicator(EMA, 'ema_short')
+STOCH_RSI = {'fastk': indicator(StochRSIK, 'stochrsi_window', axis=3), 'fastd': indicator(SMA, 3, inputs=('fastk',), axis=3)}
+
 def USDT_SL_TP(options):
-    """TP/SL when base unit is USDT and depends on filled position size."""
+    """TP/SL when base unit is USDT and depends on filled position size (options may carry the strategy's SL_mult/TP_mult)."""
     q = round(1 / options['position_size'], 6)
-    return SL_mult * q, TP_mult * q
+    return options.get('SL_mult', SL_mult) * q, options.get('TP_mult', TP_mult) * q
 
+@strategy(lambda f, c, v, i, p: f(-99, c["Close"], c["Open"], c["High"], c["Low"], i), lookback=5)
 def candle_wick(Trade_Direction, Close, Open, High, Low, current_index):
     """3 candles trend + opposite candle with long wick."""
     i = current_index
@@ -15,6 +55,12 @@ def candle_wick(Trade_Direction, Close, Open, High, Low, current_index):
         return 1
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, c["Close"], c["Open"], c["High"], c["Low"], v("MACD_signal"), v("MACD"), v("EMA"), i),
+          params={'macd_fast': 12, 'macd_slow': 26, 'macd_signal': 9, 'sma_window': 200},
+          indicators={"MACD": indicator(MACD, 'macd_fast', 'macd_slow', axis=3),
+                      "MACD_signal": indicator(EMA, 'macd_signal', inputs=('MACD',), axis=3),
+                      "EMA": indicator(SMA, 'sma_window')},
+          lookback=103)
 def fibMACD(Trade_Direction, Close, Open, High, Low, MACD_signal, MACD, EMA200, current_index):
     """Trend pullback to Fibonacci levels + MACD cross + engulfing."""
     period = 100
@@ -104,6 +150,10 @@ def fibMACD(Trade_Direction, Close, Open, High, Low, MACD_signal, MACD, EMA200,
 
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, c["Close"], v("EMA_L"), v("EMA_M"), v("EMA_S"), v("RSI"), i),
+          params={'ema_long': 100, 'ema_mid': 50, 'ema_short': 20, 'rsi_window': 14},
+          indicators={"EMA_L": EMA_L, "EMA_M": EMA_M, "EMA_S": EMA_S, "RSI": indicator(RSI, 'rsi_window', axis=3)},
+          lookback=4)
 def goldenCross(Trade_Direction, Close, EMA100, EMA50, EMA20, RSI, current_index):
     """EMA20/EMA50 cross with EMA100 and RSI direction filter."""
     i = current_index
@@ -115,6 +165,14 @@ def goldenCross(Trade_Direction, Close, EMA100, EMA50, EMA20, RSI, current_index
             return 0
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, v("fastd"), v("fastk"), v("RSI"), v("MACD"), v("macdsignal"), i),
+          params={'stoch_window': 14, 'rsi_window': 14, 'macd_fast': 12, 'macd_slow': 26, 'macd_signal': 9},
+          indicators={"fastd": indicator(Stoch, 'stoch_window', inputs=('High', 'Low', 'Close'), axis=3),
+                      "fastk": indicator(SMA, 3, inputs=('fastd',), axis=3),
+                      "RSI": indicator(RSI, 'rsi_window', axis=4),
+                      "MACD": indicator(MACD, 'macd_fast', 'macd_slow', axis=5),
+                      "macdsignal": indicator(EMA, 'macd_signal', inputs=('MACD',), axis=5)},
+          lookback=4)
 def StochRSIMACD(Trade_Direction, fastd, fastk, RSI, MACD, macdsignal, current_index):
     """StochRSI extremes + MACD cross + RSI direction."""
     i = current_index
@@ -134,6 +192,10 @@ def StochRSIMACD(Trade_Direction, fastd, fastk, RSI, MACD, macdsignal, current_i
     if bear: return 0
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, v("EMA_S"), v("EMA_M"), v("EMA_L"), i),
+          params={'ema_long': 50, 'ema_mid': 20, 'ema_short': 5},
+          indicators={"EMA_L": EMA_L, "EMA_M": EMA_M, "EMA_S": EMA_S},
+          lookback=5)
 def tripleEMA(Trade_Direction, EMA3, EMA6, EMA9, current_index):
     """Fast EMA crossing both M/L EMAs after sustained separation."""
     i = current_index
@@ -151,12 +213,17 @@ def tripleEMA(Trade_Direction, EMA3, EMA6, EMA9, current_index):
         return 1
     return Trade_Direction
 
-def heikin_ashi_ema2(Open_H, High_H, Low_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fastd, fastk, EMA200, current_index):
+@strategy(lambda f, c, v, i, p: f(c["Open_H"], c["High_H"], c["Low_H"], c["Close_H"], -99, -99, 0, v("fastd"), v("fastk"), v("EMA"), i,
+                                 p['short_th'], p['long_th'])[0],
+          params={'stochrsi_window': 14, 'ema_window': 200, 'short_th': .7, 'long_th': .3},
+          indicators={**STOCH_RSI, "EMA": indicator(EMA, 'ema_window')},
+          lookback=10,
+          exit=lambda f, c, v, i, p, d: f(c["Open_H"], c["High_H"], c["Low_H"], c["Close_H"], -99, d, 0, v("fastd"), v("fastk"), v("EMA"), i)[1])
+def heikin_ashi_ema2(Open_H, High_H, Low_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fastd, fastk, EMA200, current_index, short_th=.7, long_th=.3):
     """Heikin Ashi + StochRSI crosses around EMA200 with pattern checks."""
     i = current_index
     if CurrentPos == -99:
         Trade_Direction = -99
-        short_th, long_th = .7, .3
         if fastk[i-1] > fastd[i-1] and fastk[i] < fastd[i] and Close_H[i] < EMA200[i]:
             for k in range(10, 2, -1):
                 if Close_H[-k] < Open_H[-k] and Open_H[-k] == High_H[-k]:
@@ -179,15 +246,19 @@ def heikin_ashi_ema2(Open_H, High_H, Low_H, Close_H, Trade_Direction, CurrentPos
         Close_pos = 0
     return Trade_Direction, Close_pos
 
-def heikin_ashi_ema(Open_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fastd, fastk, EMA200, current_index):
+@strategy(lambda f, c, v, i, p: f(c["Open_H"], c["Close_H"], -99, -99, 0, v("fastd"), v("fastk"), v("EMA"), i, p['short_th'], p['long_th'])[0],
+          params={'stochrsi_window': 14, 'ema_window': 200, 'short_th': .8, 'long_th': .2},
+          indicators={**STOCH_RSI, "EMA": indicator(EMA, 'ema_window')},
+          lookback=10,
+          exit=lambda f, c, v, i, p, d: f(c["Open_H"], c["Close_H"], -99, d, 0, v("fastd"), v("fastk"), v("EMA"), i)[1])
+def heikin_ashi_ema(Open_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fastd, fastk, EMA200, current_index, short_th=.8, long_th=.2):
     """Simpler HA + StochRSI + EMA200 filter."""
     i = current_index
     if CurrentPos == -99:
         Trade_Direction = -99
-        short_th, long_th = .8, .2
         if fastk[i] > short_th and fastd[i] > short_th:
             for k in range(10, 2, -1):
-                if fastd[-k] >= .8 and fastk[-k] >= .8:
+                if fastd[-k] >= short_th and fastk[-k] >= short_th:
                     for j in range(k, 2, -1):
                         if fastk[-j] > fastd[-j] and fastk[-j+1] < fastd[-j+1]:
                             if all(fastk[r] >= short_th and fastd[r] >= short_th for r in range(j, 2, -1)):
@@ -195,7 +266,7 @@ def heikin_ashi_ema(Open_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fas
                                     return 0, Close_pos
         elif fastk[i] < long_th and fastd[i] < long_th:
             for k in range(10, 2, -1):
-                if fastd[-k] <= .2 and fastk[-k] <= .2:
+                if fastd[-k] <= long_th and fastk[-k] <= long_th:
                     for j in range(k, 2, -1):
                         if fastk[-j] < fastd[-j] and fastk[-j+1] > fastd[-j+1] and fastk[i] < long_th and fastd[i] < long_th:
                             if all(fastk[r] <= long_th and fastd[r] <= long_th for r in range(j, 2, -1)):
@@ -209,6 +280,10 @@ def heikin_ashi_ema(Open_H, Close_H, Trade_Direction, CurrentPos, Close_pos, fas
         Close_pos = 0
     return Trade_Direction, Close_pos
 
+@strategy(lambda f, c, v, i, p: f(c["Close"], -99, v("EMA_L"), v("EMA_M"), v("EMA_S"), v("fastd"), v("fastk"), i),
+          params={'ema_long': 100, 'ema_mid': 50, 'ema_short': 20, 'stochrsi_window': 14},
+          indicators={"EMA_L": EMA_L, "EMA_M": EMA_M, "EMA_S": EMA_S, **STOCH_RSI},
+          lookback=2)
 def tripleEMAStochasticRSIATR(Close, Trade_Direction, EMA50, EMA14, EMA8, fastd, fastk, current_index):
     """Trend filter by EMAs + StochRSI cross."""
     i = current_index
@@ -218,6 +293,10 @@ def tripleEMAStochasticRSIATR(Close, Trade_Direction, EMA50, EMA14, EMA8, fastd,
         return 0
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, v("fastd"), v("fastk"), v("percent_B"), i),
+          params={'stochrsi_window': 14, 'bb_window': 20, 'bb_dev': 2},
+          indicators={**STOCH_RSI, "percent_B": indicator(BollingerPBand, 'bb_window', 'bb_dev', axis=4)},
+          lookback=3)
 def stochBB(Trade_Direction, fastd, fastk, percent_B, current_index):
     """StochRSI extremes with Bollinger %B boundary check."""
     i = current_index
@@ -228,15 +307,25 @@ def stochBB(Trade_Direction, fastd, fastk, percent_B, current_index):
         return 0
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, c["Close"], c["Volume"], v("max Close % change"), v("min Close % change"), v("max Volume"), i),
+          params={'window': 10},
+          indicators={"max Close % change": indicator(RollingMax, 'window', axis=3),
+                      "min Close % change": indicator(RollingMin, 'window', axis=3),
+                      "max Volume": indicator(RollingMax, 'window', inputs=('Volume',), axis=2)},
+          lookback=1)
 def breakout(Trade_Direction, Close, VolumeStream, max_Close, min_Close, max_Vol, current_index):
     """Simple breakout with volume confirmation (invert=0 means trade breakout direction)."""
     i = current_index
-    if Close[i] >= max_Close.iloc[i] and VolumeStream[i] >= max_Vol.iloc[i]:
+    if Close[i] >= max_Close[i] and VolumeStream[i] >= max_Vol[i]:
         return 1
-    if Close[i] <= min_Close.iloc[i] and VolumeStream[i] >= max_Vol.iloc[i]:
+    if Close[i] <= min_Close[i] and VolumeStream[i] >= max_Vol[i]:
         return 0
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, i, v("ema_short"), v("ema_long")),
+          params={'ema_short': 20, 'ema_long': 50},
+          indicators={"ema_short": EMA_S, "ema_long": EMA_L},
+          lookback=2)
 def ema_crossover(Trade_Direction, current_index, ema_short, ema_long):
     """1-candle EMA cross."""
     i = current_index
@@ -246,6 +335,10 @@ def ema_crossover(Trade_Direction, current_index, ema_short, ema_long):
         return 1
     return Trade_Direction
 
+@strategy(lambda f, c, v, i, p: f(-99, v("EMA_S"), v("EMA_L"), i),
+          params={'ema_short': 5, 'ema_long': 20},
+          indicators={"EMA_S": EMA_S, "EMA_L": EMA_L},
+          lookback=5)
 def EMA_cross(Trade_Direction, EMA_short, EMA_long, current_index):
     """EMA_short flips after sustained separation from EMA_long."""
     i = current_index
@@ -255,38 +348,15 @@ def EMA_cross(Trade_Direction, EMA_short, EMA_long, current_index):
         return 1
     return Trade_Direction
 
-def SetSLTP(stop_loss_val_arr, take_profit_val_arr, peaks, troughs, Close, High, Low, Trade_Direction, SL, TP, TP_SL_choice, current_index):
-    """Compute absolute SL/TP from arrays or from swing points."""
+def SetSLTP(stop_loss_val_arr, take_profit_val_arr, swing_high, swing_low, Close, Trade_Direction, SL, TP, TP_SL_choice, current_index):
+    """Compute SL/TP distances from arrays or from the most recent confirmed swing beyond price (Swings.SwingHigh/SwingLow series)."""
     i = current_index
     tp = sl = -99
     if TP_SL_choice in ('%', 'x (ATR)'):
         tp = take_profit_val_arr[i]; sl = stop_loss_val_arr[i]
-    elif TP_SL_choice.startswith('x (Swing High/Low) level'):
-        high_swing, low_swing = High[i], Low[i]
-        hf = lf = 0
-        lvl = int(TP_SL_choice[-1])
-        for j in range(i - lvl, -1, -1):
-            if High[j] > high_swing and not hf and peaks[j]:
-                high_swing = peaks[j]; hf = 1
-            if Low[j] < low_swing and not lf and troughs[j]:
-                low_swing = troughs[j]; lf = 1
-            if (hf and Trade_Direction == 0) or (lf and Trade_Direction == 1): break
-        if Trade_Direction == 0:
-            sl = SL * (high_swing - Close[i]); tp = TP * sl
-        elif Trade_Direction == 1:
-            sl = SL * (Close[i] - low_swing); tp = TP * sl
-    elif TP_SL_choice.startswith('x (Swing Close) level'):
-        high_swing = low_swing = Close[i]
-        hf = lf = 0
-        lvl = int(TP_SL_choice[-1])
-        for j in range(i - lvl, -1, -1):
-            if Close[j] > high_swing and not hf and peaks[j]:
-                high_swing = peaks[j]; hf = 1
-            if Close[j] < low_swing and not lf and troughs[j]:
-                low_swing = troughs[j]; lf = 1
-            if (hf and Trade_Direction == 0) or (lf and Trade_Direction == 1): break
+    elif TP_SL_choice.startswith('x (Swing High/Low) level') or TP_SL_choice.startswith('x (Swing Close) level'):
         if Trade_Direction == 0:
-            sl = SL * (high_swing - Close[i]); tp = TP * sl
+            sl = SL * (swing_high[i] - Close[i]); tp = TP * sl
         elif Trade_Direction == 1:
-            sl = SL * (Close[i] - low_swing); tp = TP * sl
+            sl = SL * (Close[i] - swing_low[i]); tp = TP * sl
     return sl, tp
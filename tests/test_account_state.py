@@ -0,0 +1,57 @@
+from AccountState import AccountState
+
+def account(usdt=1000.0, bnb=2.0, positions=()):
+    return {'assets': [{'asset': 'USDT', 'walletBalance': str(usdt)}, {'asset': 'BNB', 'walletBalance': str(bnb)}],
+            'totalWalletBalance': str(usdt + bnb),
+            'positions': [{'symbol': s, 'positionSide': 'BOTH', 'positionAmt': str(a), 'entryPrice': '10', 'unrealizedProfit': str(u)}
+                          for s, a, u in positions]}
+
+def account_update(balances=(), positions=()):
+    return {'e': 'ACCOUNT_UPDATE', 'a': {'B': [{'a': a, 'wb': str(wb)} for a, wb in balances],
+                                         'P': [{'s': s, 'ps': 'BOTH', 'pa': str(pa), 'ep': '10', 'up': str(up)} for s, pa, up in positions]}}
+
+class Client:
+    def __init__(self, snapshot, during=None):
+        self.snapshot, self.during = snapshot, during  # during(): a stream event arriving while the REST call is in flight
+
+    def futures_account(self):
+        if self.during: self.during()
+        return self.snapshot
+
+def test_seed_and_readers():
+    s = AccountState(Client(account(positions=[('XUSDT', 1.5, 2.0), ('YUSDT', 0, 0), ('ZUSDT', -3, -1.0)])))
+    assert s.seed() == set()
+    assert sorted(s.open_positions()) == ['XUSDT', 'ZUSDT']
+    assert s.position_amount('XUSDT') == 1.5 and s.position_amount('YUSDT') == 0
+    assert s.balance() == 1000.0 and s.balance('BNB') == 2.0
+    assert s.total_wallet_balance() == 1002.0 and s.total_margin_balance() == 1003.0
+
+def test_stream_events_update_positions_and_balances():
+    s = AccountState(Client(account(positions=[('XUSDT', 1.5, 2.0)])))
+    s.seed()
+    s.apply(account_update(balances=[('USDT', 990.0)], positions=[('XUSDT', 0, 0), ('ZUSDT', 2, 0.5)]))
+    assert s.open_positions() == ['ZUSDT']
+    assert s.balance() == 990.0
+    assert s.total_wallet_balance() == 992.0 and s.total_margin_balance() == 992.5
+    s.apply({'e': 'ORDER_TRADE_UPDATE', 'o': {'s': 'ZUSDT', 'X': 'NEW'}})  # not a fill: nothing changes
+    assert s.position_amount('ZUSDT') == 2
+
+def test_reseed_reports_drift():
+    client = Client(account(positions=[('XUSDT', 1.5, 0)]))
+    s = AccountState(client)
+    s.seed()
+    client.snapshot = account(positions=[('XUSDT', 1.5, 0), ('ZUSDT', 4, 0)])  # an event for ZUSDT was missed
+    assert s.seed() == {'ZUSDT'}
+    assert s.position_amount('ZUSDT') == 4
+
+def test_events_during_a_reseed_are_kept():
+    client = Client(account(positions=[('XUSDT', 1.5, 0)]))
+    s = AccountState(client)
+    s.seed()
+    # the position closes and the wallet moves while futures_account() is in flight; the snapshot predates both
+    client.during = lambda: s.apply(account_update(balances=[('USDT', 1010.0)], positions=[('XUSDT', 0, 0)]))
+    assert s.seed() == set()
+    assert s.open_positions() == [] and s.balance() == 1010.0
+    client.during = lambda: s.apply({'e': 'ORDER_TRADE_UPDATE', 'o': {'s': 'YUSDT', 'X': 'FILLED'}})
+    client.snapshot = account(positions=[('YUSDT', 7, 0)])
+    assert s.seed() == set() and s.position_amount('YUSDT') == 0  # the fill is newer than the snapshot
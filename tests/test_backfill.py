@@ -0,0 +1,90 @@
+import time
+import numpy as np
+import pytest
+import BotClass, Helper
+from binance.helpers import date_to_milliseconds
+from KlineStore import KlineStore
+
+MINUTE = 60_000
+
+class StubKlines:
+    """futures_klines of a REST server holding one-minute candles up to now, recording every request."""
+    def __init__(self):
+        self.calls = []
+
+    def futures_klines(self, symbol, interval, startTime, endTime, limit):
+        self.calls.append({'symbol': symbol, 'start': startTime, 'end': endTime, 'limit': limit, 'at': time.monotonic()})
+        now = int(time.time() * 1000)
+        first = -(-startTime // MINUTE) * MINUTE
+        opens = range(first, min(endTime, now) + 1, MINUTE)[:limit]
+        return [[t, '1', '2', '0.5', str(1 + t // MINUTE % 7), '10', t + MINUTE - 1, '100', 1, '5', '50', '0'] for t in opens]
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Helper, 'make_socket_manager', lambda c: None)
+    c = Helper.CustomClient(StubKlines())
+    c.kline_store = None
+    return c
+
+def bots_for(symbols):
+    return [BotClass.Bot(s, [], [], [], [], [], [], 3, 2, i, 0.01, 'tripleEMA', '%', 1, 1) for i, s in enumerate(symbols)]
+
+def test_history_is_fetched_in_499_candle_pages(client):
+    symbols = ['AAAUSDT', 'BBBUSDT']
+    bots = bots_for(symbols)
+    client.combine_data(bots, list(symbols), '40 hours ago')
+    calls = client.client.calls
+    assert {c['limit'] for c in calls} == {Helper.KLINE_PAGE_LIMIT}
+    assert all((c['end'] - c['start']) // MINUTE + 1 <= Helper.KLINE_PAGE_LIMIT for c in calls)
+    assert len(calls) == 2 * len(range(0, 40 * 60 + 1, Helper.KLINE_PAGE_LIMIT))
+    for b in bots:
+        assert b.add_hist_complete
+        assert abs(len(b.Close) - 40 * 60) <= 2
+        assert np.all(np.diff(b.Date) == MINUTE)
+
+def test_weight_budget_blocks_until_refilled():
+    budget = Helper.WeightBudget(600)  # 10 weight per second
+    budget.acquire(600)
+    t0 = time.monotonic()
+    budget.acquire(5)
+    assert 0.4 <= time.monotonic() - t0 < 1.0
+
+def test_backfill_stays_within_weight_budget(client):
+    client.weight_budget = Helper.WeightBudget(600)
+    client.weight_budget.tokens = 0  # spent: every page waits for its weight
+    bots = bots_for(['AAAUSDT'])
+    t0 = time.monotonic()
+    client.combine_data(bots, ['AAAUSDT'], '40 hours ago')
+    calls = client.client.calls
+    weight = len(calls) * Helper.KLINE_PAGE_WEIGHT
+    assert time.monotonic() - t0 >= weight / 10 * 0.9
+    spans = [c['at'] - t0 for c in calls]
+    assert max(spans) >= (weight - Helper.KLINE_PAGE_WEIGHT) / 10 * 0.9
+
+def stored_candles(first_close, n):
+    d = first_close + np.arange(n) * MINUTE
+    return {'Date': d, 'Open': np.ones(n), 'High': np.ones(n) * 2, 'Low': np.ones(n) * 0.5, 'Close': np.ones(n), 'Volume': np.ones(n)}
+
+def test_store_inside_the_window_only_downloads_the_tail(client, tmp_path):
+    client.kline_store = KlineStore(str(tmp_path), '1m', MINUTE)
+    now = int(time.time() * 1000)
+    last = now // MINUTE * MINUTE - 10 * MINUTE - 1
+    client.kline_store.write('AAAUSDT', stored_candles(last - 5 * 60 * MINUTE, 5 * 60 + 1))
+    stored, pages = client._history_plan('AAAUSDT', now - 3 * 3600_000, now)
+    assert stored is not None and pages == client._kline_pages(last + 1, now)
+
+def test_stale_store_is_replaced_by_the_window(client, tmp_path):
+    """A store that ended long before the window starts must not pull in every candle since."""
+    client.kline_store = KlineStore(str(tmp_path), '1m', MINUTE)
+    now = int(time.time() * 1000)
+    month_ago = now // MINUTE * MINUTE - 30 * 1440 * MINUTE - 1
+    client.kline_store.write('AAAUSDT', stored_candles(month_ago - 5 * 60 * MINUTE, 5 * 60 + 1))
+    start = date_to_milliseconds('3 hours ago')
+    stored, pages = client._history_plan('AAAUSDT', start, now)
+    assert stored is None and len(pages) == 1
+
+    bots = bots_for(['AAAUSDT'])
+    client.combine_data(bots, ['AAAUSDT'], '3 hours ago')
+    assert len(client.client.calls) == 1
+    d = client.kline_store.read('AAAUSDT')['Date']
+    assert d[0] >= start and now - d[-1] < 2 * MINUTE
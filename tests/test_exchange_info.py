@@ -0,0 +1,65 @@
+import json
+import pytest
+import Helper, SharedHelper
+
+def symbol(name, status='TRADING', tick='0.01'):
+    return {'symbol': name, 'status': status, 'pricePrecision': 2, 'quantityPrecision': 3,
+            'filters': [{'filterType': 'LOT_SIZE', 'stepSize': '0.001'}, {'filterType': 'PRICE_FILTER', 'tickSize': tick}]}
+
+class Client:
+    def __init__(self, symbols):
+        self.symbols, self.calls = symbols, 0
+
+    def futures_exchange_info(self):
+        self.calls += 1
+        return {'symbols': self.symbols}
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    path = str(tmp_path / 'exchange_info.json')
+    monkeypatch.setattr(SharedHelper, 'EXCHANGE_INFO_CACHE', path)
+    monkeypatch.setattr(SharedHelper, '_exchange_info', {})
+    return path
+
+def test_exchange_info_is_fetched_once_per_ttl(cache, monkeypatch):
+    client = Client([symbol('XUSDT'), symbol('YUSDT', 'SETTLING', '0.5')])
+    info = SharedHelper.get_exchange_info(client, ttl=60)
+    assert info == {'XUSDT': ('TRADING', 2, 3, 0.01), 'YUSDT': ('SETTLING', 2, 3, 0.5)}
+    assert SharedHelper.get_exchange_info(client, ttl=60) == info and client.calls == 1
+    monkeypatch.setattr(SharedHelper, '_exchange_info', {})  # a new process reads the file
+    assert SharedHelper.get_exchange_info(client, ttl=60) == info and client.calls == 1
+    assert SharedHelper.get_all_symbols(client, []) == ['XUSDT']
+
+def test_expired_exchange_info_is_refetched(cache):
+    client = Client([symbol('XUSDT')])
+    SharedHelper.get_exchange_info(client, ttl=60)
+    with open(cache) as f: stored = json.load(f)
+    stored['fetched'] -= 61
+    with open(cache, 'w') as f: json.dump(stored, f)
+    SharedHelper._exchange_info = {}
+    client.symbols = [symbol('XUSDT'), symbol('ZUSDT')]
+    assert set(SharedHelper.get_exchange_info(client, ttl=60)) == {'XUSDT', 'ZUSDT'} and client.calls == 2
+
+class LeverageClient:
+    def __init__(self, current, fail=()):
+        self.current, self.fail, self.changed = current, fail, []
+
+    def futures_position_information(self):
+        return [{'symbol': s, 'positionSide': 'BOTH', 'leverage': str(lev)} for s, lev in self.current.items()]
+
+    def futures_change_leverage(self, symbol, leverage):
+        if symbol in self.fail: raise Exception('Invalid symbol.')
+        self.changed.append(symbol)
+
+def test_set_leverage_changes_only_the_symbols_that_differ():
+    c = Helper.CustomClient(LeverageClient({}))
+    c.client.current = {'AUSDT': c.leverage, 'BUSDT': c.leverage + 1, 'CUSDT': c.leverage}
+    symbols = ['AUSDT', 'BUSDT', 'CUSDT', 'DUSDT']
+    c.set_leverage(symbols)
+    assert sorted(c.client.changed) == ['BUSDT', 'DUSDT'] and symbols == ['AUSDT', 'BUSDT', 'CUSDT', 'DUSDT']
+
+def test_set_leverage_drops_symbols_that_fail():
+    c = Helper.CustomClient(LeverageClient({}, fail=('BUSDT',)))
+    symbols = ['AUSDT', 'BUSDT', 'CUSDT']
+    c.set_leverage(symbols)
+    assert symbols == ['AUSDT', 'CUSDT']
@@ -0,0 +1,51 @@
+import numpy as np
+import BotClass
+from HeikinAshi import heikin_ashi, heikin_ashi_step
+
+def old_heikin_ashi(Open, High, Low, Close):
+    """The per-candle loop Bot.add_hist() used before the array version."""
+    Open_H, Close_H, High_H, Low_H = [], [], [], []
+    Close_H.append((Open[0] + Close[0] + Low[0] + High[0]) / 4)
+    Open_H.append((Close[0] + Open[0]) / 2)
+    High_H.append(High[0]); Low_H.append(Low[0])
+    for i in range(1, len(Close)):
+        Open_H.append((Open_H[i-1] + Close_H[i-1]) / 2)
+        Close_H.append((Open[i] + Close[i] + Low[i] + High[i]) / 4)
+        High_H.append(max(High[i], Open_H[i], Close_H[i]))
+        Low_H.append(min(Low[i], Open_H[i], Close_H[i]))
+    return Open_H, High_H, Low_H, Close_H
+
+def ohlc(n, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return open_, np.maximum(open_, close) * 1.002, np.minimum(open_, close) * 0.998, close
+
+def test_array_version_is_bit_identical_to_the_loop():
+    o, h, l, c = ohlc(3000)
+    for new, old in zip(heikin_ashi(o, h, l, c), old_heikin_ashi(*(a.tolist() for a in (o, h, l, c)))):
+        np.testing.assert_array_equal(new, old)
+
+def test_short_and_empty_inputs():
+    o, h, l, c = ohlc(1)
+    for new, old in zip(heikin_ashi(o, h, l, c), old_heikin_ashi(o, h, l, c)): np.testing.assert_array_equal(new, old)
+    assert all(len(a) == 0 for a in heikin_ashi([], [], [], []))
+
+def test_live_steps_continue_the_series():
+    o, h, l, c = ohlc(600)
+    oh, hh, lh, ch = (list(a) for a in heikin_ashi(o[:300], h[:300], l[:300], c[:300]))
+    for i in range(300, 600):
+        x = heikin_ashi_step(oh[-1], ch[-1], o[i], h[i], l[i], c[i])
+        for a, v in zip((oh, hh, lh, ch), x): a.append(v)
+    for new, old in zip((oh, hh, lh, ch), old_heikin_ashi(o, h, l, c)): np.testing.assert_array_equal(new, old)
+
+def test_bot_keeps_heikin_ashi_columns_current():
+    o, h, l, c = ohlc(600)
+    d = np.arange(1, 601) * 60_000.0 - 1
+    b = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 1, 0.01, 'heikin_ashi_ema', '%', 1, 1)
+    b.add_hist(d[:300], o[:300], c[:300], h[:300], l[:300], np.ones(300))
+    for i in range(300, 600):
+        b.consume_new_candle({'T': d[i], 'o': o[i], 'h': h[i], 'l': l[i], 'c': c[i], 'q': 1.0})
+        b.generate_new_heikin_ashi()
+    for new, old in zip((b.Open_H, b.High_H, b.Low_H, b.Close_H), old_heikin_ashi(o, h, l, c)):
+        np.testing.assert_array_equal(new, old)
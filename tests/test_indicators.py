@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+import BotClass, Indicators, Swings
+
+N, SEED = 600, 300  # candles; the first SEED are seeded, the rest streamed one at a time
+RTOL, ATOL = 1e-7, 1e-9
+
+@pytest.fixture(scope='module')
+def klines():
+    rng = np.random.default_rng(7)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, N)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.004, N))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.004, N))
+    return {'Date': np.arange(1, N + 1) * 60_000.0 - 1, 'Open': open_, 'High': high, 'Low': low, 'Close': close,
+            'Volume': rng.uniform(1, 100, N)}
+
+HLC = ('High', 'Low', 'Close')
+CASES = {  # name: ({indicator name: (stream, inputs)} as IndicatorEngine specs, the ta series of the last one)
+    'ema': ({'x': (lambda: Indicators.EMA(20), ('Close',))}, lambda s: ta.trend.ema_indicator(s['Close'], 20)),
+    'sma': ({'x': (lambda: Indicators.SMA(20), ('Close',))}, lambda s: ta.trend.sma_indicator(s['Close'], 20)),
+    'rsi': ({'x': (lambda: Indicators.RSI(14), ('Close',))}, lambda s: ta.momentum.rsi(s['Close'], 14)),
+    'macd': ({'x': (lambda: Indicators.MACD(12, 26), ('Close',))}, lambda s: ta.trend.macd(s['Close'], 26, 12)),
+    'macd_signal': ({'m': (lambda: Indicators.MACD(12, 26), ('Close',)), 'x': (lambda: Indicators.EMA(9), ('m',))},
+                    lambda s: ta.trend.macd_signal(s['Close'], 26, 12, 9)),
+    'stoch': ({'x': (lambda: Indicators.Stoch(14), HLC)}, lambda s: ta.momentum.stoch(s['High'], s['Low'], s['Close'], 14, 3)),
+    'stoch_signal': ({'k': (lambda: Indicators.Stoch(14), HLC), 'x': (lambda: Indicators.SMA(3), ('k',))},
+                     lambda s: ta.momentum.stoch_signal(s['High'], s['Low'], s['Close'], 14, 3)),
+    'stochrsi_k': ({'x': (lambda: Indicators.StochRSIK(14, 3), ('Close',))}, lambda s: ta.momentum.stochrsi_k(s['Close'], 14, 3, 3)),
+    'stochrsi_d': ({'k': (lambda: Indicators.StochRSIK(14, 3), ('Close',)), 'x': (lambda: Indicators.SMA(3), ('k',))},
+                   lambda s: ta.momentum.stochrsi_d(s['Close'], 14, 3, 3)),
+    'bollinger_pband': ({'x': (lambda: Indicators.BollingerPBand(20, 2), ('Close',))}, lambda s: ta.volatility.bollinger_pband(s['Close'], 20, 2)),
+    'atr': ({'x': (lambda: Indicators.ATR(14), HLC)}, lambda s: ta.volatility.average_true_range(s['High'], s['Low'], s['Close'], 14)),
+    'rolling_max': ({'x': (lambda: Indicators.RollingMax(20), ('High',))}, lambda s: s['High'].rolling(20).max()),
+    'rolling_min': ({'x': (lambda: Indicators.RollingMin(20), ('Low',))}, lambda s: s['Low'].rolling(20).min()),
+}
+
+def engine(case):
+    return Indicators.IndicatorEngine({name: (make(), inputs, 1) for name, (make, inputs) in CASES[case][0].items()})
+
+def candle(k, i): return {c: float(k[c][i]) for c in ('Open', 'High', 'Low', 'Close', 'Volume')}
+
+def assert_parity(values, expected):
+    np.testing.assert_allclose(values, expected.to_numpy(dtype=float), rtol=RTOL, atol=ATOL, equal_nan=True)
+
+@pytest.mark.parametrize('case', CASES)
+def test_seed_matches_ta(klines, case):
+    e = engine(case)
+    e.seed({c: klines[c] for c in ('Open', 'High', 'Low', 'Close', 'Volume')})
+    assert_parity(e.values['x'], CASES[case][1]({c: pd.Series(v) for c, v in klines.items()}))
+
+@pytest.mark.parametrize('case', CASES)
+def test_streaming_updates_match_ta(klines, case):
+    e = engine(case)
+    e.seed({c: klines[c][:SEED] for c in ('Open', 'High', 'Low', 'Close', 'Volume')})
+    for i in range(SEED, N): e.update(candle(klines, i))
+    assert_parity(e.values['x'], CASES[case][1]({c: pd.Series(v) for c, v in klines.items()}))
+
+@pytest.mark.parametrize('case', CASES)
+def test_rollback_undoes_a_provisional_candle(klines, case):
+    e = engine(case)
+    e.seed({c: klines[c][:SEED] for c in ('Open', 'High', 'Low', 'Close', 'Volume')})
+    for i in range(SEED, N):
+        e.update({**candle(klines, i), 'Close': klines['Close'][i] * 1.01}, checkpoint=True)
+        assert e.rollback()
+        e.update(candle(klines, i))
+    assert_parity(e.values['x'], CASES[case][1]({c: pd.Series(v) for c, v in klines.items()}))
+
+def test_bot_remove_last_candle_rolls_back_indicators(klines):
+    """Open candles pushed and removed as in handle_socket_message(wait_for_candle_close=False) leave the indicators
+    where a bot fed only the closed candles has them."""
+    cols = ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')
+    live, closed = (BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 0, 0.01, 'tripleEMAStochasticRSIATR', 'x (ATR)', 1, 1) for _ in range(2))
+    for b in (live, closed): b.add_hist(*(klines[c][:SEED] for c in cols))
+    msg = lambda i, close, x: {'T': int(klines['Date'][i]), 'o': klines['Open'][i], 'h': klines['High'][i],
+                               'l': klines['Low'][i], 'c': close, 'q': klines['Volume'][i], 'x': x}
+    for i in range(SEED, N):
+        live.consume_new_candle(msg(i, klines['Close'][i] * 0.99, False))
+        live.pop_previous_value = True
+        live.update_indicators()
+        engine_before = live.engine
+        live.remove_last_candle()
+        assert live.engine is engine_before and live.engine.length == len(live.Close)
+        live.pop_previous_value = False
+        for b in (live, closed):
+            b.consume_new_candle(msg(i, klines['Close'][i], True))
+            b.update_indicators()
+    for name, ind in closed.indicators.items():
+        np.testing.assert_allclose(live.indicators[name]['values'], ind['values'], rtol=RTOL, atol=ATOL, equal_nan=True)
+
+STREAMS = {  # every stream class, including the swing streams the TP/SL modes use
+    'ema': lambda: Indicators.EMA(20), 'sma': lambda: Indicators.SMA(20), 'std': lambda: Indicators.RollingStd(20),
+    'max': lambda: Indicators.RollingMax(20), 'min': lambda: Indicators.RollingMin(20), 'rsi': lambda: Indicators.RSI(14),
+    'macd': lambda: Indicators.MACD(12, 26), 'stochrsi': lambda: Indicators.StochRSIK(14, 3),
+    'pband': lambda: Indicators.BollingerPBand(20, 2), 'swing_high': lambda: Swings.SwingHigh(2), 'swing_low': lambda: Swings.SwingLow(3),
+}
+
+@pytest.mark.parametrize('name', STREAMS)
+def test_rollback_after_several_provisional_ticks(klines, name):
+    """Open-candle ticks (each rolled back before the next) leave a stream where closed candles alone leave it."""
+    rng = np.random.default_rng(3)
+    close = klines['Close']
+    specs = lambda: {'x': (STREAMS[name](), ('Close',), 1)}
+    live, closed = Indicators.IndicatorEngine(specs()), Indicators.IndicatorEngine(specs())
+    for e in (live, closed): e.seed({'Close': close[:SEED]})
+    for i in range(SEED, N):
+        for tick in close[i] * (1 + rng.normal(0, 0.01, rng.integers(1, 4))):
+            live.update({'Close': float(tick)}, checkpoint=True)
+            assert live.rollback()
+        for e in (live, closed): e.update({'Close': float(close[i])})
+    np.testing.assert_array_equal(live.values['x'], closed.values['x'])
@@ -0,0 +1,51 @@
+import numpy as np
+import BotClass
+from KlineStore import KlineStore, TRIM_SLACK, COLUMNS
+
+STEP = 60_000
+
+def candles(first, n):
+    """n closed one-minute candles, the first closing at candle number `first`."""
+    d = (np.arange(first, first + n) + 1) * STEP - 1.0
+    return {'Date': d, 'Open': d / STEP, 'High': d / STEP + 1, 'Low': d / STEP - 1, 'Close': d / STEP, 'Volume': np.ones(n)}
+
+def kline(c, i):
+    return {'T': int(c['Date'][i]), 'o': c['Open'][i], 'h': c['High'][i], 'l': c['Low'][i], 'c': c['Close'][i], 'q': c['Volume'][i], 'x': True}
+
+class Spy(KlineStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.appended = []
+
+    def append(self, symbol, cols):
+        self.appended.append(len(cols['Date']))
+        return super().append(symbol, cols)
+
+def test_bot_saves_only_new_candles(tmp_path):
+    store = Spy(str(tmp_path), '1m', STEP)
+    c = candles(0, 600)
+    store.write('X', {k: v[:500] for k, v in c.items()})
+    b = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 1, 0.01, 'tripleEMA', '%', 1, 1, kline_store=store)
+    b.add_hist(*(list(c[k][:500]) for k in ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')))
+    b.save_closed_candles()
+    assert store.appended == []  # the store already holds the history
+    for i in range(500, 600):
+        b.consume_new_candle(kline(c, i))
+        b.save_closed_candles()
+        b.remove_first_candle()
+    assert store.appended == [1] * 100
+    assert np.array_equal(store.read('X')['Date'], c['Date'])
+
+def test_store_is_trimmed_to_retention(tmp_path):
+    store = KlineStore(str(tmp_path), '1m', STEP, retention=100)
+    c = candles(0, 1000)
+    store.write('X', c)
+    assert store.rows('X') == 100
+    sizes = []
+    for i in range(1000, 1400):
+        store.append('X', candles(i, 1))
+        sizes.append(store.rows('X'))
+    assert max(sizes) <= 100 * TRIM_SLACK and min(sizes) >= 100
+    stored = store.read('X')
+    assert np.array_equal(stored['Date'], candles(1400 - sizes[-1], sizes[-1])['Date'])
+    assert all(len(stored[k]) == sizes[-1] for k in COLUMNS)
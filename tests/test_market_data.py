@@ -0,0 +1,72 @@
+import pytest
+import MarketData
+
+@pytest.fixture
+def clock(monkeypatch):
+    """MarketData's monotonic clock, advanced by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(MarketData.time, 'monotonic', lambda: now[0])
+    return now
+
+def test_price_cache_reads_the_mark_price_stream(clock):
+    updates = []
+    cache = MarketData.PriceCache(on_update=lambda: updates.append(1))
+    cache.on_message([{'e': 'markPriceUpdate', 's': 'XUSDT', 'p': '10.5'}, {'e': 'markPriceUpdate', 's': 'YUSDT', 'p': '2'}])
+    cache.on_message({'stream': '!markPrice@arr@1s', 'data': [{'s': 'XUSDT', 'p': '11'}]})
+    assert cache.get('XUSDT') == 11.0 and cache.get('YUSDT') == 2.0 and cache.get('ZUSDT') is None
+    assert len(updates) == 2
+
+def test_price_cache_max_age(clock):
+    cache = MarketData.PriceCache()
+    cache.on_message([{'s': 'XUSDT', 'p': '10'}])
+    clock[0] += 3
+    assert cache.get('XUSDT', max_age=5) == 10.0
+    assert cache.get('XUSDT', max_age=2) is None
+    assert cache.get('XUSDT') == 10.0
+
+def test_price_cache_ignores_stream_errors(clock):
+    updates = []
+    cache = MarketData.PriceCache(on_update=lambda: updates.append(1))
+    cache.on_message([{'s': 'XUSDT', 'p': '10'}])
+    cache.on_message({'e': 'error', 'm': 'Max reconnect retries reached'})
+    assert cache.get('XUSDT') == 10.0 and len(updates) == 1
+
+def quote(symbol, bid, ask, u):
+    return {'stream': f'{symbol.lower()}@bookTicker', 'data': {'e': 'bookTicker', 's': symbol, 'b': str(bid), 'a': str(ask), 'u': u}}
+
+def test_book_ticker_keeps_the_latest_quote(clock):
+    book = MarketData.BookTicker()
+    book.on_message(0, quote('XUSDT', 10, 10.1, 5))
+    book.on_message(0, quote('XUSDT', 9, 9.1, 4))  # out of order
+    assert book.top('XUSDT', 1) == (10.0, 10.1)
+    book.on_message(0, quote('XUSDT', 11, 11.1, 6)['data'])
+    assert book.top('XUSDT', 1) == (11.0, 11.1) and book.top('YUSDT', 1) is None
+
+def test_book_ticker_freshness_follows_the_connection(clock):
+    book = MarketData.BookTicker()
+    book.on_message(0, quote('XUSDT', 10, 10.1, 1))
+    book.on_message(1, quote('YUSDT', 5, 5.1, 1))
+    clock[0] += 3
+    book.on_message(0, quote('ZUSDT', 1, 1.1, 1))  # XUSDT is quiet but its socket is alive
+    assert book.top('XUSDT', 2) == (10.0, 10.1)
+    assert book.top('YUSDT', 2) is None and book.top('YUSDT', 5) == (5.0, 5.1)
+
+def test_book_ticker_error_drops_that_connection(clock):
+    book = MarketData.BookTicker()
+    book.on_message(0, quote('XUSDT', 10, 10.1, 1))
+    book.on_message(1, quote('YUSDT', 5, 5.1, 1))
+    book.on_message(0, {'e': 'error', 'm': 'Connection closed'})
+    assert book.top('XUSDT', 60) is None and book.top('YUSDT', 60) == (5.0, 5.1)
+    book.on_message(0, quote('XUSDT', 10, 10.1, 2))  # resynced after the reconnect
+    assert book.top('XUSDT', 60) == (10.0, 10.1)
+
+def test_book_ticker_multiplexes_symbols_per_connection(clock):
+    class Twm:
+        def __init__(self): self.sockets = []
+        def start_futures_multiplex_socket(self, callback, streams): self.sockets.append((callback, streams))
+    twm, book = Twm(), MarketData.BookTicker()
+    book.start(twm, ['AUSDT', 'BUSDT', 'CUSDT', 'DUSDT', 'EUSDT'], 2)
+    assert [streams for _, streams in twm.sockets] == [['ausdt@bookTicker', 'busdt@bookTicker'],
+                                                       ['cusdt@bookTicker', 'dusdt@bookTicker'], ['eusdt@bookTicker']]
+    twm.sockets[2][0](quote('EUSDT', 1, 2, 1))
+    assert book.book['EUSDT'][3] == 2
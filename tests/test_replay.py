@@ -0,0 +1,74 @@
+import time
+from queue import Queue
+import numpy as np
+import pytest
+import BotClass, Capture, Replay
+
+N, HIST = 2400, 2000
+BOT = {'symbol': 'XUSDT', 'OP': 3, 'CP': 2, 'tick': 0.01, 'index': 0, 'strategy': 'tripleEMAStochasticRSIATR',
+       'TP_SL_choice': '%', 'SL_mult': 1.5, 'TP_mult': 1, 'params': {},
+       'strategies': [{'strategy': 'EMA_cross', 'TP_SL_choice': 'x (ATR)', 'SL_mult': 2, 'TP_mult': 3}]}
+COLUMNS = ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')
+
+def kline_events(n, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    k = {'Date': (np.arange(1, n + 1) * 60_000 - 1).tolist(), 'Open': np.r_[close[0], close[:-1]].tolist(), 'Close': close.tolist(),
+         'High': (close * 1.003).tolist(), 'Low': (close * 0.997).tolist(), 'Volume': rng.uniform(1, 100, n).tolist()}
+    events = [{'e': 'kline', 'E': k['Date'][i] + 1, 's': BOT['symbol'],
+               'k': {'T': k['Date'][i], 'o': str(k['Open'][i]), 'h': str(k['High'][i]), 'l': str(k['Low'][i]),
+                     'c': str(k['Close'][i]), 'q': str(k['Volume'][i]), 'x': True}} for i in range(HIST, n)]
+    return {c: v[:HIST] for c, v in k.items()}, events
+
+def wait_for(path, n, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if sum(1 for _ in Capture.read([str(path)])) >= n: return
+        time.sleep(0.1)
+    pytest.fail(f'capture holds fewer than {n} messages after {timeout}s')
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    """A live Bot fed through the capturing socket callback: (capture directory, signals it put)."""
+    recorder = Capture.MessageRecorder()
+    monkeypatch.setattr(Capture, 'FLUSH_INTERVAL', 0.1)
+    monkeypatch.setattr(Capture, 'recorder', recorder)
+    monkeypatch.setattr(Capture, 'record', recorder.record)
+    recorder.start('signals', str(tmp_path))
+
+    hist, events = kline_events(N)
+    signals = Queue()
+    b = BotClass.Bot(symbol=BOT['symbol'], Open=[], Close=[], High=[], Low=[], Volume=[], Date=[], OP=BOT['OP'], CP=BOT['CP'],
+                     index=BOT['index'], tick=BOT['tick'], strategy=BOT['strategy'], TP_SL_choice=BOT['TP_SL_choice'],
+                     SL_mult=BOT['SL_mult'], TP_mult=BOT['TP_mult'], signal_queue=signals, print_trades_q=Queue(),
+                     params=BOT['params'], strategies=BOT['strategies'])
+    Capture.record('bot', BOT)
+    b.add_hist(*(list(hist[c]) for c in COLUMNS))
+    Capture.record('hist', {'s': BOT['symbol'], **hist})
+    on_message = Capture.captured('kline', b.handle_socket_message)
+    live = []
+    for msg in events:
+        on_message(msg)
+        while not signals.empty():
+            s = signals.get()
+            live.append({'time': msg['k']['T'], 'symbol': s[0], 'strategy': s[9], 'direction': int(s[4]), 'sl': float(s[6]), 'tp': float(s[7])})
+    wait_for(tmp_path, 2 + len(events))
+    return tmp_path, live
+
+def test_replay_reproduces_live_signals(session):
+    path, live = session
+    assert len({s['strategy'] for s in live}) == 2  # both configured strategies fired during the session
+    r = Replay.replay([str(path)])
+    assert r['stats']['kline_messages'] == N - HIST
+    assert r['signals'] == live
+    assert not any(Replay.diff(r['signals'], live).values())
+
+def test_replay_is_deterministic(session):
+    path, _ = session
+    assert Replay.replay([str(path)])['signals'] == Replay.replay([str(path)])['signals']
+
+def test_diff_reports_a_changed_strategy(session):
+    path, live = session
+    other = Replay.replay([str(path)], strategy='tripleEMA')['signals']
+    d = Replay.diff(other, live)
+    assert d['missing'] and d['extra']
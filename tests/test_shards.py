@@ -0,0 +1,35 @@
+import pytest
+import Helper, Shards
+from LiveTradingConfig import backfill_weight_per_minute
+
+class FakeProcess:
+    started = []
+
+    def __init__(self, target, args, daemon):
+        self.args = args
+
+    def start(self): FakeProcess.started.append(self.args)
+
+@pytest.fixture
+def shard_args(monkeypatch):
+    monkeypatch.setattr(Shards.multiprocessing, 'Process', FakeProcess)
+    monkeypatch.setattr(Shards, 'load_costs', lambda: {})
+    monkeypatch.setattr(Shards, 'collect_stats', lambda stats_q, costs: None)
+    FakeProcess.started = []
+    return FakeProcess.started
+
+@pytest.mark.parametrize('n', [1, 2, 3, 8])
+def test_shards_share_one_weight_budget(shard_args, n):
+    symbols = [f'S{i}USDT' for i in range(20)]
+    Shards.start_shards(symbols, n, None, None, '3 hours ago')
+    assert len(shard_args) == n
+    assert sum(args[-1] for args in shard_args) == pytest.approx(backfill_weight_per_minute)
+
+def test_empty_shards_get_no_budget(shard_args):
+    Shards.start_shards(['AUSDT', 'BUSDT'], 4, None, None, '3 hours ago')
+    assert [args[-1] for args in shard_args] == [backfill_weight_per_minute / 2] * 2
+
+def test_client_budget_is_its_share(monkeypatch):
+    monkeypatch.setattr(Helper, 'make_socket_manager', lambda c: None)
+    assert Helper.CustomClient(object(), 300).weight_budget.capacity == 300
+    assert Helper.CustomClient(object()).weight_budget.capacity == backfill_weight_per_minute
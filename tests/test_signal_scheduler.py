@@ -0,0 +1,43 @@
+import time
+from queue import Queue
+import pytest
+from SignalScheduler import SignalScheduler
+
+def signal(symbol, age, strategy='s'):
+    return [symbol, 3, 2, 0.01, 1, 0, 0.5, 1.0, time.time() - age, strategy]
+
+def scheduler(signals, **kwargs):
+    """A scheduler whose pump has taken every signal in `signals`."""
+    q = Queue()
+    s = SignalScheduler(q, **kwargs)
+    for x in signals: q.put(x)
+    deadline = time.monotonic() + 5
+    while s.metrics()['received'] < len(signals):
+        if time.monotonic() > deadline: pytest.fail('pump did not drain the queue')
+        time.sleep(0.01)
+    return s
+
+def test_a_newer_signal_replaces_the_pending_one():
+    s = scheduler([signal('X', 3, 'a'), signal('Y', 2), signal('X', 1, 'b')])
+    m = s.metrics()
+    assert (m['depth'], m['received'], m['replaced']) == (2, 3, 1)
+    assert [s.get()[0] for _ in range(2)] == ['Y', 'X']
+    assert s.metrics()['served'] == 2
+
+def test_stale_signals_are_dropped():
+    s = scheduler([signal('X', 30), signal('Y', 1), signal('Z', 20)], max_age=15)
+    assert s.get()[0] == 'Y'
+    m = s.metrics()
+    assert (m['stale'], m['served'], m['depth']) == (2, 1, 0)
+    assert m['wait_p50_ms'] >= 1000
+
+@pytest.mark.parametrize('priority, order', [('oldest', ['X', 'Z', 'Y']), ('newest', ['Y', 'Z', 'X'])])
+def test_priority(priority, order):
+    s = scheduler([signal('X', 5), signal('Y', 1), signal('Z', 3)], priority=priority)
+    assert [s.get()[0] for _ in range(3)] == order
+
+def test_get_waits_for_a_signal():
+    q = Queue()
+    s = SignalScheduler(q)
+    q.put(signal('X', 0))
+    assert s.get()[0] == 'X'
@@ -0,0 +1,56 @@
+import numpy as np
+import BotClass, Indicators
+import TradingStrats as TS
+
+OLD_DISPATCH = ['StochRSIMACD', 'tripleEMAStochasticRSIATR', 'tripleEMA', 'breakout', 'stochBB', 'goldenCross', 'candle_wick',
+                'fibMACD', 'EMA_cross', 'heikin_ashi_ema2', 'heikin_ashi_ema', 'ema_crossover']  # make_decision's if/elif chain
+
+def test_every_strategy_is_registered():
+    assert set(OLD_DISPATCH) <= set(TS.STRATEGIES)
+    for name, st in TS.STRATEGIES.items():
+        assert st.fn is getattr(TS, name) and BotClass.STRATEGY_PARAMS[name] == st.params
+        graph = Indicators.IndicatorGraph()
+        graph.add(st.indicators, st.params)  # every param name a declaration uses has a default
+        assert BotClass.required_buffer(name) == graph.lookback() + st.lookback > 0
+
+def test_params_override_defaults():
+    assert BotClass.params_for('tripleEMA', {'ema_long': 80}) == {'ema_long': 80, 'ema_mid': 20, 'ema_short': 5}
+    assert BotClass.required_buffer('tripleEMA', {'ema_long': 80}) > BotClass.required_buffer('tripleEMA')
+    assert BotClass.strategy_signal('no_such_strategy', {}, {}) == -99
+
+def test_graph_deduplicates_nodes():
+    g = Indicators.IndicatorGraph()
+    a = g.add(TS.STRATEGIES['tripleEMA'].indicators, {'ema_long': 50, 'ema_mid': 20, 'ema_short': 5})
+    b = g.add(TS.STRATEGIES['EMA_cross'].indicators, {'ema_short': 5, 'ema_long': 20})
+    assert len(g.nodes) == 3  # EMA(5), EMA(20), EMA(50)
+    assert b == {'EMA_S': a['EMA_S'], 'EMA_L': a['EMA_M']}
+    c = g.add(TS.STRATEGIES['EMA_cross'].indicators, {'ema_short': 8, 'ema_long': 20})
+    assert len(g.nodes) == 4 and c['EMA_S'] not in a.values() and c['EMA_L'] == a['EMA_M']
+
+def test_graph_resolves_inputs_to_shared_nodes():
+    g = Indicators.IndicatorGraph()
+    a = g.add(TS.STRATEGIES['stochBB'].indicators, TS.STRATEGIES['stochBB'].params)
+    b = g.add(TS.STRATEGIES['heikin_ashi_ema'].indicators, TS.STRATEGIES['heikin_ashi_ema'].params)
+    assert (b['fastk'], b['fastd']) == (a['fastk'], a['fastd'])
+    assert g.nodes[a['fastd']][2] == (a['fastk'],)  # the SMA reads the StochRSI node, not a copy of it
+    specs = list(g.specs())
+    assert specs.index(a['fastk']) < specs.index(a['fastd'])
+
+def test_bot_slots_share_one_graph():
+    rng = np.random.default_rng(2)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400)))
+    extra = [{'strategy': 'EMA_cross', 'TP_SL_choice': 'x (ATR)', 'SL_mult': 2, 'TP_mult': 3},
+             {'strategy': 'tripleEMAStochasticRSIATR', 'name': 'tEMA', 'TP_SL_choice': 'x (ATR)', 'SL_mult': 1, 'TP_mult': 1}]
+    b = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 0, 0.01, 'tripleEMA', 'x (ATR)', 1, 1, strategies=extra)
+    b.add_hist(list(np.arange(400) * 60_000.0), list(close), list(close), list(close * 1.002), list(close * 0.998), [1.0] * 400)
+    own, cross, tema = b.slots
+    assert cross.aliases['EMA_S'] == own.aliases['EMA_S'] and cross.aliases['EMA_L'] == own.aliases['EMA_M']
+    assert own.aliases['ATR'] == cross.aliases['ATR'] == tema.aliases['ATR']
+    # EMA 5/20/50 of tripleEMA, EMA 100/50/20 of tEMA (50 and 20 shared), StochRSI and its SMA, one ATR
+    assert len(b.engine.streams) == 7
+    for slot in b.slots:
+        ind = b.indicators_for(slot)
+        solo = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 0, 0.01, slot.strategy, slot.TP_SL_choice, 1, 1)
+        solo.add_hist(*(list(b.candles[k]) for k in ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')))
+        for name, v in solo.indicators.items():
+            np.testing.assert_array_equal(ind[name]['values'], v['values'])
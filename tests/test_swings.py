@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import Swings
+import TradingStrats as TS
+
+def old_extrema(arr, level, peak=True):
+    """Bot._extrema before swing_points()."""
+    n = len(arr)
+    out = [0] * n
+    for i in range(n):
+        if i < level or i > n - level - 1: continue
+        ok = all((arr[i] > arr[i-k] and arr[i] > arr[i+k]) if peak else (arr[i] < arr[i-k] and arr[i] < arr[i+k]) for k in range(1, level + 1))
+        out[i] = arr[i] if ok else 0
+    return out
+
+def old_scan(highs, lows, peaks, troughs, i, lvl):
+    """The swing search of the old SetSLTP: most recent swing at or before i - lvl beyond the price at i."""
+    high_swing, low_swing = highs[i], lows[i]
+    hf = lf = 0
+    for j in range(i - lvl, -1, -1):
+        if highs[j] > high_swing and not hf and peaks[j]: high_swing = peaks[j]; hf = 1
+        if lows[j] < low_swing and not lf and troughs[j]: low_swing = troughs[j]; lf = 1
+        if hf and lf: break
+    return high_swing, low_swing
+
+@pytest.fixture(scope='module')
+def hl():
+    rng = np.random.default_rng(11)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 800)))
+    return close * (1 + rng.uniform(0, 0.003, 800)), close * (1 - rng.uniform(0, 0.003, 800)), close
+
+@pytest.mark.parametrize('level', [1, 2, 3])
+def test_swing_points_match_old_extrema(hl, level):
+    high, low, close = hl
+    for arr in (high, low, close):
+        np.testing.assert_array_equal(Swings.swing_points(arr, level, True), old_extrema(arr.tolist(), level, True))
+        np.testing.assert_array_equal(Swings.swing_points(arr, level, False), old_extrema(arr.tolist(), level, False))
+
+@pytest.mark.parametrize('level', [1, 2, 3])
+@pytest.mark.parametrize('mode', ['Swing High/Low', 'Swing Close'])
+def test_swing_streams_match_old_scan(hl, level, mode):
+    high, low, close = hl
+    if mode == 'Swing Close': high = low = close
+    peaks, troughs = old_extrema(high.tolist(), level, True), old_extrema(low.tolist(), level, False)
+    sh, sl = Swings.SwingHigh(level).seed(high), Swings.SwingLow(level).seed(low)
+    for i in range(len(close)):
+        assert (sh[i], sl[i]) == old_scan(high, low, peaks, troughs, i, level)
+
+@pytest.mark.parametrize('level', [1, 3])
+def test_swing_streams_over_a_sliding_buffer(hl, level):
+    """With drop_first() as the Bot calls it, the stream answers the old scan over the buffer the Bot holds."""
+    high, low, _ = hl
+    w = 120
+    sh, sl = Swings.SwingHigh(level), Swings.SwingLow(level)
+    sh.seed(high[:w]); sl.seed(low[:w])
+    buf_h, buf_l = list(high[:w]), list(low[:w])
+    for i in range(w, len(high)):
+        buf_h.append(high[i]); buf_l.append(low[i])
+        got = sh.update(high[i]), sl.update(low[i])
+        assert got == old_scan(buf_h, buf_l, old_extrema(buf_h, level, True), old_extrema(buf_l, level, False), len(buf_h) - 1, level)
+        buf_h.pop(0); buf_l.pop(0); sh.drop_first(); sl.drop_first()
+
+@pytest.mark.parametrize('direction', [0, 1])
+def test_set_sltp_distances(hl, direction):
+    high, low, close = hl
+    sh, sl = Swings.SwingHigh(2).seed(high), Swings.SwingLow(2).seed(low)
+    i = 700
+    got = TS.SetSLTP(None, None, sh, sl, close, direction, 1.5, 2, 'x (Swing High/Low) level 2', i)
+    dist = 1.5 * (sh[i] - close[i]) if direction == 0 else 1.5 * (close[i] - sl[i])
+    assert got == (dist, 2 * dist)
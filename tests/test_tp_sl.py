@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import ta
+import pandas as pd
+import BotClass
+from test_swings import old_extrema
+
+HIST, N = 300, 500
+CHOICES = ['%', 'x (ATR)', 'x (Swing High/Low) level 1', 'x (Swing High/Low) level 3', 'x (Swing Close) level 2']
+COLUMNS = ('Date', 'Open', 'Close', 'High', 'Low', 'Volume')
+
+def old_set_sltp(stop_loss_val_arr, take_profit_val_arr, peaks, troughs, Close, High, Low, Trade_Direction, SL, TP, TP_SL_choice, current_index):
+    """TradingStrats.SetSLTP before TP_SL_at(), fed the whole-buffer arrays make_decision() used to rebuild."""
+    i = current_index
+    tp = sl = -99
+    if TP_SL_choice in ('%', 'x (ATR)'):
+        tp = take_profit_val_arr[i]; sl = stop_loss_val_arr[i]
+    else:
+        if TP_SL_choice.startswith('x (Swing Close) level'): High = Low = Close
+        high_swing, low_swing = High[i], Low[i]
+        hf = lf = 0
+        lvl = int(TP_SL_choice[-1])
+        for j in range(i - lvl, -1, -1):
+            if High[j] > high_swing and not hf and peaks[j]:
+                high_swing = peaks[j]; hf = 1
+            if Low[j] < low_swing and not lf and troughs[j]:
+                low_swing = troughs[j]; lf = 1
+            if (hf and Trade_Direction == 0) or (lf and Trade_Direction == 1): break
+        if Trade_Direction == 0:
+            sl = SL * (high_swing - Close[i]); tp = TP * sl
+        elif Trade_Direction == 1:
+            sl = SL * (Close[i] - low_swing); tp = TP * sl
+    return sl, tp
+
+def old_tp_sl(b, choice, direction, SL, TP):
+    """The old update_TP_SL() arrays over the Bot's current buffer, then the old SetSLTP at the last candle."""
+    H, L, C = list(b.High), list(b.Low), list(b.Close)
+    tp_val = sl_val = peaks = troughs = None
+    if choice == '%':
+        tp_val, sl_val = [(TP/100)*p for p in C], [(SL/100)*p for p in C]
+    elif choice == 'x (ATR)':
+        atr = ta.volatility.average_true_range(pd.Series(H), pd.Series(L), pd.Series(C))
+        tp_val, sl_val = [TP*abs(a) for a in atr], [SL*abs(a) for a in atr]
+    else:
+        lvl = int(choice[-1])
+        src_h, src_l = (C, C) if 'Close' in choice else (H, L)
+        peaks, troughs = old_extrema(src_h, lvl, True), old_extrema(src_l, lvl, False)
+    return old_set_sltp(sl_val, tp_val, peaks, troughs, C, H, L, direction, SL, TP, choice, len(C) - 1)
+
+@pytest.fixture(scope='module')
+def klines():
+    rng = np.random.default_rng(5)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, N)))
+    open_ = np.r_[close[0], close[:-1]]
+    return {'Date': np.arange(1, N + 1) * 60_000.0 - 1, 'Open': open_, 'Close': close,
+            'High': np.maximum(open_, close) * (1 + rng.uniform(0, 0.004, N)),
+            'Low': np.minimum(open_, close) * (1 - rng.uniform(0, 0.004, N)), 'Volume': rng.uniform(1, 100, N)}
+
+@pytest.mark.parametrize('choice', CHOICES)
+def test_tp_sl_at_matches_the_whole_buffer_arrays(klines, choice):
+    """Streamed over a sliding buffer, the point query answers what the old whole-buffer SetSLTP answered."""
+    b = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 0, 0.01, 'tripleEMA', choice, 1.5, 2)
+    b.add_hist(*(list(klines[c][:HIST]) for c in COLUMNS))
+    for i in range(HIST, N):
+        b.consume_new_candle({'T': int(klines['Date'][i]), 'o': klines['Open'][i], 'h': klines['High'][i],
+                              'l': klines['Low'][i], 'c': klines['Close'][i], 'q': klines['Volume'][i]})
+        b.update_indicators()
+        for d in (0, 1):
+            np.testing.assert_allclose(b.TP_SL_at(d, b.current_index), old_tp_sl(b, choice, d, 1.5, 2), rtol=1e-7)
+        b.remove_first_candle()
+
+def test_each_slot_uses_its_own_choice(klines):
+    b = BotClass.Bot('X', [], [], [], [], [], [], 3, 2, 0, 0.01, 'tripleEMA', '%', 1.5, 2,
+                     strategies=[{'strategy': 'EMA_cross', 'TP_SL_choice': 'x (Swing High/Low) level 2', 'SL_mult': 1, 'TP_mult': 3}])
+    b.add_hist(*(list(klines[c]) for c in COLUMNS))
+    own, other = b.slots
+    assert b.TP_SL_at(1, -1, own) == old_tp_sl(b, '%', 1, 1.5, 2)
+    assert b.TP_SL_at(1, -1, other) == old_tp_sl(b, 'x (Swing High/Low) level 2', 1, 1, 3)
@@ -0,0 +1,77 @@
+from queue import Queue
+import TradeManager as TM
+from AccountState import AccountState
+from Helper import Trade, TradeRegistry
+
+class Client:
+    """Futures client stub: batch results are scripted per call, order ids count up from 100."""
+    def __init__(self, batch_errors=(), batch_down=False, position='0.5'):
+        self.batches, self.singles, self.cancelled = [], [], []
+        self.batch_errors, self.batch_down, self.position = list(batch_errors), batch_down, position
+        self.next_id = 100
+
+    def _id(self):
+        self.next_id += 1
+        return self.next_id
+
+    def futures_place_batch_order(self, batchOrders):
+        if self.batch_down: raise Exception('batch endpoint unavailable')
+        self.batches.append(batchOrders)
+        errors = self.batch_errors.pop(0) if self.batch_errors else ()
+        return [{'code': -2021, 'msg': 'Order would immediately trigger.'} if o['type'] in errors else {'orderId': self._id()} for o in batchOrders]
+
+    def futures_create_order(self, **o):
+        self.singles.append(o)
+        return {'orderId': self._id()}
+
+    def futures_cancel_all_open_orders(self, symbol): self.cancelled.append(symbol)
+    def futures_position_information(self, symbol): return [{'symbol': symbol, 'positionAmt': self.position}]
+
+def manager(client):
+    tm = TM.TradeManager.__new__(TM.TradeManager)
+    tm.client, tm.account, tm.active_trades, tm.print_trades_q = client, AccountState(client), TradeRegistry(), Queue()
+    tm.use_trailing_stop, tm.trailing_stop_callback = False, 0.1
+    return tm
+
+def trade(tm):
+    return tm.active_trades.add(Trade(0, 10.0, 0.5, 1.0, 0.5, 1, 1, 'XUSDT', 2, 0.01))
+
+def test_both_legs_go_in_one_batch():
+    client = Client()
+    tm = manager(client)
+    t = trade(tm)
+    assert tm.place_tp_sl(t, 0.5) == 1
+    assert len(client.batches) == 1 and not client.singles and not client.cancelled
+    assert [o['type'] for o in client.batches[0]] == ['STOP_MARKET', 'TAKE_PROFIT']
+    assert client.batches[0][0]['stopPrice'] == '9.5' and client.batches[0][1]['price'] == '11'
+    assert all(isinstance(v, str) for o in client.batches[0] for v in o.values())
+    assert (t.SL_id, t.TP_id) == (101, 102) and tm.active_trades.for_order(102) is t
+    assert t.unprotected_ms is not None and tm.print_trades_q.get_nowait()
+
+def test_a_retry_places_only_the_missing_leg():
+    client = Client(batch_errors=[('STOP_MARKET',)])
+    tm = manager(client)
+    t = trade(tm)
+    assert tm.place_tp_sl(t, 0.5) == 3
+    assert (t.SL_id, t.TP_id) == (-1, 101)
+    assert tm.place_tp_sl(t, 0.5) == 1
+    assert [o['type'] for o in client.batches[1]] == ['STOP_MARKET']
+    assert (t.SL_id, t.TP_id) == (102, 101)
+    assert tm.place_tp_sl(t, 0.5) == 1 and len(client.batches) == 2  # nothing left to place
+
+def test_polling_path_replaces_both_legs_for_the_position_size():
+    client = Client(batch_errors=[('STOP_MARKET',)], position='-0.3')
+    tm = manager(client)
+    t = trade(tm)
+    tm.place_tp_sl(t, 0.5)
+    assert tm.place_tp_sl(t) == 1  # the fill size is unknown: cancel leftovers, size from the position
+    assert client.cancelled == ['XUSDT'] and t.position_size == 0.3
+    assert [(o['type'], o['quantity']) for o in client.batches[1]] == [('STOP_MARKET', '0.3'), ('TAKE_PROFIT', '0.3')]
+
+def test_falls_back_to_single_orders():
+    client = Client(batch_down=True)
+    tm = manager(client)
+    t = trade(tm)
+    assert tm.place_tp_sl(t, 0.5) == 1
+    assert sorted(o['type'] for o in client.singles) == ['STOP_MARKET', 'TAKE_PROFIT']
+    assert {t.SL_id, t.TP_id} == {101, 102}
@@ -0,0 +1,35 @@
+from Helper import Trade, TradeRegistry
+
+def trade(symbol, order_id):
+    return Trade(0, 10.0, 1.0, 1.0, 0.5, 1, order_id, symbol, 2, 0.01)
+
+def test_trades_are_found_by_symbol_and_by_order():
+    r = TradeRegistry()
+    x, y = r.add(trade('XUSDT', 1)), r.add(trade('YUSDT', 2))
+    assert len(r) == 2 and sorted(r.symbols()) == ['XUSDT', 'YUSDT']
+    assert r.get('XUSDT') is x and r.for_order(2) is y and r.for_order(3) is None
+    x.TP_id, x.SL_id = 11, -1  # SL placement failed
+    r.index_orders(x)
+    assert r.for_order(11) is x and r.for_order(-1) is None and r.for_order('') is None
+
+def test_remove_drops_every_index():
+    r = TradeRegistry()
+    x = r.add(trade('XUSDT', 1))
+    x.TP_id, x.SL_id = 11, 12
+    r.index_orders(x)
+    r.remove(x)
+    assert len(r) == 0 and r.get('XUSDT') is None
+    assert all(r.for_order(oid) is None for oid in (1, 11, 12))
+
+def test_removing_a_replaced_trade_keeps_its_successor():
+    r = TradeRegistry()
+    old = r.add(trade('XUSDT', 1))
+    new = r.add(trade('XUSDT', 2))
+    r.remove(old)
+    assert r.get('XUSDT') is new and r.for_order(2) is new and r.for_order(1) is None
+
+def test_iteration_is_a_snapshot():
+    r = TradeRegistry()
+    for k, sym in enumerate(('XUSDT', 'YUSDT', 'ZUSDT')): r.add(trade(sym, k))
+    for t in r: r.remove(t)  # what the monitoring threads do when trades close
+    assert len(r) == 0